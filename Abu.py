@@ -21,20 +21,18 @@ from __future__ import division, print_function, absolute_import
 
 import os
 import sys
-import time
-
-from datetime import datetime as dt
-from requests.exceptions import ConnectionError as RCE
-
-import pytz
 
 from ligmos.utils import amq, classes, common
 from ligmos.utils import amqListeners as amql
 from ligmos.workers import connSetup, workerSetup
 
+from dataservants import wireformat
 from dataservants.abu import parseargs
-from dataservants.abu.http import webgetter
-from dataservants.abu.filewatch import checkFileHash
+from dataservants.abu.helpers import publishPacket
+from dataservants.abu.http import webgetter, fetchAll, closeSessions
+from dataservants.abu.scheduler import PollScheduler
+from dataservants.abu.filewatch import FileWatcher, LogTailer
+from dataservants.abu.filewatch import waitForChange
 
 from dataservants.abu.power import parseiSense
 from dataservants.abu.purpleair import purplePreparer
@@ -57,10 +55,12 @@ def main():
     eargs = parseargs.extraArguments
     conftype = classes.sneakyTarget
 
-    # Interval between successive runs of the polling loop (seconds)
+    # Default interval between polls of a source (seconds); each config
+    #   section can set its own 'interval' and 'jitter' to override this
     bigsleep = 60
 
-    # Time for tiny sleeps (in sec) to allow for abort checks/other processes
+    # Time for tiny sleeps (in sec) between checks of watched files that
+    #   can't use inotify, and have to be polled instead
     microsleep = 0.1
 
     # Quick renaming to keep line length under control
@@ -91,57 +91,87 @@ def main():
     amqtopics = amq.getAllTopics(config, comm)
     amqs = connSetup.connAMQ(comm, amqtopics, amqlistener=amqlistener)
 
+    # Sources that are files get watched, and are only read when they
+    #   actually change; everything else is polled on a schedule
+    watchers = {}
+    for sect in config:
+        if config[sect].resourcemethod.lower() == 'file':
+            watchers.update({sect: FileWatcher(config[sect].resourcelocation)})
+
+    # Sources that are logs get followed, and their new lines are sent
+    #   along as they are (one message per line) whenever they're due
+    tailers = {}
+    for sect in config:
+        sObj = config[sect]
+        if sObj.resourcemethod.lower() == 'logtail':
+            dated = str(getattr(sObj, 'dated', True)).lower() == 'true'
+            statefile = getattr(sObj, 'statefile', '/tmp/abu_%s.tail' % sect)
+            tailers.update({sect: LogTailer(sObj.resourcelocation,
+                                            statefile=statefile,
+                                            dated=dated)})
+
+    # Keeps track of which sources are due to be polled, and when
+    sched = PollScheduler({sect: config[sect] for sect in config
+                           if sect not in watchers}, definterval=bigsleep)
+
     # Semi-infinite loop
     while runner.halt is False:
         amqs = amq.checkConnections(amqs, subscribe=True)
 
+        # Only the sources that are actually due this time around, plus
+        #   any watched files that have changed
+        duesects = sched.popDue()
+        duesects += [sect for sect in watchers if watchers[sect].changed()]
+
+        # Grab all the web resources at once, so a dead one only holds up
+        #   itself rather than every other one behind it too
+        websects = [sect for sect in duesects if
+                    config[sect].resourcemethod.lower() in ['http', 'https']]
+        fetched = fetchAll(config, websects)
+
         # Actually do our actions
-        for sect in config:
+        for sect in duesects:
             sObj = config[sect]
             connObj = amqs[sObj.broker][0]
             wxml = ''
-            if sObj.resourcemethod.lower() in ['http', 'https']:
+            if sect in tailers:
+                lines = tailers[sect].readNew()
+                if lines != []:
+                    print("Sending %d lines to %s" % (len(lines),
+                                                      sObj.pubtopic))
+                for line in lines:
+                    connObj.publish(sObj.pubtopic, line)
+                continue
+
+            if sect in fetched:
+                now, wxml = fetched[sect]
+            if sect in watchers:
+                # Only here at all because the file changed, so read it
+                print("File (%s) has changed" % (sObj.resourcelocation))
                 try:
-                    # The timekeeping on these weather servers I'm pulling
-                    #   from is absolutely awful, so just use my server time
-                    #   since it won't be minutes off
-                    now = dt.now().astimezone(pytz.UTC)
-                    wxml = webgetter(sObj.resourcelocation,
-                                     user=sObj.user,
-                                     pw=sObj.password)
-                except RCE:
-                    print("Connection error! %s" % (sect))
-                    print("Moving on, hope it's temporary")
-                    wxml = ''
-            if sObj.resourcemethod.lower() == 'file':
-                # This will happen the first time through checking a file
-                #   so just make sure the attribute we need exists from now on
-                if hasattr(sObj, 'prevFileHash') is False:
-                    sObj.prevFileHash = None
-
-                fhash, changed = checkFileHash(sObj.resourcelocation,
-                                               oldhash=sObj.prevFileHash,
-                                               debug=True)
-
-                if changed is True:
-                    try:
-                        with open(sObj.resourcelocation, 'r') as f:
-                            wxml = f.read()
-                        sObj.prevFileHash = fhash
-                    except (IOError, OSError) as err:
-                        print(str(err))
-                        wxml = ''
-                else:
+                    with open(sObj.resourcelocation, 'r') as f:
+                        wxml = f.read()
+                except (IOError, OSError) as err:
+                    print(str(err))
                     wxml = ''
 
             if wxml != '':
                 bxml = None
+                # XML unless asked otherwise; see dataservants.wireformat
+                wfmt = getattr(sObj, 'wireformat', 'xml').lower()
+                if wfmt not in wireformat.FORMATS:
+                    print("Unknown wireformat %s for %s; using xml" %
+                          (wfmt, sect))
+                    wfmt = 'xml'
+
                 if sObj.devicetype.lower() == "columbia_orion":
                     # This one doesn't get a 'rootkey' argument because
                     #   the rootkey for the XML is already the station name
-                    bxml, val = parseColumbia(wxml, returnDict=True)
+                    bxml, val = parseColumbia(wxml, returnDict=True,
+                                              wireformat=wfmt)
                 elif sObj.devicetype.lower() == "isense":
-                    bxml = parseiSense(wxml, rootKey=sObj.name)
+                    bxml = parseiSense(wxml, rootKey=sObj.name,
+                                       wireformat=wfmt)
                 elif sObj.devicetype.lower() == "meteobridge_vantagepro2":
                     # NOTE: This will return a dict of XML packets
                     #   so it can easily be cross-posted to multiple
@@ -150,16 +180,21 @@ def main():
                     #   that can differ by quite a bit (a few minutes)
                     #   depending on the RF link and the station itself
                     bxml = parseMeteobridge(wxml, stationName=sObj.name,
-                                            stationType="DavisVantagePro2")
+                                            stationType="DavisVantagePro2",
+                                            wireformat=wfmt)
                 elif sObj.devicetype.lower() == "boltwood_cloudsensorii":
-                    bxml = boltwood_clarityii(wxml, timezone="US/Arizona")
+                    bxml = boltwood_clarityii(wxml, timezone="US/Arizona",
+                                              wireformat=wfmt)
                 elif sObj.devicetype.lower() == "aag_cloudwatcher":
-                    bxml = aagcloudwatcher(wxml, timezone="US/Arizona")
+                    bxml = aagcloudwatcher(wxml, timezone="US/Arizona",
+                                           wireformat=wfmt)
                 elif sObj.devicetype.lower() == "virtualweatherstation":
                     bxml = parseVirtualWeatherStation(wxml,
-                                                      timezone='US/Arizona')
+                                                      timezone='US/Arizona',
+                                                      wireformat=wfmt)
                 elif sObj.devicetype.lower() == "purpleair_pa-ii":
-                    bxml = purplePreparer(wxml, now, devType=sObj.devicetype)
+                    bxml = purplePreparer(wxml, now, devType=sObj.devicetype,
+                                          wireformat=wfmt)
                 else:
                     print("WARNING: NO BROKER FUNCTION FOUND FOR %s" %
                           (sect))
@@ -192,19 +227,27 @@ def main():
                         for xp in bxml.keys():
                             particularTopic = "%s.%s" % (sObj.pubtopic, xp)
                             print("Sending to %s" % (particularTopic))
-                            connObj.publish(particularTopic, bxml[xp])
+                            publishPacket(connObj, particularTopic,
+                                          bxml[xp], wireformat=wfmt)
                     else:
                         print("Sending to %s" % (sObj.pubtopic))
-                        connObj.publish(sObj.pubtopic, bxml)
+                        publishPacket(connObj, sObj.pubtopic, bxml,
+                                      wireformat=wfmt)
 
-        # Consider taking a big nap
+        # Consider taking a nap until the next source is due
         if runner.halt is False:
-            print("Starting a big sleep")
-            # Sleep for bigsleep, but in small chunks to check abort
-            for _ in range(round(bigsleep/microsleep)):
-                time.sleep(microsleep)
-                if runner.halt is True:
-                    break
+            naptime = sched.timeUntilNext()
+            if naptime is None:
+                # Nothing configured at all, so just do the big sleep
+                naptime = bigsleep
+            if naptime > 0:
+                print("Sleeping %.1f s until the next poll" % (naptime))
+            # Sleep until then, but wake right up if a watched file
+            #   changes in the meantime; only watched files that can't
+            #   use inotify need the small chunks of sleep to poll them
+            waitForChange(list(watchers.values()), naptime,
+                          halted=lambda: runner.halt,
+                          pollsleep=microsleep)
 
     # The above loop is exited when someone sends SIGTERM
     print("PID %d is now out of here!" % (pid))
@@ -212,6 +255,11 @@ def main():
     # Disconnect from all ActiveMQ brokers
     amq.disconnectAll(amqs)
 
+    # Close any kept-alive web connections and file watches too
+    closeSessions()
+    for sect in watchers:
+        watchers[sect].close()
+
     # The PID file will have already been either deleted/overwritten by
     #   another function/process by this point, so just give back the
     #   console and return STDOUT and STDERR to their system defaults
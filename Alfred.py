@@ -18,6 +18,7 @@ from ligmos.utils import classes, common, confparsers
 from ligmos.workers import connSetup, workerSetup
 
 from dataservants import alfred
+from dataservants import hostpool
 # from dataservants import yvette
 
 
@@ -42,6 +43,9 @@ def defineActions():
                                      args=[],
                                      kwargs={})
 
+    # NOTE: If these are turned back on, act2 - act4 can instead be done
+    #   in a single Yvette round trip with yvetteR.actionBatch and
+    #   kwargs={'actions': ['freespace', 'cpumem', 'checkProcess'], ...}
     # act2 = common.processDescription(func=yvetteR.actionSpace,
     #                                  name='CheckFreeSpace',
     #                                  timedelay=3.,
@@ -175,10 +179,11 @@ def main():
         #   looping over each instrument.  We keep the main while
         #   loop out here, though, so we can do stuff with the
         #   results of the actions from all the instruments.
-        _ = common.instLooper(config, runner, args,
-                              actions, updateArguments,
-                              baseYcmd,
-                              db=idbs, alarmtime=alarmtime)
+        _ = hostpool.instLooperPool(config, runner, args,
+                                    actions, updateArguments,
+                                    baseYcmd,
+                                    db=idbs, alarmtime=alarmtime,
+                                    nworkers=args.hostWorkers)
 
         # Doing the extra pings as a side job/quickie
         #   No need to make this into a big to-do
@@ -41,13 +41,13 @@ def main():
     # comm: common block from config file
     # args: parsed options
     # runner: class that contains logic to quit nicely
-    config, comm, _, runner = workerSetup.toServeMan(conf,
-                                                     passes,
-                                                     logfile,
-                                                     desc=desc,
-                                                     extraargs=eargs,
-                                                     conftype=conftype,
-                                                     logfile=True)
+    config, comm, args, runner = workerSetup.toServeMan(conf,
+                                                        passes,
+                                                        logfile,
+                                                        desc=desc,
+                                                        extraargs=eargs,
+                                                        conftype=conftype,
+                                                        logfile=True)
 
     # Get this PID for diagnostics
     pid = os.getpid()
@@ -64,6 +64,7 @@ def main():
     #   config file to define different listeners, to spread the load
     topicTypes = {}
     brokerConns = {}
+    dbBuffers = []
     for eachSection in config.keys():
         if eachSection.lower().startswith("topic") is True:
             print("%s:" % (eachSection))
@@ -88,6 +89,27 @@ def main():
                 print("Database %s not in config :(" % (conSect.database))
                 dbr = None
 
+            # Batch up the writes rather than doing one per message.  The
+            #   spool always goes first, if there is one, so --nobuffer
+            #   only means unbuffered when there's no spool
+            if dbr is not None and (args.nobuffer is False or
+                                    args.spooldir is not None):
+                if args.nobuffer is True:
+                    print("--spooldir given, so --nobuffer is ignored")
+                # Each topic section gets its own spool, since each has its
+                #   own database connection for the spool to drain into
+                dbspool = None
+                if args.spooldir is not None:
+                    sdir = os.path.join(args.spooldir, eachSection)
+                    dbspool = iago.spool.Spool(sdir, dbr,
+                                               batchpoints=args.batchpoints,
+                                               maxdelay=args.batchdelay)
+                dbr = iago.dbbuffer.BufferedInflux(dbr,
+                                                   maxpoints=args.batchpoints,
+                                                   maxdelay=args.batchdelay,
+                                                   spool=dbspool)
+                dbBuffers.append(dbr)
+
             # I admit in retrospect that this sucks
             if conSect.listenertype.lower() == "ldt":
                 prlistener = iago.listener_LDT.LDTConsumer(dbconn=dbr)
@@ -104,6 +126,15 @@ def main():
                 print("Using no databases and switching to Parrot listener!")
                 prlistener = amql.ParrotSubscriber()
 
+            if isinstance(prlistener, iago.routing.RoutedConsumer):
+                prlistener.fastxml = args.fastxml
+
+            # Do the actual parsing in a pool of workers, so the receiving
+            #   thread never gets stuck behind a slow message
+            if args.workers > 0:
+                qlistener = iago.dispatch.QueuedListener
+                prlistener = qlistener(prlistener, nworkers=args.workers)
+
             topicTypes.update({eachSection: [conSect, prlistener]})
 
             bkr = connSetup.connAMQ_simple(comm[conSect.broker],
@@ -123,7 +154,19 @@ def main():
 
         # There really isn't anything to actually *do* in here;
         #   all the real work happens in the listeners, so we really
-        #   just spin our wheels here.
+        #   just spin our wheels here.  Other than keeping an eye on how
+        #   far behind the listeners and databases are, that is.
+        for eachSection in topicTypes:
+            prlistener = topicTypes[eachSection][1]
+            if isinstance(prlistener, iago.dispatch.QueuedListener):
+                total, each = prlistener.depth()
+                print("%s: %d messages queued %s" % (eachSection, total,
+                                                     each))
+        for each in dbBuffers:
+            print("%s: %d points buffered" % (each.tablename, each.depth()))
+            if each.spool is not None:
+                print("%s: %d bytes spooled" % (each.tablename,
+                                                each.spool.depth()))
 
         # Consider taking a big nap
         if runner.halt is False:
@@ -141,6 +184,16 @@ def main():
     for each in brokerConns:
         brokerConns[each][0].disconnect()
 
+    # Finish off anything the workers still have waiting
+    for eachSection in topicTypes:
+        prlistener = topicTypes[eachSection][1]
+        if isinstance(prlistener, iago.dispatch.QueuedListener):
+            prlistener.close()
+
+    # Now that nothing else is coming in, write out whatever's left
+    for each in dbBuffers:
+        each.close()
+
     # The PID file will have already been either deleted/overwritten by
     #   another function/process by this point, so just give back the
     #   console and return STDOUT and STDERR to their system defaults
@@ -21,6 +21,7 @@ import time
 
 from dataservants import mandos
 from dataservants import yvette
+from dataservants import hostpool
 from dataservants import wadsworth
 from ligmos.workers import workerSetup
 from ligmos.utils import classes, common
@@ -67,6 +68,7 @@ def updateArguments(actions, iobj, args, baseYcmd, db=None):
     # act1 == actionSpace
     actions[0].args = [baseYcmd, iobj]
     actions[0].kwargs = {'db': db,
+                         'agent': args.agent,
                          'debug': args.debug}
 
     # act2 == cleanRemote
@@ -146,11 +148,12 @@ def main():
         #   looping over each instrument.  We keep the main while
         #   loop out here, though, so we can do stuff with the
         #   results of the actions from all the instruments.
-        _ = common.instLooper(config, runner, args,
-                                actions, updateArguments,
-                                baseYcmd,
-                                db=None,
-                                alarmtime=alarmtime)
+        _ = hostpool.instLooperPool(config, runner, args,
+                                    actions, updateArguments,
+                                    baseYcmd,
+                                    db=None,
+                                    alarmtime=alarmtime,
+                                    nworkers=args.hostWorkers)
 
         # After all the instruments are done, take a big nap
         if runner.halt is False:
@@ -15,9 +15,10 @@ import sys
 import time
 
 from dataservants import yvette
+from dataservants import hostpool
 from dataservants import wadsworth
 from ligmos.utils import classes, common
-from ligmos.workers import workerSetup
+from ligmos.workers import connSetup, workerSetup
 
 
 def defineActions():
@@ -61,11 +62,12 @@ def updateArguments(actions, iobj, args, baseYcmd, db=None):
     # act1 == actionSpace
     actions[0].args = [baseYcmd, iobj]
     actions[0].kwargs = {'db': db,
+                         'agent': args.agent,
                          'debug': args.debug}
 
     # act2 == buttleData
     actions[1].args = [baseYcmd, args, iobj]
-    actions[1].kwargs = {}
+    actions[1].kwargs = {'db': db}
 
     return actions
 
@@ -129,17 +131,25 @@ def main():
     print("Defining all base functions for each instrument...")
     actions = defineActions()
 
+    # Check to see if there are any connections/objects to establish
+    idbs = connSetup.connIDB(comm)
+
+    # This has to happen before any host workers are forked, so that they
+    #   all share the same limit on the number of rsyncs
+    wadsworth.transfer.setUplinkLimit(args.rsyncUplink)
+
     # Semi-infinite loop
     while runner.halt is False:
         # This is a common core function that handles the actions and
         #   looping over each instrument.  We keep the main while
         #   loop out here, though, so we can do stuff with the
         #   results of the actions from all the instruments.
-        _ = common.instLooper(config, runner, args,
-                              actions, updateArguments,
-                              baseYcmd,
-                              db=None,
-                              alarmtime=alarmtime)
+        _ = hostpool.instLooperPool(config, runner, args,
+                                    actions, updateArguments,
+                                    baseYcmd,
+                                    db=idbs,
+                                    alarmtime=alarmtime,
+                                    nworkers=args.hostWorkers)
 
         # After all the instruments are done, take a big nap
         if runner.halt is False:
@@ -2,6 +2,8 @@ from . import http
 from . import helpers
 from . import parseargs
 from . import filewatch
+from . import scheduler
+from . import backfill
 
 from . import power
 from . import broker
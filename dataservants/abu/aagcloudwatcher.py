@@ -15,20 +15,15 @@ Further description.
 
 from __future__ import division, print_function, absolute_import
 
-from datetime import datetime as dt
-
-import pytz
-import xmltodict as xmld
+from ..wireformat import encodePacket
+from ..timestamps import parseTimestamp, localizeTime
 
 
 def aagcloudwatcher(msg,
                     rootname="AAGCloudWatcher",
-                    timezone='US/Arizona'):
+                    timezone='US/Arizona', wireformat='xml'):
     """
     """
-    # File date/time timezone object that we'll need for later
-    thisTZ = pytz.timezone(timezone)
-
     # Since we read it in as lines() split it into two lines so we can grab
     #   the header lines first
     twolines = msg.strip().split("\n")
@@ -51,13 +46,13 @@ def aagcloudwatcher(msg,
         headers = headers[2:]
 
         dtstr = "%sT%s" % (datadate, datatime)
-        dtobj = dt.strptime(dtstr, "%Y-%m-%dT%H:%M:%S")
+        dtobj = parseTimestamp(dtstr, "%Y-%m-%dT%H:%M:%S")
 
         # You *need* to do this in this exact way; datetime.replate(tzinfo)
         #   will give weird results like a timezone offset of -07:28 !
-        # thisTZ needs to be the timezone of the machine where the data file
+        # timezone needs to be that of the machine where the data file
         #   was written, and since it's Windows it's likely to be local time.
-        dtobj_aware = thisTZ.localize(dtobj)
+        dtobj_aware = localizeTime(dtobj, timezone)
         # dtobj_utc = dtobj_aware.astimezone(pytz.UTC)
 
         # Start to assemble the output dictionary.
@@ -87,7 +82,7 @@ def aagcloudwatcher(msg,
 
     root = {rootname: fields}
     if fields != {}:
-        npacket = xmld.unparse(root, pretty=True)
+        npacket = encodePacket(root, wireformat=wireformat)
     else:
         npacket = None
 
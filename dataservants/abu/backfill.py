@@ -0,0 +1,443 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Bulk loading of whole Boltwood/AAG/VWS history files.
+
+The regular parsers (:func:`dataservants.abu.boltwood.boltwood_clarityii`
+and friends) handle exactly one record at a time, doing a strptime and a
+pytz localize for every single one; fine for live data, but terrible for
+backfilling months of it.  These read an entire file into columns instead,
+convert all of the timestamps at once with numpy (the timezone offset is
+only looked up once for each distinct hour in the file, which handles DST
+correctly without asking pytz about every row), and give back the points
+in batches ready for the database.
+
+The fields (and their types) match what the regular parsers make, except
+that ``timestampdt`` is left out since it's the point's time anyways.
+Records that the regular parsers would choke on (bad timestamps, or
+numbers that aren't) are skipped rather than sinking the whole file.
+
+Can also be run directly to turn history files into line protocol, e.g.
+for ``influx write``::
+
+    python -m dataservants.abu.backfill boltwood BoltwoodHistory.txt
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import sys
+import time
+import argparse as argp
+from datetime import datetime as dt
+
+import numpy as np
+import pytz
+
+from ..wireformat import formatLine
+
+
+# Same translations as in dataservants.abu.boltwood
+BOLTWOODFLAGS = {"tempUnit": {"C": "Celsius", "F": "Fahrenheit"},
+                 "windUnit": {"K": "km/hr", "M": "mi/hr", "m": "m/s"},
+                 "moisture": ["dry", "recentMoisture", "currentMoisture"],
+                 "clouds": ["unknown", "clear", "cloudy", "verycloudy"],
+                 "wind": ["unknown", "calm", "windy", "verywindy"],
+                 "rain": ["unknown", "dry", "wet", "activelyraining"],
+                 "light": ["unknown", "dark", "light", "verylight"],
+                 "closure": ["canopen", "close"]}
+
+# Same columns as in dataservants.abu.weather.parseVirtualWeatherStation
+VWSCOLUMNS = {7: "WindSpeed", 8: "WindGust", 9: "WindDir",
+              10: "InsideHumidity", 11: "OutsideHumidity",
+              12: "InsideTemp", 13: "OutsideTemp",
+              14: "Pressure",
+              15: "TotalRain", 16: "DailyRain", 17: "HourlyRain",
+              18: "ConditionFlag", 25: "Evapotranspiration",
+              26: "UVIndex", 27: "SolarRadiation",
+              28: "WindChill",
+              29: "IndoorHeatIndex", 30: "OutdoorHeatIndex",
+              31: "Dewpoint", 32: "RainRate",
+              33: "OutdoorTempRate", 34: "IndoorTempRate",
+              35: "PressureRate",
+              36: "Channel1TempRate", 37: "Channel2TempRate",
+              38: "Channel3TempRate"}
+
+
+def localToEpochMS(local, timezone='US/Arizona'):
+    """Convert naive local times into UTC epoch milliseconds, all at once.
+
+    Args:
+        local (:class:`numpy.ndarray`)
+            Array of naive local times, as datetime64.
+        timezone (:obj:`str`, optional)
+            Timezone the times are in. Defaults to 'US/Arizona'.
+
+    Returns:
+        epochms (:class:`numpy.ndarray`)
+            int64 array of milliseconds since the (UTC) epoch.
+    """
+    thisTZ = pytz.timezone(timezone)
+    local = local.astype('datetime64[ms]')
+
+    # UTC offsets only change on the hour (or at least, on hours that
+    #   aren't going to show up in weather data) so only do the slow
+    #   localize() once for each distinct hour
+    hours = local.astype('datetime64[h]')
+    uniq, inv = np.unique(hours, return_inverse=True)
+    offsets = np.empty(len(uniq), dtype=np.int64)
+    for i, hour in enumerate(uniq.astype('datetime64[s]').astype(object)):
+        offset = thisTZ.localize(hour).utcoffset()
+        offsets[i] = round(offset.total_seconds()*1e3)
+
+    return local.astype(np.int64) - offsets[inv.ravel()]
+
+
+def parseLocal(dates, times):
+    """Turn columns of ISO-ish date and time strings into datetime64[ms].
+
+    Falls back to strptime on each one if numpy won't take them all at once,
+    which happens if they're not zero padded (e.g. 2021-4-7) or such.
+    Any that still can't be parsed are NaT.
+    """
+    dtstrs = np.char.add(np.char.add(dates, 'T'), times)
+    try:
+        return np.array(dtstrs, dtype='datetime64[ms]')
+    except ValueError:
+        pass
+
+    local = np.full(len(dtstrs), np.datetime64('NaT'), dtype='datetime64[ms]')
+    for i, each in enumerate(dtstrs):
+        fmt = "%Y-%m-%dT%H:%M:%S.%f" if '.' in each else "%Y-%m-%dT%H:%M:%S"
+        try:
+            local[i] = dt.strptime(each, fmt)
+        except ValueError:
+            pass
+
+    return local
+
+
+def numericRows(arr):
+    """Which rows of a 2D string array convert entirely to floats.
+
+    Returns:
+        good (:class:`numpy.ndarray`)
+            Boolean mask, True for the rows that are all numbers.
+    """
+    try:
+        arr.astype(np.float64)
+        return np.ones(len(arr), dtype=bool)
+    except ValueError:
+        pass
+
+    good = np.ones(len(arr), dtype=bool)
+    for i, row in enumerate(arr):
+        try:
+            [float(each) for each in row]
+        except ValueError:
+            good[i] = False
+
+    return good
+
+
+def keepRows(arr, good):
+    """Drop the bad rows (with a note about how many there were).
+    """
+    nbad = len(good) - np.count_nonzero(good)
+    if nbad > 0:
+        print("Skipping %d unparseable records" % (nbad), file=sys.stderr)
+        arr = arr[good]
+
+    return arr
+
+
+def lookup(table, codes):
+    """Translate an array of integer codes through a list, 'unknown' if bad.
+    """
+    table = np.array(list(table) + ['unknown'])
+    codes = np.where((codes >= 0) & (codes < len(table) - 1),
+                     codes, len(table) - 1)
+
+    return table[codes]
+
+
+def toFloats(col):
+    """Convert a column of strings to floats, with NaN for the bad ones.
+
+    Returns:
+        vals (:class:`numpy.ndarray`)
+            Float values, or None if not a single one of them converted,
+            meaning the column is really just strings.
+    """
+    try:
+        return col.astype(np.float64)
+    except ValueError:
+        pass
+
+    vals = np.full(len(col), np.nan)
+    for i, each in enumerate(col):
+        try:
+            vals[i] = float(each)
+        except ValueError:
+            pass
+    if np.all(np.isnan(vals)):
+        return None
+
+    return vals
+
+
+def boltwoodColumns(lines, timezone='US/Arizona'):
+    """Columns for a Boltwood ClarityII history file.
+
+    Returns:
+        epochms (:class:`numpy.ndarray`)
+            Timestamp of each record (UTC epoch ms).
+        cols (:obj:`dict`)
+            Each field's array of values.
+    """
+    rows = [line.split() for line in lines]
+    rows = [row for row in rows if len(row) == 20]
+    if rows == []:
+        return np.array([], dtype=np.int64), {}
+    arr = np.array(rows)
+
+    # Everything after the date, time and two units columns is a number
+    local = parseLocal(arr[:, 0], arr[:, 1])
+    good = ~np.isnat(local) & numericRows(arr[:, 4:])
+    arr, local = keepRows(arr, good), local[good]
+    epochms = localToEpochMS(local, timezone=timezone)
+
+    nums = arr[:, 4:].astype(np.float64)
+    # The flags and the seconds since the last read are ints, just like
+    #   the regular parser makes them
+    codes = nums.astype(np.int64)
+
+    tunits = BOLTWOODFLAGS['tempUnit']
+    wunits = BOLTWOODFLAGS['windUnit']
+    cols = {"tempUnits": np.array([tunits.get(u, "unknown")
+                                   for u in arr[:, 2]]),
+            "windUnits": np.array([wunits.get(u, "unknown")
+                                   for u in arr[:, 3]]),
+            "relSkyTemp": nums[:, 0],
+            "ambientTemp": nums[:, 1],
+            "enclosureTemp": nums[:, 2],
+            "windSpeed": nums[:, 3],
+            "relativeHumidity": nums[:, 4],
+            "dewpoint": nums[:, 5],
+            "heaterPercentage": nums[:, 6],
+            "moistureFlagRaw": codes[:, 8],
+            "moistureFlag": lookup(BOLTWOODFLAGS['moisture'], codes[:, 8]),
+            "secondsSinceRead": codes[:, 9],
+            "cloudFlagRaw": codes[:, 11],
+            "cloudFlag": lookup(BOLTWOODFLAGS['clouds'], codes[:, 11]),
+            "windFlagRaw": codes[:, 12],
+            "windFlag": lookup(BOLTWOODFLAGS['wind'], codes[:, 12]),
+            # The single record parser overwrites the first rain flag with
+            #   this second one, so only the second one ends up stored
+            "rainFlagRaw": codes[:, 13],
+            "rainFlag": lookup(BOLTWOODFLAGS['rain'], codes[:, 13]),
+            "lightFlagRaw": codes[:, 14],
+            "lightFlag": lookup(BOLTWOODFLAGS['light'], codes[:, 14]),
+            "closureFlagRaw": codes[:, 15],
+            "closureSuggestion": lookup(BOLTWOODFLAGS['closure'],
+                                        codes[:, 15]),
+            "skyTemp": nums[:, 0] + nums[:, 1]}
+
+    return epochms, cols
+
+
+def aagColumns(lines, timezone='US/Arizona'):
+    """Columns for an AAG CloudWatcher history file (header line first).
+
+    Returns:
+        epochms (:class:`numpy.ndarray`)
+            Timestamp of each record (UTC epoch ms).
+        cols (:obj:`dict`)
+            Each field's array of values.
+    """
+    if len(lines) < 2:
+        return np.array([], dtype=np.int64), {}
+
+    headers = lines[0].replace('"', '').replace(" ", "").split(",")
+    rows = [line.replace('"', '').replace(" ", "").split(",")
+            for line in lines[1:]]
+    rows = [row for row in rows if len(row) == 20]
+    if rows == []:
+        return np.array([], dtype=np.int64), {}
+    arr = np.array(rows)
+
+    # Bad values in the rest are just left out of their own record
+    local = parseLocal(arr[:, 0], arr[:, 1])
+    good = ~np.isnat(local)
+    arr, local = keepRows(arr, good), local[good]
+    epochms = localToEpochMS(local, timezone=timezone)
+
+    cols = {}
+    for i, col in enumerate(headers[2:]):
+        vals = arr[:, i + 2]
+        if col == 'RainHeatingPercentage':
+            # Has a trailing % on it
+            vals = np.char.rstrip(vals, '%')
+        fvals = toFloats(vals)
+        if fvals is not None:
+            cols.update({col: fvals})
+        else:
+            # Just strings; empty ones are skipped just like in the parser
+            cols.update({col: np.where(vals == '', None, vals)})
+
+    return epochms, cols
+
+
+def vwsColumns(lines, timezone='US/Arizona'):
+    """Columns for a VirtualWeatherStation history (CSV) file.
+
+    Returns:
+        epochms (:class:`numpy.ndarray`)
+            Timestamp of each record (UTC epoch ms).
+        cols (:obj:`dict`)
+            Each field's array of values.
+    """
+    rows = [line.split(",") for line in lines]
+    rows = [row for row in rows if len(row) == 41]
+    if rows == []:
+        return np.array([], dtype=np.int64), {}
+    arr = np.array(rows)
+    arr = keepRows(arr, numericRows(arr[:, 1:7]) &
+                   numericRows(arr[:, sorted(VWSCOLUMNS)]))
+
+    # Build the timestamps right from their (integer) components
+    ymdhms = arr[:, 1:7].astype(np.float64).astype(np.int64)
+    local = (ymdhms[:, 0] - 1970).astype('datetime64[Y]')
+    local = local.astype('datetime64[M]') + (ymdhms[:, 1] - 1)
+    local = local.astype('datetime64[D]') + (ymdhms[:, 2] - 1)
+    local = local.astype('datetime64[s]') + ymdhms[:, 3]*3600 + \
+        ymdhms[:, 4]*60 + ymdhms[:, 5]
+    epochms = localToEpochMS(local, timezone=timezone)
+
+    cols = {}
+    for idx in VWSCOLUMNS:
+        cols.update({VWSCOLUMNS[idx]: arr[:, idx].astype(np.float64)})
+
+    return epochms, cols
+
+
+# What to use for each device type, and its default measurement name
+LOADERS = {'boltwood_cloudsensorii': (boltwoodColumns,
+                                      "BoltwoodCloudSensorII"),
+           'aag_cloudwatcher': (aagColumns, "AAGCloudWatcher"),
+           'virtualweatherstation': (vwsColumns, "VirtualWeatherStation")}
+
+
+def pointBatches(epochms, cols, meas, batchsize=5000):
+    """Turn the columns into batches of InfluxDB points.
+
+    Yields:
+        points (:obj:`list`)
+            Up to batchsize points, with times in epoch ms (so write them
+            with a time precision of 'ms').
+    """
+    names = list(cols.keys())
+    # tolist() gets us plain python values, and is way quicker than
+    #   pulling them out of the arrays one at a time
+    colvals = [cols[name].tolist() for name in names]
+    times = epochms.tolist()
+
+    for start in range(0, len(times), batchsize):
+        batch = []
+        for i in range(start, min(start + batchsize, len(times))):
+            fields = {}
+            for name, vals in zip(names, colvals):
+                val = vals[i]
+                # Skip the missing ones (NaN != NaN)
+                if val is not None and val == val:
+                    fields[name] = val
+            batch.append({'measurement': meas, 'time': times[i],
+                          'fields': fields})
+        yield batch
+
+
+def backfillFile(fname, devtype, timezone='US/Arizona', rootname=None,
+                 batchsize=5000, db=None):
+    """Load a whole history file, optionally writing it to the database.
+
+    Args:
+        fname (:obj:`str`)
+            History file to load.
+        devtype (:obj:`str`)
+            Device type, as in the Abu configuration (boltwood_cloudsensorii,
+            aag_cloudwatcher, or virtualweatherstation).
+        timezone (:obj:`str`, optional)
+            Timezone of the file's timestamps. Defaults to 'US/Arizona'.
+        rootname (:obj:`str`, optional)
+            Measurement name. Defaults to None, which means the same one
+            that the regular parser uses.
+        batchsize (:obj:`int`, optional)
+            Points per batch. Defaults to 5000.
+        db (:class:`ligmos.utils.database.influxobj`, optional)
+            Database to write the batches to. Defaults to None.
+
+    Yields:
+        points (:obj:`list`)
+            Each batch of points; see :func:`pointBatches`.
+    """
+    try:
+        loader, defroot = LOADERS[devtype.lower()]
+    except KeyError:
+        raise ValueError("No bulk loader for device type %s!" % (devtype))
+
+    with open(fname, 'r') as f:
+        lines = f.read().splitlines()
+
+    epochms, cols = loader(lines, timezone=timezone)
+    print("Loaded %d records from %s" % (len(epochms), fname),
+          file=sys.stderr)
+
+    meas = rootname if rootname is not None else defroot
+    for batch in pointBatches(epochms, cols, meas, batchsize=batchsize):
+        if db is not None:
+            db.singleCommit(batch, table=db.tablename, timeprec='ms',
+                            close=False)
+        yield batch
+
+
+def main():
+    """
+    Convert history files to line protocol on stdout.
+    """
+    parser = argp.ArgumentParser(description="Bulk load weather history "
+                                             "files as line protocol")
+    parser.add_argument('devtype', type=str, choices=list(LOADERS.keys()),
+                        help='Device type of the files')
+    parser.add_argument('files', type=str, nargs='+',
+                        help='History files to load')
+    parser.add_argument('--timezone', type=str, default='US/Arizona',
+                        help='Timezone of the timestamps in the files')
+    parser.add_argument('--rootname', type=str, default=None,
+                        help='Measurement name to use')
+    args = parser.parse_args()
+
+    npts = 0
+    t0 = time.perf_counter()
+    for fname in args.files:
+        for batch in backfillFile(fname, args.devtype,
+                                  timezone=args.timezone,
+                                  rootname=args.rootname):
+            for point in batch:
+                line = formatLine(point['measurement'], point['fields'],
+                                  ts=point['time']*1000000)
+                if line is not None:
+                    print(line)
+            npts += len(batch)
+    telapsed = time.perf_counter() - t0
+    print("%d points in %.2f s (%.0f points/s)" %
+          (npts, telapsed, npts/max(telapsed, 1e-9)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,15 +15,13 @@ Further description.
 
 from __future__ import division, print_function, absolute_import
 
-from datetime import datetime as dt
-
-import pytz
-import xmltodict as xmld
+from ..wireformat import encodePacket
+from ..timestamps import parseTimestamp, localizeTime
 
 
 def boltwood_clarityii(msg,
                        rootname="BoltwoodCloudSensorII",
-                       timezone='US/Arizona'):
+                       timezone='US/Arizona', wireformat='xml'):
     """
     Boltwood ClarityII v3.008 and v3.009 don't actually follow their own
     datasheet, so the output will be 20 fields and not 21; the last one
@@ -38,9 +36,6 @@ def boltwood_clarityii(msg,
     # Default return value
     npacket = ''
 
-    # File date/time timezone object that we'll need for later
-    thisTZ = pytz.timezone(timezone)
-
     # These are skimmed off the top and processed first
     #   "date", "time", "tempUnits", "windUnits"
     datamap = ["relSkyTemp", "ambientTemp", "enclosureTemp", "windSpeed",
@@ -84,13 +79,13 @@ def boltwood_clarityii(msg,
         datadate = allfields.pop(0)
         datatime = allfields.pop(0)
         dtstr = "%sT%s" % (datadate, datatime)
-        dtobj = dt.strptime(dtstr, "%Y-%m-%dT%H:%M:%S.%f")
+        dtobj = parseTimestamp(dtstr, "%Y-%m-%dT%H:%M:%S.%f")
 
         # You *need* to do this in this exact way; datetime.replate(tzinfo)
         #   will give weird results like a timezone offset of -07:28 !
-        # thisTZ needs to be the timezone of the machine where the data file
+        # timezone needs to be that of the machine where the data file
         #   was written, and since it's Windows it's likely to be local time.
-        dtobj_aware = thisTZ.localize(dtobj)
+        dtobj_aware = localizeTime(dtobj, timezone)
         # dtobj_utc = dtobj_aware.astimezone(pytz.UTC)
 
         try:
@@ -152,6 +147,6 @@ def boltwood_clarityii(msg,
 
     root = {rootname: fields}
     if fields != {}:
-        npacket = xmld.unparse(root, pretty=True)
+        npacket = encodePacket(root, wireformat=wireformat)
 
     return npacket
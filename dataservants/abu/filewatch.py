@@ -8,64 +8,41 @@
 #
 #  @author: rhamilton
 
-"""One line description of module.
+"""Keeping an eye on files, and reading what's new in them.
 
-Further description.
+:class:`FileWatcher` says when a file has been rewritten, and
+:class:`LogTailer` follows a log file (including daily dated ones) and
+returns just the lines added since it last looked.
 """
 
 from __future__ import division, print_function, absolute_import
 
 import os
 import time
+import json
+import struct
+import select
 import datetime as dt
 
-from ligmos.utils import hashes
-
+try:
+    # Only going to work on Linux, and that's fine; see FileWatcher
+    import ctypes
+    import ctypes.util
+    _libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    _libc.inotify_init1
+    _libc.inotify_add_watch
+except (OSError, AttributeError):
+    _libc = None
 
-def checkFile(fname, last, startpos):
-    """
-    """
-    # Gather up stats about the file
-    fstats = os.stat(fname)
-    inode = fstats.st_ino
-    fsize = fstats.st_size
-    mtime = fstats.st_mtime
-
-    print("Inode: %d" % (inode))
-    print("Filesize: %d" % (fsize))
-    print("ModTime: %f" % (mtime))
-
-    # Here's the decision tree:
-    read = False
-    if hasattr(last, 'st_ino'):
-        # If it has a different inode, it's not the same file as last time
-        if inode != last.st_ino:
-            print("Different file!")
-            startpos = 0
-            read = True
-        else:
-            print("Same file!")
-            if fsize > last.st_size:
-                print("Got bigger!")
-                read = True
-            elif fsize == last.st_size:
-                print("Same size as last time!")
-                read = False
-            else:
-                print("Got smaller?")
-                # (think about this; could indicate copy truncation)
-    else:
-        print("No file to compare against!")
-        read = True
+from ligmos.utils import hashes
 
-    if read is True:
-        with open(fname, mode='r') as f:
-            f.seek(startpos)
-            nlines = f.readlines()
-            endpos = f.tell()
-            print("Read %d lines" % (len(nlines)))
 
-    return fstats, endpos
+# inotify constants, straight from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
 
 
 def checkFileHash(fname, oldhash=None, debug=True):
@@ -101,14 +78,250 @@ def checkFileHash(fname, oldhash=None, debug=True):
     return fdigest, different
 
 
-def whichLogDate(basen):
+def statSignature(fname):
+    """Cheap signature of a file's current state, or None if it's missing.
     """
+    try:
+        fstats = os.stat(fname)
+    except (IOError, OSError):
+        return None
+
+    return (fstats.st_size, fstats.st_mtime_ns, fstats.st_ino)
+
+
+class FileWatcher(object):
+    """Notice when a file has been (completely) rewritten.
+
+    On Linux this uses inotify on the file's parent directory, waking up
+    when the file is closed after writing or moved into place, so the
+    file is never actually read just to see if it changed.  Anywhere else
+    (or if inotify can't be set up) it falls back to comparing the size,
+    mtime and inode of the file each time it's checked.
+
+    Either way, a change is only reported once the file has been left
+    alone for ``debounce`` seconds, so something that writes its file in
+    several pieces doesn't get read half-written.
+
+    The file counts as changed the very first time it's checked if it
+    exists, so it always gets read once at the start.
+
+    Args:
+        fname (:obj:`str`)
+            File to watch.
+        debounce (:obj:`float`, optional)
+            Seconds that the file must be quiet before a change counts.
+            Defaults to 0.5.
+        usenotify (:obj:`bool`, optional)
+            Try to use inotify at all. Defaults to True.
+    """
+    def __init__(self, fname, debounce=0.5, usenotify=True):
+        self.fname = os.path.abspath(os.path.expanduser(fname))
+        self.shortName = os.path.basename(self.fname)
+        self.debounce = debounce
+
+        self.fd = None
+        if usenotify is True and _libc is not None:
+            self.fd = self._startNotify()
+
+        # State for the debouncing, in time.monotonic() seconds
+        self.lastSig = None
+        self.pendingSig = None
+        self.lastActivity = None
+        self.pending = False
+
+        self.ready = statSignature(self.fname) is not None
+        if self.ready is True:
+            self.lastSig = statSignature(self.fname)
+
+    def _startNotify(self):
+        """Set up the inotify watch, returning its fd (or None on failure).
+        """
+        fd = _libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            print("inotify unavailable for %s; will poll instead" %
+                  (self.shortName))
+            return None
+
+        wdir = os.path.dirname(self.fname).encode()
+        wd = _libc.inotify_add_watch(fd, wdir, IN_CLOSE_WRITE | IN_MOVED_TO)
+        if wd < 0:
+            print("Can't watch %s (%s); will poll instead" %
+                  (self.shortName, os.strerror(ctypes.get_errno())))
+            os.close(fd)
+            return None
+
+        return fd
+
+    def _readEvents(self):
+        """Read any waiting inotify events, returning True if any were ours.
+        """
+        ours = False
+        while True:
+            try:
+                buf = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            if not buf:
+                break
+
+            # Each event is a struct inotify_event followed by its name
+            offset = 0
+            while offset < len(buf):
+                _, mask, _, nlen = struct.unpack_from('iIII', buf, offset)
+                offset += 16
+                name = buf[offset:offset + nlen].rstrip(b'\0')
+                offset += nlen
+                if mask & IN_Q_OVERFLOW:
+                    # Lost some events; safest to assume it was us
+                    ours = True
+                elif name.decode(errors='replace') == self.shortName:
+                    ours = True
+
+        return ours
+
+    def check(self):
+        """See if the file has changed and settled, without using it up.
+
+        This is cheap enough to call on every tick of a sleep loop, but
+        see :func:`waitForChange` for a way to not need to.
+
+        Returns:
+            ready (:obj:`bool`)
+                True if there's a change waiting to be picked up by
+                :meth:`changed`.
+        """
+        now = time.monotonic()
+        if self.fd is not None:
+            if self._readEvents() is True:
+                self.pending = True
+                self.lastActivity = now
+        else:
+            sig = statSignature(self.fname)
+            if sig is not None and sig != self.lastSig:
+                if sig != self.pendingSig:
+                    # Still changing (or just started to); reset the clock
+                    self.pendingSig = sig
+                    self.pending = True
+                    self.lastActivity = now
+
+        if self.pending is True and (now - self.lastActivity) >= self.debounce:
+            self.pending = False
+            self.lastSig = self.pendingSig
+            self.ready = True
+
+        return self.ready
+
+    def settleTime(self, now=None):
+        """Seconds until a change that's already been seen will count.
+
+        Returns:
+            wait (:obj:`float`)
+                Seconds left of the debounce, or None if there's nothing
+                waiting to settle.
+        """
+        if self.pending is False:
+            return None
+        if now is None:
+            now = time.monotonic()
+
+        return max(0., self.debounce - (now - self.lastActivity))
+
+    def changed(self):
+        """See if the file has changed and settled since it was last asked.
+
+        Returns:
+            changed (:obj:`bool`)
+                True once for each (settled) change to the file.
+        """
+        changed = self.check()
+        self.ready = False
+
+        return changed
+
+    def close(self):
+        """Stop watching the file.
+        """
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+def waitForChange(watchers, timeout, halted=None, haltcheck=1.,
+                  pollsleep=0.1):
+    """Sleep until a watched file changes, time runs out, or we're halted.
+
+    Watchers that have inotify are waited on with :func:`select.select`
+    on their fds, so while nothing's happening this only wakes up every
+    ``haltcheck`` seconds.  Only if some watcher had to fall back to
+    polling does it wake up every ``pollsleep`` seconds to stat the file.
+
+    Args:
+        watchers (:obj:`list`)
+            :class:`FileWatcher` objects to keep an eye on.
+        timeout (:obj:`float`)
+            Longest to wait (seconds).
+        halted (:obj:`callable`, optional)
+            Checked on every wakeup; if it returns True, stop waiting.
+            Defaults to None.
+        haltcheck (:obj:`float`, optional)
+            Longest to go between checks of ``halted``. Defaults to 1.
+        pollsleep (:obj:`float`, optional)
+            Seconds between checks of watchers that are polling.
+            Defaults to 0.1.
+
+    Returns:
+        changed (:obj:`bool`)
+            True if a watcher has a change ready to be picked up.
+    """
+    fds = [each.fd for each in watchers if each.fd is not None]
+    if any([each.fd is None for each in watchers]):
+        step = pollsleep
+    else:
+        step = haltcheck
+
+    wakeup = time.monotonic() + timeout
+    while True:
+        if halted is not None and halted() is True:
+            return False
+        if any([each.check() for each in watchers]):
+            return True
+
+        now = time.monotonic()
+        remaining = wakeup - now
+        if remaining <= 0:
+            return False
+
+        # Come back in time for anything that's settling down, too
+        nap = min(step, remaining)
+        for each in watchers:
+            settle = each.settleTime(now=now)
+            if settle is not None:
+                nap = min(nap, settle)
+
+        if fds != []:
+            select.select(fds, [], [], nap)
+        else:
+            time.sleep(nap)
+
+
+def whichLogDate(basen):
+    """Figure out which of a set of dated (YYYYMMDD) log files is current.
+
+    Args:
+        basen (:obj:`str`)
+            Log file name minus the date, like
+            ``/path/to/lois_log.obslemi.``
+
+    Returns:
+        wfile (:obj:`str`)
+            Full name of the log file for today (UT), or tomorrow (UT) if
+            that one has already been started.
     """
     utctoday = dt.datetime.utcnow().date()
     utctomorrow = utctoday + dt.timedelta(days=1)
 
     # See if *tomorrow* exists, and if so use it
-    exists = os.path.isfile(basen + utctomorrow)
+    exists = os.path.isfile(basen + utctomorrow.strftime("%Y%m%d"))
     if exists is True:
         wfile = basen + utctomorrow.strftime("%Y%m%d")
     else:
@@ -117,14 +330,192 @@ def whichLogDate(basen):
     return wfile
 
 
+class LogTailer(object):
+    """Incrementally read new lines from a (possibly rolling) log file.
+
+    Only the bytes added since the last read are ever read.  Handled along
+    the way are:
+
+    * Date based rollover, for logs named like ``basename.YYYYMMDD``
+      (see :func:`whichLogDate`); the rest of the old file is read
+      before moving on to the new one.
+    * The file being replaced by a new one with the same name (different
+      inode), in which case the new one is read from the start.
+    * The file being truncated, which also starts it over from the start.
+    * Partial lines at the end of the file, which are held back until the
+      rest of the line shows up.
+
+    If ``statefile`` is given, the file name, inode and offset are saved
+    there after each read so a restart picks up where it left off.
+
+    Args:
+        basename (:obj:`str`)
+            Log file to follow, or if ``dated`` is True, its name without
+            the trailing YYYYMMDD date.
+        statefile (:obj:`str`, optional)
+            JSON file to keep the position in across restarts. Defaults to
+            None, which means don't.
+        dated (:obj:`bool`, optional)
+            Whether the log files are dated and roll over daily.
+            Defaults to True.
+        fromstart (:obj:`bool`, optional)
+            When there's no saved position, read the current file from the
+            start rather than only following new lines. Defaults to False.
+        debug (:obj:`bool`, optional)
+            Bool to trigger additional debugging outputs. Defaults to False.
+    """
+    def __init__(self, basename, statefile=None, dated=True, fromstart=False,
+                 debug=False):
+        self.basename = os.path.expanduser(basename)
+        self.statefile = statefile
+        self.dated = dated
+        self.debug = debug
+
+        self.fname = None
+        self.ino = None
+        self.pos = 0
+        self.partial = b''
+
+        if self.loadState() is False and fromstart is False:
+            # Start following from the current end of the current file
+            self.fname = self.currentFile()
+            try:
+                fstats = os.stat(self.fname)
+                self.ino = fstats.st_ino
+                self.pos = fstats.st_size
+            except (IOError, OSError):
+                pass
+
+    def currentFile(self):
+        """Name of the log file that should be followed right now.
+        """
+        if self.dated is True:
+            return whichLogDate(self.basename)
+        else:
+            return self.basename
+
+    def loadState(self):
+        """Pick up the saved position, returning True if there was one.
+        """
+        if self.statefile is None:
+            return False
+
+        try:
+            with open(self.statefile, 'r') as f:
+                state = json.load(f)
+            self.fname = state['fname']
+            self.ino = state['ino']
+            self.pos = state['pos']
+        except (IOError, OSError, ValueError, KeyError):
+            return False
+
+        if self.debug is True:
+            print("Resuming %s at byte %d" % (self.fname, self.pos))
+
+        return True
+
+    def saveState(self):
+        """Save the current position, if there's somewhere to save it.
+
+        The saved position doesn't include any held back partial line, so
+        that gets read again (in full) after a restart.
+        """
+        if self.statefile is None:
+            return
+
+        state = {'fname': self.fname, 'ino': self.ino,
+                 'pos': self.pos - len(self.partial)}
+        tmpname = self.statefile + ".tmp"
+        try:
+            with open(tmpname, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmpname, self.statefile)
+        except (IOError, OSError) as err:
+            print("Failed to save log position to %s" % (self.statefile))
+            print(str(err))
+
+    def _readFrom(self, fname):
+        """Read whatever's new in fname, dealing with replacement/truncation.
+        """
+        try:
+            with open(fname, 'rb') as f:
+                fstats = os.fstat(f.fileno())
+                if fstats.st_ino != self.ino:
+                    if self.ino is not None:
+                        print("%s is a different file now!" % (fname))
+                    self.ino = fstats.st_ino
+                    self.pos = 0
+                    self.partial = b''
+                elif fstats.st_size < self.pos:
+                    print("%s got smaller; starting it over" % (fname))
+                    self.pos = 0
+                    self.partial = b''
+
+                f.seek(self.pos)
+                chunk = f.read()
+                self.pos = f.tell()
+        except (IOError, OSError) as err:
+            if self.debug is True:
+                print(str(err))
+            chunk = b''
+
+        return chunk
+
+    def _splitLines(self, chunk, final=False):
+        """Turn what's been read into lines, holding back any partial one.
+        """
+        pieces = (self.partial + chunk).split(b'\n')
+        if final is True:
+            # Nothing more is ever going to be added, so use it all
+            self.partial = b''
+            if pieces[-1] == b'':
+                pieces = pieces[:-1]
+        else:
+            self.partial = pieces.pop()
+
+        return [each.decode('utf-8', errors='replace').rstrip('\r')
+                for each in pieces]
+
+    def readNew(self):
+        """Get all of the complete lines added since the last call.
+
+        Returns:
+            lines (:obj:`list`)
+                New lines, without their line endings.
+        """
+        lines = []
+        target = self.currentFile()
+
+        if self.fname is not None and target != self.fname:
+            # Rolled over, so finish off the old file first; only if it's
+            #   the same old file, since if not we've lost track of it
+            if self.ino is not None and os.path.isfile(self.fname):
+                if os.stat(self.fname).st_ino == self.ino:
+                    lines += self._splitLines(self._readFrom(self.fname),
+                                              final=True)
+            print("Log rolled over to %s" % (target))
+            self.ino = None
+            self.pos = 0
+            self.partial = b''
+
+        self.fname = target
+        lines += self._splitLines(self._readFrom(target))
+
+        if self.debug is True:
+            print("Read %d new lines from %s" % (len(lines), target))
+
+        self.saveState()
+
+        return lines
+
+
 if __name__ == "__main__":
-    # Starting values
     basename = './datatests/logs/lois_log.obslemi.'
-    fstats, fpos = None, 0
+    tailer = LogTailer(basename, statefile='./datatests/logs/tailstate.json',
+                       fromstart=True, debug=True)
 
     while True:
-        # Check for log file rollover
-        wfile = whichLogDate(basename)
-        fstats, fpos = checkFile(wfile, fstats, fpos)
+        for line in tailer.readNew():
+            print(line)
 
         time.sleep(60.)
@@ -19,6 +19,8 @@ import xml
 
 import xmltodict as xmld
 
+from ..wireformat import LINECONTENTTYPE
+
 
 def xmlParserCatcher(msg, attr_prefix=None):
     """
@@ -39,3 +41,17 @@ def xmlParserCatcher(msg, attr_prefix=None):
         print(msg)
 
     return pdict
+
+
+def publishPacket(connObj, topic, packet, wireformat='xml'):
+    """
+    Publish a packet to the broker, marking it with the right content-type
+    header if it's not the usual XML so Iago knows what it's getting.
+    See :mod:`dataservants.wireformat`.
+    """
+    if wireformat == 'line':
+        # connObj.publish() doesn't do headers, so go around it
+        connObj.conn.send(destination="/topic/%s" % (topic), body=packet,
+                          content_type=LINECONTENTTYPE)
+    else:
+        connObj.publish(topic, packet)
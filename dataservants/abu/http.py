@@ -8,18 +8,73 @@
 #
 #  @author: rhamilton
 
-"""One line description of module.
+"""HTTP(S) fetching for Abu's web-based resources.
 
-Further description.
+Connections are pooled per host (scheme + host + port) so that repeated
+polls of the same device reuse a kept-alive connection rather than going
+through a new TCP/TLS handshake every time, and all of the web resources
+in a polling cycle can be fetched at once with :func:`fetchAll`.
 """
 
 from __future__ import division, print_function, absolute_import
 
+import threading
+from datetime import datetime as dt
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
 
-from requests import get, post
+import pytz
+
+from requests import Session
+from requests.adapters import HTTPAdapter
 from requests.exceptions import ConnectionError as RCE
 from requests.exceptions import Timeout as TO
-from requests.auth import HTTPDigestAuth, HTTPBasicAuth
+from requests.auth import HTTPBasicAuth
+
+
+# One session per host, created on first use and then kept around
+_sessions = {}
+_sessionLock = threading.Lock()
+
+
+def getSession(resourceloc, poolsize=4):
+    """Get the (kept-alive) session to use for the host in resourceloc.
+
+    Args:
+        resourceloc (:obj:`str`)
+            URL that is about to be fetched.
+        poolsize (:obj:`int`, optional)
+            Number of connections to keep open to the host, which only
+            matters if several resources on the same host are fetched at
+            once.  Defaults to 4.
+
+    Returns:
+        sess (:class:`requests.Session`)
+            Session for the host.
+    """
+    parts = urlsplit(resourceloc)
+    hostkey = "%s://%s" % (parts.scheme, parts.netloc)
+
+    with _sessionLock:
+        sess = _sessions.get(hostkey)
+        if sess is None:
+            sess = Session()
+            # No retries here; the next polling cycle is the retry
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=poolsize,
+                                  max_retries=0)
+            sess.mount("http://", adapter)
+            sess.mount("https://", adapter)
+            _sessions.update({hostkey: sess})
+
+    return sess
+
+
+def closeSessions():
+    """Close all the pooled sessions and their connections.
+    """
+    with _sessionLock:
+        for hostkey in list(_sessions.keys()):
+            _sessions.pop(hostkey).close()
 
 
 def webgetter(resourceloc, params=None, data=None, user=None, pw=None,
@@ -33,9 +88,10 @@ def webgetter(resourceloc, params=None, data=None, user=None, pw=None,
     else:
         auth = None
 
+    sess = getSession(resourceloc)
     try:
-        resp = get(resourceloc, params=params, data=data, auth=auth,
-                   timeout=timeout)
+        resp = sess.get(resourceloc, params=params, data=data, auth=auth,
+                        timeout=timeout)
     except TO:
         # This should be caught in the calling loop and handled appropriately
         print("HTTP GET timed out!  Is this thing on?")
@@ -55,3 +111,84 @@ def webgetter(resourceloc, params=None, data=None, user=None, pw=None,
         raise RCE
 
     return resp.content
+
+
+def fetchOne(sect, sObj, timeout=6.25):
+    """Fetch a single configured web resource, catching connection problems.
+
+    Args:
+        sect (:obj:`str`)
+            Name of the configuration section, just for messages.
+        sObj (:class:`ligmos.utils.classes.sneakyTarget`)
+            Configuration of the resource to get.  If it has a ``timeout``
+            attribute, that's used instead of the given timeout.
+        timeout (:obj:`float`, optional)
+            Default timeout (seconds).  Defaults to 6.25.
+
+    Returns:
+        now (:class:`datetime.datetime`)
+            UTC time right before the resource was asked for.
+        wxml (:obj:`bytes` or :obj:`str`)
+            Whatever came back, or '' if there was a problem.
+    """
+    timeout = float(getattr(sObj, 'timeout', timeout))
+
+    # The timekeeping on these weather servers I'm pulling
+    #   from is absolutely awful, so just use my server time
+    #   since it won't be minutes off
+    now = dt.now().astimezone(pytz.UTC)
+    try:
+        wxml = webgetter(sObj.resourcelocation,
+                         user=sObj.user,
+                         pw=sObj.password,
+                         timeout=timeout)
+    except RCE:
+        print("Connection error! %s" % (sect))
+        print("Moving on, hope it's temporary")
+        wxml = ''
+
+    return now, wxml
+
+
+def fetchAll(config, sections, maxworkers=8, timeout=6.25):
+    """Fetch all of the given web resources at the same time.
+
+    A dead or slow source only holds up its own answer, so the whole lot
+    takes as long as the slowest source rather than the sum of them all.
+
+    Args:
+        config (:obj:`dict`)
+            Dictionary of parsed configuration sections.
+        sections (:obj:`list`)
+            Names of the sections in config to fetch.
+        maxworkers (:obj:`int`, optional)
+            Maximum number of resources to fetch at once. Defaults to 8.
+        timeout (:obj:`float`, optional)
+            Default per-resource timeout (seconds) for sections that don't
+            specify their own. Defaults to 6.25.
+
+    Returns:
+        results (:obj:`dict`)
+            (now, wxml) for each section, as returned by :func:`fetchOne`.
+    """
+    results = {}
+    if sections == []:
+        return results
+
+    nworkers = min(maxworkers, len(sections))
+    with ThreadPoolExecutor(max_workers=nworkers) as pool:
+        futs = {}
+        for sect in sections:
+            futs.update({sect: pool.submit(fetchOne, sect, config[sect],
+                                           timeout=timeout)})
+
+        for sect in sections:
+            try:
+                results.update({sect: futs[sect].result()})
+            except Exception as err:
+                # Anything other than the usual connection problems
+                print("Unexpected problem fetching %s! %s" % (sect,
+                                                               str(err)))
+                results.update({sect: (dt.now().astimezone(pytz.UTC), '')})
+
+    return results
@@ -15,12 +15,11 @@ Further description.
 
 from __future__ import division, print_function, absolute_import
 
-import xmltodict as xmld
-
 from .helpers import xmlParserCatcher
+from ..wireformat import encodePacket
 
 
-def parseiSense(msg, rootKey=None):
+def parseiSense(msg, rootKey=None, wireformat='xml'):
     """
     Translate the "XML" file that the i-SENSE voltage monitor puts out
     into something that fits easier into the XML schema/parsing way of life.
@@ -55,9 +54,9 @@ def parseiSense(msg, rootKey=None):
         # Add our values to this station
         root[rootKey] = valdict
 
-        # Now turn it into an XML string so we can pass it along to the broker
-        #   using the magic that is xmld's unparse() method
-        npacket = xmld.unparse(root, pretty=True)
+        # Now turn it into an XML string (or whatever wireformat says) so we
+        #   can pass it along to the broker
+        npacket = encodePacket(root, wireformat=wireformat)
     else:
         npacket = None
 
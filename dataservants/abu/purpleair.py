@@ -16,16 +16,15 @@ Further description.
 from __future__ import division, print_function, absolute_import
 
 import json
-import datetime as dt
 import statistics as stats
 
-import pytz
-
-import xmltodict as xmld
+from ..wireformat import encodePacket
+from ..timestamps import parseTimestamp, utcToZone
 
 
 def purplePreparer(data, querytimeDT,
-                   serverTZ="US/Arizona", devType="PurpleAir_PA-II"):
+                   serverTZ="US/Arizona", devType="PurpleAir_PA-II",
+                   wireformat='xml'):
     """
     """
     paxml = None
@@ -58,20 +57,15 @@ def purplePreparer(data, querytimeDT,
             #   "usual" place that the Iago-style parsers can grab it,
             #   e.g. influx_ts prefixed stamp.
             timestampStr = rjson.pop("DateTime")
-            timestampDT = dt.datetime.strptime(timestampStr,
-                                               "%Y/%m/%dT%H:%M:%Sz")
+            timestampDT = parseTimestamp(timestampStr, "%Y/%m/%dT%H:%M:%Sz")
 
-            # Add in the timezone by hand to make sure it's clear it's UTC
-            #   coming out of the PurpleAir JSON DateTime timestamp.
+            # The PurpleAir JSON DateTime timestamp is always UTC.
             # This is unlikely to change unless PurpleAir changes it in the
             #   firmware but that's very unlikely and would be very dumb.
-            timestampDT = timestampDT.replace(tzinfo=pytz.UTC)
-
             # Localize to our SERVER'S timezone - check your own setup!
             #   It's likely to be either UTC, or your server's actual local
             #   timezone.  It depends on who set it up, and who set up influx
-            serverTZ = pytz.timezone(serverTZ)
-            timestampDT = timestampDT.astimezone(serverTZ)
+            timestampDT = utcToZone(timestampDT, serverTZ)
 
             # Re-store the original timestamp, now with it's TZinfo too
             rjson['odataTS'] = timestampDT
@@ -104,12 +98,13 @@ def purplePreparer(data, querytimeDT,
             var = stats.variance([rjson[pDV[0]], rjson[pDV[1]]])
             # print(pDV)
             # print(rjson[pDV[0]], rjson[pDV[1]], "%.2f %.2f" % (std, var))
-            rjson['pm2.5_atm_stddev'] = "%.2f" % (std)
-            rjson['pm2.5_atm_variance'] = "%.2f" % (var)
+            rjson['pm2.5_atm_stddev'] = round(std, 2)
+            rjson['pm2.5_atm_variance'] = round(var, 2)
 
             # Since it's nice and flat and not too bad JSON already, turn it
-            #   into XML to send it to the broker
-            paxml = xmld.unparse({"PurpleAirSensor": rjson}, pretty=True)
+            #   into XML (or whatever wireformat says) to send to the broker
+            paxml = encodePacket({"PurpleAirSensor": rjson},
+                                 wireformat=wireformat)
         except Exception as err:
             print("Well shit")
             print(str(err))
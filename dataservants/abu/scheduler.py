@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Keep track of when each of Abu's sources is next due to be polled.
+
+Each configuration section can give its own ``interval`` (seconds between
+polls) and ``jitter`` (up to this many extra random seconds added to each
+interval, to keep sources from lining up); anything not given falls back
+to the defaults passed in.  The due times are kept in a heap so the
+next one up is always right at the top.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import time
+import heapq
+import random
+
+
+class PollScheduler(object):
+    """Heap of (due time, section) pairs for the configured sources.
+
+    Args:
+        config (:obj:`dict`)
+            Dictionary of parsed configuration sections.
+        definterval (:obj:`float`, optional)
+            Interval (seconds) for sections that don't have their own.
+            Defaults to 60.
+        defjitter (:obj:`float`, optional)
+            Jitter (seconds) for sections that don't have their own.
+            Defaults to 0.
+    """
+    def __init__(self, config, definterval=60., defjitter=0.):
+        self.heap = []
+        self.cadence = {}
+
+        # Everything is due right away at the start
+        now = time.monotonic()
+        for i, sect in enumerate(config):
+            sObj = config[sect]
+            interval = float(getattr(sObj, 'interval', definterval))
+            jitter = float(getattr(sObj, 'jitter', defjitter))
+            if interval <= 0:
+                print("Bad interval for %s! Using %f" % (sect, definterval))
+                interval = definterval
+            self.cadence.update({sect: (interval, jitter)})
+
+            # The index is just there to break ties without ever having to
+            #   compare the section names themselves
+            heapq.heappush(self.heap, (now, i, sect))
+
+    def popDue(self, now=None):
+        """Get all of the sections that are due, and reschedule them.
+
+        Sections are rescheduled one interval after they were due, so they
+        keep their cadence; if that's already passed (we fell behind) it's
+        one interval from now instead so we don't try to catch up in a
+        burst.
+
+        Args:
+            now (:obj:`float`, optional)
+                Current :func:`time.monotonic` time. Defaults to None,
+                which means to look it up.
+
+        Returns:
+            due (:obj:`list`)
+                Names of the sections due to be polled, most overdue first.
+        """
+        if now is None:
+            now = time.monotonic()
+
+        due = []
+        while self.heap != [] and self.heap[0][0] <= now:
+            duetime, i, sect = heapq.heappop(self.heap)
+            due.append((duetime, i, sect))
+
+        for duetime, i, sect in due:
+            interval, jitter = self.cadence[sect]
+            nextdue = duetime + interval
+            if nextdue <= now:
+                nextdue = now + interval
+            if jitter > 0:
+                nextdue += random.uniform(0, jitter)
+            heapq.heappush(self.heap, (nextdue, i, sect))
+
+        return [each[2] for each in due]
+
+    def timeUntilNext(self, now=None):
+        """Seconds until the next section is due (0 if one already is).
+
+        Args:
+            now (:obj:`float`, optional)
+                Current :func:`time.monotonic` time. Defaults to None,
+                which means to look it up.
+
+        Returns:
+            wait (:obj:`float`)
+                Seconds until something is due, or None if there's nothing
+                at all being scheduled.
+        """
+        if self.heap == []:
+            return None
+
+        if now is None:
+            now = time.monotonic()
+
+        return max(0., self.heap[0][0] - now)
@@ -15,12 +15,9 @@ Further description.
 
 from __future__ import division, print_function, absolute_import
 
-from datetime import datetime as dt
-
-import pytz
-import xmltodict as xmld
-
 from .helpers import xmlParserCatcher
+from ..wireformat import encodePacket
+from ..timestamps import parseTimestamp, localizeTime, utcToZone
 
 
 def prepWU(config, vals, tstamp):
@@ -77,7 +74,7 @@ def prepWU(config, vals, tstamp):
     return wunderground, final
 
 
-def parseColumbia(msg, returnDict=False):
+def parseColumbia(msg, returnDict=False, wireformat='xml'):
     """
     Translate the "XML" file that the Columbia Weather Systems station is
     putting out into something that fits easier into the XML schema/parsing
@@ -101,6 +98,13 @@ def parseColumbia(msg, returnDict=False):
         for imeas in pdict['meas']:
             mn = imeas['@name']
             mv = imeas['#text']
+            if wireformat == 'line':
+                # No schema to sort out the types on the other end, so
+                #   the readings have to go as numbers already
+                try:
+                    mv = float(mv)
+                except (TypeError, ValueError):
+                    pass
             newEntry = {mn: mv}
 
             valdict.update(newEntry)
@@ -108,9 +112,9 @@ def parseColumbia(msg, returnDict=False):
         # Add our values to this station
         root[stationName] = valdict
 
-        # Now turn it into an XML string so we can pass it along to the broker
-        #   using the magic that is xmld's unparse() method
-        npacket = xmld.unparse(root, pretty=True)
+        # Now turn it into an XML string (or whatever wireformat says) so we
+        #   can pass it along to the broker
+        npacket = encodePacket(root, wireformat=wireformat)
     else:
         npacket = None
         valdict = {}
@@ -124,7 +128,8 @@ def parseColumbia(msg, returnDict=False):
 
 
 def parseMeteobridge(msg,
-                     stationName="MHClark", stationType="DavisVantagePro2"):
+                     stationName="MHClark", stationType="DavisVantagePro2",
+                     wireformat='xml'):
     """
     Translate the "XML" file that the Meteobridge is putting out into
     something that fits easier into the XML schema/parsing way of life.
@@ -162,12 +167,11 @@ def parseMeteobridge(msg,
                 if vals is not None:
                     for value in vals:
                         if value.lower() == 'date':
-                            mv = dt.strptime(vals[value], "%Y%m%d%H%M%S")
+                            mv = parseTimestamp(vals[value], "%Y%m%d%H%M%S")
                             # And now we do the dumb dance to put the TZ into
                             #   the timestamp, and then convert it to MST which
                             #   is what the server is set up to expect
-                            mv = mv.replace(tzinfo=pytz.UTC)
-                            mv = mv.astimezone(pytz.timezone("US/Arizona"))
+                            mv = utcToZone(mv, "US/Arizona")
 
                             thesevals.update({"influx_ts_s":
                                               round(mv.timestamp())})
@@ -186,7 +190,7 @@ def parseMeteobridge(msg,
 
                 valdict.update({baseKey: thesevals})
                 # print(valdict)
-                npacket = xmld.unparse(valdict, pretty=True)
+                npacket = encodePacket(valdict, wireformat=wireformat)
                 # print(npacket)
                 allXMLs.update({valueMap[meas].lower(): npacket})
     else:
@@ -197,15 +201,12 @@ def parseMeteobridge(msg,
 
 def parseVirtualWeatherStation(msg,
                                rootname="VirtualWeatherStation",
-                               timezone='US/Arizona'):
+                               timezone='US/Arizona', wireformat='xml'):
     """
     """
     # Default return value
     npacket = None
 
-    # File date/time timezone object that we'll need for later
-    thisTZ = pytz.timezone(timezone)
-
     # We don't need/want absolutely everything in here, this is just the
     #   things that are most likely to be cared about/useful.  These are
     #   zero indexed so I can just use them directly to store stuff
@@ -235,13 +236,13 @@ def parseVirtualWeatherStation(msg,
         datatime = "%s:%s:%s" % (allfields[4], allfields[5], allfields[6])
 
         dtstr = "%sT%s" % (datadate, datatime)
-        dtobj = dt.strptime(dtstr, "%Y-%m-%dT%H:%M:%S")
+        dtobj = parseTimestamp(dtstr, "%Y-%m-%dT%H:%M:%S")
 
         # You *need* to do this in this exact way; datetime.replate(tzinfo)
         #   will give weird results like a timezone offset of -07:28 !
-        # thisTZ needs to be the timezone of the machine where the data file
+        # timezone needs to be that of the machine where the data file
         #   was written, and since it's Windows it's likely to be local time.
-        dtobj_aware = thisTZ.localize(dtobj)
+        dtobj_aware = localizeTime(dtobj, timezone)
         # dtobj_utc = dtobj_aware.astimezone(pytz.UTC)
 
         # Start to assemble the output dictionary.
@@ -253,6 +254,6 @@ def parseVirtualWeatherStation(msg,
 
     root = {rootname: fields}
     if fields != {}:
-        npacket = xmld.unparse(root, pretty=True)
+        npacket = encodePacket(root, wireformat=wireformat)
 
     return npacket
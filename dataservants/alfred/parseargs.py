@@ -35,4 +35,10 @@ def extraArguments(parser):
                         const='./config/alfred_extraPings.conf',
                         help=hstr, nargs='?')
 
+    hstr = "Number of instrument hosts to poll concurrently, each in "
+    hstr += "its own process. 1 polls them one after another."
+    parser.add_argument('--hostWorkers', type=int,
+                        help=hstr,
+                        default=1)
+
     return parser
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Poll instrument hosts concurrently rather than one after another.
+
+:func:`ligmos.utils.common.instLooper` walks through every instrument in
+the configuration serially, so one slow or hung host holds up all the
+others until its alarm finally fires.  This runs the same instLooper,
+one instrument per worker, in a bounded pool of processes so the whole
+cycle only takes as long as the slowest host.
+
+Processes (not threads) are used on purpose: the per-action timeouts are
+done with signal alarms, and those only work in the main thread of a
+process.  Each worker is a fork of the caller so the configuration,
+database objects and actions don't need to be pickled to get there.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import time
+import queue
+import pickle
+import multiprocessing as mp
+from collections import OrderedDict
+
+from ligmos.utils import common
+
+
+def hostWorker(resq, sect, config, runner, args, actions, updateArguments,
+               baseYcmd, db=None, alarmtime=600):
+    """Run instLooper on a single instrument and send back the answer.
+
+    Args:
+        resq (:class:`multiprocessing.Queue`)
+            Queue on which to put the (section, answer) result.
+        sect (:obj:`str`)
+            Configuration section of the instrument to run.
+
+    All the other arguments are exactly those of
+    :func:`ligmos.utils.common.instLooper`.
+    """
+    try:
+        ans = common.instLooper({sect: config[sect]}, runner, args,
+                                actions, updateArguments,
+                                baseYcmd,
+                                db=db, alarmtime=alarmtime)
+    except Exception as err:
+        print("--> Worker for %s failed! %s" % (sect, str(err)))
+        ans = None
+
+    # Make sure the answer will actually survive the trip back, since a
+    #   pickling failure inside the queue's feeder thread is just dropped
+    try:
+        pickle.dumps(ans)
+    except Exception as err:
+        print("--> Can't send back the answer for %s! %s" % (sect, str(err)))
+        ans = None
+
+    resq.put((sect, ans))
+
+
+def instLooperPool(config, runner, args, actions, updateArguments, baseYcmd,
+                   db=None, alarmtime=600, nworkers=1, grace=30.,
+                   pollsleep=0.1):
+    """Drop-in for instLooper that polls instruments concurrently.
+
+    Each instrument gets its own worker process, with at most ``nworkers``
+    of them running at once.  Every worker has a hard deadline of
+    ``alarmtime`` + ``grace`` seconds; instLooper's own alarms should have
+    stopped things well before then, so anything still running is
+    assumed hung and is killed outright.
+
+    If the runner is told to halt, no new workers are started and the
+    running ones are sent SIGTERM so they can stop nicely themselves.
+
+    Args:
+        nworkers (:obj:`int`, optional)
+            Maximum number of instruments to poll at once.  If 1 or less,
+            this just calls instLooper directly, exactly as before.
+            Defaults to 1.
+        grace (:obj:`float`, optional)
+            Seconds past ``alarmtime`` to wait before killing a worker.
+            Defaults to 30.
+        pollsleep (:obj:`float`, optional)
+            Seconds to wait for answers between checks on the workers.
+            Defaults to 0.1.
+
+    All the other arguments are exactly those of
+    :func:`ligmos.utils.common.instLooper`.
+
+    Returns:
+        results (:obj:`collections.OrderedDict`)
+            instLooper's answer for each configuration section, in the
+            configuration's order.  Instruments that failed, were killed or
+            were skipped because of a halt have an answer of None.
+            If ``nworkers`` <= 1, whatever instLooper returned instead.
+    """
+    if nworkers is None or nworkers <= 1:
+        return common.instLooper(config, runner, args,
+                                 actions, updateArguments,
+                                 baseYcmd,
+                                 db=db, alarmtime=alarmtime)
+
+    # Explicitly fork, since that's what lets the workers use everything
+    #   we already have without pickling it all up
+    ctx = mp.get_context('fork')
+    resq = ctx.Queue()
+
+    pending = list(config.keys())
+    results = OrderedDict([(sect, None) for sect in pending])
+    running = {}
+    deadline = alarmtime + grace
+    halted = False
+
+    while pending != [] or running != {}:
+        if runner.halt is True:
+            # Tell the workers to stop, but only once
+            if halted is False:
+                print("runner.halt triggered; stopping host workers")
+                for sect in running:
+                    running[sect][0].terminate()
+                halted = True
+            pending = []
+
+        # Fill up the pool
+        while pending != [] and len(running) < nworkers:
+            sect = pending.pop(0)
+            proc = ctx.Process(target=hostWorker,
+                               name="hostWorker-%s" % (sect),
+                               args=(resq, sect, config, runner, args,
+                                     actions, updateArguments, baseYcmd),
+                               kwargs={'db': db, 'alarmtime': alarmtime})
+            proc.start()
+            running.update({sect: [proc, time.time()]})
+
+        # Collect any answers that have come in
+        try:
+            while True:
+                sect, ans = resq.get(timeout=pollsleep)
+                results[sect] = ans
+        except queue.Empty:
+            pass
+
+        # Clean up the finished ones and get rid of the hung ones
+        now = time.time()
+        for sect in list(running.keys()):
+            proc, startt = running[sect]
+            if proc.is_alive() is False:
+                proc.join()
+                running.pop(sect)
+            elif (now - startt) > deadline:
+                print("--> %s passed its %.1f s deadline! Killing it." %
+                      (sect, deadline))
+                proc.kill()
+                proc.join()
+                running.pop(sect)
+
+    # Any stragglers that were sent right before their worker finished
+    try:
+        while True:
+            sect, ans = resq.get(timeout=pollsleep)
+            results[sect] = ans
+    except queue.Empty:
+        pass
+
+    resq.close()
+
+    return results
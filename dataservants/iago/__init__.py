@@ -5,6 +5,11 @@ from . import listener_OMSPDU
 from . import listener_MarsHill
 
 from . import parseargs
+from . import spool
+from . import dbbuffer
+from . import dispatch
+from . import routing
+from . import xmlfields
 
 from . import parser_LDT
 from . import parser_LOIS
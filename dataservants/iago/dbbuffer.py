@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Batch up the points going into InfluxDB rather than writing one at a time.
+
+The listeners and parsers all call ``db.singleCommit(...)`` once for every
+message, which would otherwise mean a database connection opened and
+closed for every single packet.  :class:`BufferedInflux` stands in for
+the database object, so nothing that uses it needs to change, and
+collects the points up until there are enough of them (or they've waited
+long enough) and then writes them all at once over a connection that's
+kept open.  If a write fails, the points are put back and tried again
+after a (growing) pause, up to a limit on how many are held onto.
+
+If it's given a :class:`dataservants.iago.spool.Spool`, every packet is
+appended to that first, right as it comes in, and the spool deals with
+the database; points only wait here in memory if the spool can't take
+them for some reason.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import time
+import threading
+import datetime as dt
+
+
+class BufferedInflux(object):
+    """Write-buffering stand-in for a ligmos InfluxDB database object.
+
+    Anything other than :meth:`singleCommit` is just passed along to the
+    real database object, so things like ``tablename`` work as usual.
+
+    Points are grouped by (table, time precision) since that's how they
+    have to be written.  Points that don't have a time of their own are
+    given the current time (to the ms) when they're buffered, since
+    letting the database stamp them at write time would both shift them
+    and make identical series in the same batch overwrite each other.
+
+    Args:
+        db (:class:`ligmos.utils.database.influxobj`)
+            The real database object to write to.
+        maxpoints (:obj:`int`, optional)
+            Write as soon as this many points are waiting. Defaults to 5000.
+        maxdelay (:obj:`float`, optional)
+            Write once the oldest waiting point is this old (seconds).
+            Defaults to 1.
+        spool (:class:`dataservants.iago.spool.Spool`, optional)
+            Spool to hand every packet to as it arrives, rather than
+            batching them up here for the database. Defaults to None.
+        maxqueued (:obj:`int`, optional)
+            Most points to hang on to while writes keep failing; past
+            this the oldest ones are dropped. Defaults to None, meaning
+            10 times ``maxpoints``.
+        maxbackoff (:obj:`float`, optional)
+            Longest wait (seconds) between retries while writes keep
+            failing. Defaults to 60.
+    """
+    def __init__(self, db, maxpoints=5000, maxdelay=1., spool=None,
+                 maxqueued=None, maxbackoff=60.):
+        self.db = db
+        self.spool = spool
+        self.maxpoints = maxpoints
+        self.maxdelay = maxdelay
+        if maxqueued is None:
+            maxqueued = 10*maxpoints
+        self.maxqueued = maxqueued
+        self.maxbackoff = maxbackoff
+
+        # Failed writes are retried no sooner than this (time.monotonic)
+        self.backoff = 1.
+        self.retryAt = 0.
+
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.npending = 0
+        self.oldest = None
+
+        self.halt = False
+        self.wakeup = threading.Event()
+        self.flusher = threading.Thread(target=self._flushLoop,
+                                        name="BufferedInflux-flusher",
+                                        daemon=True)
+        self.flusher.start()
+
+    def __getattr__(self, name):
+        # Only called for things not found on this object itself
+        return getattr(self.db, name)
+
+    def singleCommit(self, packet, table=None, timeprec=None, close=False):
+        """Buffer the packet's points, same call as the real singleCommit.
+
+        ``close`` is accepted so that callers don't need to change, but
+        it's ignored since keeping the connection open is the whole point.
+
+        Args:
+            packet (:obj:`list` or :obj:`dict`)
+                InfluxDB point(s), like from
+                :func:`ligmos.utils.packetizer.makeInfluxPacket`.
+            table (:obj:`str`, optional)
+                Table (database) to write to. Defaults to None.
+            timeprec (:obj:`str`, optional)
+                Precision of the points' timestamps. Defaults to None,
+                meaning whatever the real singleCommit defaults to.
+        """
+        if isinstance(packet, dict):
+            packet = [packet]
+
+        stamped = []
+        unstamped = []
+        for point in packet:
+            if point.get('time') is None:
+                unstamped.append(point)
+            else:
+                stamped.append(point)
+
+        if unstamped != []:
+            now = dt.datetime.now(dt.timezone.utc)
+            for point in unstamped:
+                point.update({'time': now})
+
+        if self.spool is not None:
+            # Straight to disk; the spool does its own batching for the
+            #   database.  If that fails, hang on to them here and let
+            #   the flusher keep trying (a point spooled twice is fine)
+            try:
+                if stamped != []:
+                    self.spool.append(table, timeprec, stamped)
+                if unstamped != []:
+                    self.spool.append(table, 'ms', unstamped)
+                return
+            except Exception as err:
+                print("Failed to spool %d points! %s" % (len(packet),
+                                                          str(err)))
+
+        with self.lock:
+            if stamped != []:
+                self.pending.setdefault((table, timeprec), []).extend(stamped)
+            if unstamped != []:
+                self.pending.setdefault((table, 'ms'), []).extend(unstamped)
+            self.npending += len(packet)
+            if self.oldest is None:
+                self.oldest = time.monotonic()
+            full = self.npending >= self.maxpoints
+
+        if full is True:
+            # Let the flusher take care of it, rather than hold up whoever
+            #   is handing us points
+            self.wakeup.set()
+
+    def _takePending(self):
+        """Grab everything waiting, leaving a clean slate behind.
+        """
+        with self.lock:
+            batches = self.pending
+            self.pending = {}
+            self.npending = 0
+            self.oldest = None
+
+        return batches
+
+    def _requeue(self, failed):
+        """Put batches that didn't get written back in line, oldest first.
+
+        If that'd mean holding more than ``maxqueued`` points, the oldest
+        of them are dropped to make room.
+
+        Args:
+            failed (:obj:`dict`)
+                Lists of points keyed by (table, time precision), just
+                like :attr:`pending`.
+        """
+        with self.lock:
+            for key, points in failed.items():
+                self.pending[key] = points + self.pending.get(key, [])
+                self.npending += len(points)
+
+            ndropped = 0
+            for key in list(self.pending.keys()):
+                extra = self.npending - self.maxqueued
+                if extra <= 0:
+                    break
+                ndrop = min(extra, len(self.pending[key]))
+                self.pending[key] = self.pending[key][ndrop:]
+                if self.pending[key] == []:
+                    self.pending.pop(key)
+                self.npending -= ndrop
+                ndropped += ndrop
+
+            if self.oldest is None and self.npending > 0:
+                self.oldest = time.monotonic()
+
+            self.retryAt = time.monotonic() + self.backoff
+            print("Retrying %d points in %.0f s" % (self.npending,
+                                                    self.backoff))
+            self.backoff = min(self.backoff*2., self.maxbackoff)
+
+        if ndropped > 0:
+            print("Too many points waiting! Dropped the oldest %d" %
+                  (ndropped))
+
+    def flush(self, close=False):
+        """Write everything that's waiting right now.
+
+        Args:
+            close (:obj:`bool`, optional)
+                Close the database connection after the last write.
+                Defaults to False.
+
+        Anything that fails to write is put back to be retried after a
+        backoff (see :meth:`_requeue`), rather than thrown away.
+
+        Returns:
+            nwritten (:obj:`int`)
+                Number of points successfully written.
+        """
+        batches = self._takePending()
+
+        nwritten = 0
+        failed = {}
+        keys = list(batches.keys())
+        for i, key in enumerate(keys):
+            table, timeprec = key
+            points = batches[key]
+            try:
+                if self.spool is not None:
+                    self.spool.append(table, timeprec, points)
+                else:
+                    closeit = close and (i == len(keys) - 1)
+                    kwargs = {'table': table, 'close': closeit}
+                    if timeprec is not None:
+                        kwargs.update({'timeprec': timeprec})
+                    self.db.singleCommit(points, **kwargs)
+                nwritten += len(points)
+            except Exception as err:
+                print("Failed to write %d points to %s!" % (len(points),
+                                                           table))
+                print(str(err))
+                failed.update({key: points})
+
+        if failed != {}:
+            self._requeue(failed)
+        elif nwritten > 0:
+            with self.lock:
+                self.backoff = 1.
+
+        return nwritten
+
+    def depth(self):
+        """Number of points currently waiting to be written.
+        """
+        with self.lock:
+            return self.npending
+
+    def _flushLoop(self):
+        """Background thread that writes whenever it's time to.
+        """
+        while self.halt is False:
+            self.wakeup.wait(timeout=min(0.1, self.maxdelay))
+            self.wakeup.clear()
+
+            with self.lock:
+                npts = self.npending
+                age = 0.
+                if self.oldest is not None:
+                    age = time.monotonic() - self.oldest
+                waiting = time.monotonic() < self.retryAt
+
+            # Still backing off after a failed write
+            if waiting is True:
+                continue
+
+            if npts > 0 and (npts >= self.maxpoints or
+                             age >= self.maxdelay):
+                self.flush()
+
+    def close(self):
+        """Stop the background writer, write what's left, and disconnect.
+        """
+        self.halt = True
+        self.wakeup.set()
+        self.flusher.join()
+
+        nleft = self.flush(close=True)
+        if nleft > 0:
+            print("Wrote the last %d buffered points" % (nleft))
+        nlost = self.depth()
+        if nlost > 0:
+            print("Couldn't write the last %d buffered points!" % (nlost))
+
+        if self.spool is not None:
+            self.spool.close()
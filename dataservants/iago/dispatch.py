@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Hand messages off to worker threads rather than parsing them on receipt.
+
+Normally a listener's ``on_message`` does all of the parsing and database
+work right inside the STOMP receive thread, so one slow message holds up
+every topic on that broker connection.  :class:`QueuedListener` wraps a
+listener so that ``on_message`` just queues the message up, and a small
+pool of worker threads calls the real ``on_message`` for it.
+
+Every topic always goes to the same worker, so messages on a topic are
+still handled in the order they arrived.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import zlib
+import queue
+import threading
+
+
+def messageParts(args, kwargs):
+    """Pull the headers and body out of on_message's arguments.
+
+    Older versions of stomp.py call ``on_message(headers, body)`` and newer
+    ones call ``on_message(frame)``, so deal with both.
+    """
+    if 'frame' in kwargs:
+        return kwargs['frame'].headers, kwargs['frame'].body
+    elif 'headers' in kwargs:
+        return kwargs['headers'], kwargs.get('body', args[0] if args else '')
+    elif len(args) >= 2:
+        return args[0], args[1]
+    elif len(args) == 1:
+        return args[0].headers, args[0].body
+    else:
+        return {}, ''
+
+
+def messageTopic(args, kwargs):
+    """Pull the destination out of on_message's arguments.
+    """
+    headers, _ = messageParts(args, kwargs)
+
+    return headers.get('destination', '')
+
+
+class QueuedListener(object):
+    """Wrap a listener so its messages are handled by a pool of workers.
+
+    Everything other than ``on_message`` (connects, disconnects, errors,
+    heartbeats and the like) is just passed along to the real listener.
+
+    Args:
+        listener (:class:`stomp.ConnectionListener`)
+            The real listener, like from
+            :func:`dataservants.iago.listener_LOIS.LOISConsumer`.
+        nworkers (:obj:`int`, optional)
+            Number of worker threads. Defaults to 2.
+        maxqueue (:obj:`int`, optional)
+            Most messages that can be waiting for each worker; once that
+            fills up, the receive thread waits for room rather than
+            dropping messages.  Defaults to 1000.
+    """
+    def __init__(self, listener, nworkers=2, maxqueue=1000):
+        self.listener = listener
+        self.queues = []
+        self.workers = []
+        for i in range(nworkers):
+            wq = queue.Queue(maxsize=maxqueue)
+            wt = threading.Thread(target=self._work, args=(wq,),
+                                  name="QueuedListener-%d" % (i),
+                                  daemon=True)
+            self.queues.append(wq)
+            self.workers.append(wt)
+            wt.start()
+
+    def __getattr__(self, name):
+        # Only called for things not found on this object itself
+        return getattr(self.listener, name)
+
+    def on_message(self, *args, **kwargs):
+        """Queue up the message for the worker that handles its topic.
+        """
+        topic = messageTopic(args, kwargs)
+        idx = zlib.crc32(topic.encode('utf-8')) % len(self.queues)
+        self.queues[idx].put((args, kwargs))
+
+    def _work(self, wq):
+        """Worker thread that feeds its queue's messages to the listener.
+        """
+        while True:
+            item = wq.get()
+            try:
+                if item is None:
+                    break
+                args, kwargs = item
+                self.listener.on_message(*args, **kwargs)
+            except Exception as err:
+                # Don't let one bad message take out the worker entirely
+                print("Unhandled error processing a message! %s" % (str(err)))
+            finally:
+                wq.task_done()
+
+    def depth(self):
+        """Number of messages waiting, in total and for each worker.
+
+        Returns:
+            total (:obj:`int`)
+                Messages waiting to be handled.
+            each (:obj:`list`)
+                Messages waiting for each of the workers.
+        """
+        each = [wq.qsize() for wq in self.queues]
+
+        return sum(each), each
+
+    def close(self, timeout=30.):
+        """Finish off the waiting messages and stop the workers.
+
+        Args:
+            timeout (:obj:`float`, optional)
+                Seconds to wait for each worker to finish. Defaults to 30.
+        """
+        for wq in self.queues:
+            wq.put(None)
+        for wt in self.workers:
+            wt.join(timeout=timeout)
+            if wt.is_alive() is True:
+                print("%s didn't finish in time!" % (wt.name))
@@ -15,8 +15,7 @@ Further description.
 
 from __future__ import division, print_function, absolute_import
 
-from ligmos.utils import amqListeners as amqL
-
+from .routing import RoutedConsumer
 from .parser_LDT import parserLPI
 from .parser_purpleair import parserPurpleAir
 
@@ -63,10 +62,10 @@ def LDTConsumer(dbconn=None):
     tSpecial = {"lightPathInformation": parserLPI}
 
     # Create our subclassed consumer with the above routes
-    consumer = amqL.LIGBaseConsumer(dbconn=dbconn,
-                                    tSpecial=tSpecial,
-                                    tkXMLSpecial=tkXMLSpecial,
-                                    tXML=tXML, tFloat=tFloat,
-                                    tStr=tStr, tBool=tBool)
+    consumer = RoutedConsumer(dbconn=dbconn,
+                              tSpecial=tSpecial,
+                              tkXMLSpecial=tkXMLSpecial,
+                              tXML=tXML, tFloat=tFloat,
+                              tStr=tStr, tBool=tBool)
 
     return consumer
@@ -15,8 +15,7 @@ Further description.
 
 from __future__ import division, print_function, absolute_import
 
-from ligmos.utils import amqListeners as amqL
-
+from .routing import RoutedConsumer
 from .parser_LOIS import parserLOlogs
 
 
@@ -43,18 +42,13 @@ def LOISConsumer(dbconn=None):
     #   NOTE: the special functions must all take the following arguments:
     #       headers, body, db=None, schema=None
     #   This is to ensure compatibility with the consumer provided inputs!
-    tSpecial = {"LOUI.deveny.loisLog": parserLOlogs,
-                "LOUI.GDR.loisLog": parserLOlogs,
-                "LOUI.gwaves3.loisLog": parserLOlogs,
-                "LOUI.lemi.loisLog": parserLOlogs,
-                "LOUI.nihts.loisLog": parserLOlogs,
-                "LOUI.RC1.loisLog": parserLOlogs,
-                "LOUI.RC2.loisLog": parserLOlogs,
-                "LOUI.WFS.loisLog": parserLOlogs}
+    #   The wildcard catches every instrument's log, including new ones
+    #   (see dataservants.iago.routing)
+    tSpecial = {"LOUI.*.loisLog": parserLOlogs}
 
     # Create our subclassed consumer with the above routes
-    consumer = amqL.LIGBaseConsumer(dbconn=dbconn, tSpecial=tSpecial,
-                                    tXML=tXML, tFloat=tFloat,
-                                    tStr=tStr, tBool=tBool)
+    consumer = RoutedConsumer(dbconn=dbconn, tSpecial=tSpecial,
+                              tXML=tXML, tFloat=tFloat,
+                              tStr=tStr, tBool=tBool)
 
     return consumer
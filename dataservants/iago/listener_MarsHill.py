@@ -15,8 +15,7 @@ Further description.
 
 from __future__ import division, print_function, absolute_import
 
-from ligmos.utils import amqListeners as amqL
-
+from .routing import RoutedConsumer
 from .parser_purpleair import parserPurpleAir
 
 
@@ -55,10 +54,10 @@ def MHConsumer(dbconn=None):
     tSpecial = None
 
     # Create our subclassed consumer with the above routes
-    consumer = amqL.LIGBaseConsumer(dbconn=dbconn,
-                                    tSpecial=tSpecial,
-                                    tkXMLSpecial=tkXMLSpecial,
-                                    tXML=tXML, tFloat=tFloat,
-                                    tStr=tStr, tBool=tBool)
+    consumer = RoutedConsumer(dbconn=dbconn,
+                              tSpecial=tSpecial,
+                              tkXMLSpecial=tkXMLSpecial,
+                              tXML=tXML, tFloat=tFloat,
+                              tStr=tStr, tBool=tBool)
 
     return consumer
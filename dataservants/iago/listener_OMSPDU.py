@@ -15,8 +15,7 @@ Further description.
 
 from __future__ import division, print_function, absolute_import
 
-from ligmos.utils import amqListeners as amqL
-
+from .routing import RoutedConsumer
 from .parser_OMSPDU import parserPDU, parserStageResult
 
 
@@ -43,8 +42,8 @@ def OMSPDUConsumer(dbconn=None):
                 "joeStageResult": parserStageResult}
 
     # Create our subclassed consumer with the above routes
-    consumer = amqL.LIGBaseConsumer(dbconn=dbconn, tSpecial=tSpecial,
-                                    tXML=tXML, tFloat=tFloat,
-                                    tStr=tStr, tBool=tBool)
+    consumer = RoutedConsumer(dbconn=dbconn, tSpecial=tSpecial,
+                              tXML=tXML, tFloat=tFloat,
+                              tStr=tStr, tBool=tBool)
 
     return consumer
@@ -25,4 +25,37 @@ def extraArguments(parser):
     #                     help='Define a useless argument',
     #                     default=False)
 
+    bstr = 'Write to the database once this many points are waiting'
+    parser.add_argument('--batchpoints', type=int,
+                        help=bstr,
+                        default=5000)
+
+    dstr = 'Write to the database once points have waited this long (s)'
+    parser.add_argument('--batchdelay', type=float,
+                        help=dstr,
+                        default=1.)
+
+    sstr = 'Directory to spool points to on disk before they go to the '
+    sstr += 'database, so they survive the database being slow or down'
+    parser.add_argument('--spooldir', type=str,
+                        help=sstr,
+                        default=None)
+
+    wstr = 'Number of worker threads per listener to parse messages in; '
+    wstr += '0 parses them right as they are received'
+    parser.add_argument('--workers', type=int,
+                        help=wstr,
+                        default=0)
+
+    xstr = 'Parse XML topics with compiled per-topic extractors rather than '
+    xstr += 'the generic schema parsing'
+    parser.add_argument('--fastxml', action='store_true',
+                        help=xstr,
+                        default=False)
+
+    nstr = 'Write every packet to the database immediately, unbuffered'
+    parser.add_argument('--nobuffer', action='store_true',
+                        help=nstr,
+                        default=False)
+
     return parser
@@ -16,7 +16,6 @@ Further description.
 from __future__ import division, print_function, absolute_import
 
 import os
-import datetime as dt
 
 from ligmos import utils
 
@@ -32,11 +31,7 @@ def parserLOlogs(hed, msg, db=None, badFWHM=100., schema=None):
     topic = os.path.basename(hed['destination'])
 
     # print(ts, msg)
-    # Some time shenanigans; the LOIS log doesn't include date but
-    #   we can assume it's referencing UT time on the same day.
-    #   I suppose that there could be some ambiguity right at UT midnight
-    #   ... but oh well.
-    now = dt.datetime.utcnow()
+    # Log lines start with the (UT) time of day, like 22:26:55
     ltime = msg[0:8].split(":")
     # Bail early since this indicates it's not really a log line but
     #   some other type of message (like a LOIS startup or something)
@@ -45,9 +40,6 @@ def parserLOlogs(hed, msg, db=None, badFWHM=100., schema=None):
         print(msg)
         return
 
-    now = now.replace(hour=int(ltime[0]), minute=int(ltime[1]),
-                      second=int(ltime[2]), microsecond=0)
-
     # lts = now.strftime("%Y-%m-%dT%H:%M:%S.%f")
     # Get just the log level
     loglevel = msg.split(" ")[1].split(":")[0]
@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Topic routing for the Iago listeners, including wildcard topics.
+
+The listeners all describe their topics as a handful of separate lists
+and dicts (tXML, tFloat, tStr, tBool, tSpecial, tkXMLSpecial).
+:class:`TopicRouter` turns those into a single lookup, and also allows
+ActiveMQ style wildcards in the topic names:
+
+* ``*`` matches exactly one element of a dotted topic name, so
+  ``LOUI.*.loisLog`` covers ``LOUI.lemi.loisLog``, ``LOUI.RC1.loisLog``
+  and whatever new instrument shows up next.
+* ``>`` at the end matches one or more trailing elements, so
+  ``lig.nihts.pdu.>`` covers everything under ``lig.nihts.pdu``.
+
+:class:`RoutedConsumer` is a drop-in for
+:class:`ligmos.utils.amqListeners.LIGBaseConsumer` that understands the
+wildcards; any topic that matches one gets added to the base consumer's
+own routes (as a concrete topic) the first time it's seen, so from
+then on it's handled exactly like it had been listed by name.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import os
+import re
+
+from ligmos.utils import amqListeners as amqL
+from ligmos.utils.packetizer import makeInfluxPacket
+
+from .xmlfields import extractFields
+from .dispatch import messageParts
+from ..wireformat import LINECONTENTTYPE, fromLineProtocol
+
+
+# The keyword names that LIGBaseConsumer uses for each kind of topic
+LISTKINDS = ['tXML', 'tFloat', 'tStr', 'tBool']
+DICTKINDS = ['tSpecial', 'tkXMLSpecial']
+
+
+def isWildcard(pattern):
+    """True if the topic name has any wildcards in it.
+    """
+    return any([elem in ['*', '>'] for elem in pattern.split(".")])
+
+
+def wildcardRegex(pattern):
+    """Compile an ActiveMQ style wildcard topic into a regular expression.
+    """
+    elems = pattern.split(".")
+    parts = []
+    for i, elem in enumerate(elems):
+        if elem == '*':
+            parts.append(r"[^.]+")
+        elif elem == '>' and i == len(elems) - 1:
+            parts.append(r"[^.]+(?:\.[^.]+)*")
+        else:
+            parts.append(re.escape(elem))
+
+    return re.compile(r"\.".join(parts) + "$")
+
+
+class TopicRouter(object):
+    """Lookup from topic name to whatever should handle it.
+
+    Exact topic names are a plain dict lookup.  Wildcard patterns are only
+    tried (in the order they were added) if there's no exact match, and
+    the answer is cached so each topic is only ever matched once.
+    """
+    def __init__(self):
+        self.exact = {}
+        self.wild = []
+        self.cache = {}
+
+    def add(self, pattern, route):
+        """Add a topic name (or wildcard pattern) and its route.
+
+        Args:
+            pattern (:obj:`str`)
+                Topic name, possibly with ``*`` or ``>`` wildcards.
+            route (:obj:`object`)
+                Whatever should be given back for matching topics.
+        """
+        if isWildcard(pattern) is True:
+            self.wild.append((wildcardRegex(pattern), pattern, route))
+        else:
+            self.exact.update({pattern: route})
+
+        # Anything cached could be out of date now
+        self.cache = {}
+
+    def resolve(self, topic):
+        """Find the route for the given topic.
+
+        Args:
+            topic (:obj:`str`)
+                Topic name, without any ``/topic/`` prefix.
+
+        Returns:
+            match (:obj:`tuple`)
+                (pattern, route) for the first match, or None if nothing
+                matches at all.
+        """
+        if topic in self.exact:
+            return topic, self.exact[topic]
+
+        try:
+            return self.cache[topic]
+        except KeyError:
+            pass
+
+        match = None
+        for regex, pattern, route in self.wild:
+            if regex.match(topic) is not None:
+                match = (pattern, route)
+                break
+
+        self.cache.update({topic: match})
+
+        return match
+
+
+def buildRouter(**kinds):
+    """Make a :class:`TopicRouter` from a listener's topic lists and dicts.
+
+    Args:
+        **kinds
+            Any of the LIGBaseConsumer topic keywords (tXML, tFloat, tStr,
+            tBool, tSpecial, tkXMLSpecial), each a list (or for the special
+            ones, a dict of topic: function) or None.
+
+    Returns:
+        router (:class:`TopicRouter`)
+            Router whose routes are (kind, function) tuples; function is
+            None for the list kinds.
+    """
+    router = TopicRouter()
+    for kind in LISTKINDS:
+        for topic in kinds.get(kind) or []:
+            router.add(topic, (kind, None))
+    for kind in DICTKINDS:
+        topics = kinds.get(kind) or {}
+        for topic in topics:
+            router.add(topic, (kind, topics[topic]))
+
+    return router
+
+
+def concreteOnly(topics):
+    """Strip the wildcard topics out, since the base consumer can't use them.
+    """
+    if topics is None:
+        return None
+    elif isinstance(topics, dict):
+        return {t: topics[t] for t in topics if isWildcard(t) is False}
+    else:
+        return [t for t in topics if isWildcard(t) is False]
+
+
+class RoutedConsumer(amqL.LIGBaseConsumer):
+    """LIGBaseConsumer that also understands wildcard topic names.
+
+    Takes the same arguments as
+    :class:`ligmos.utils.amqListeners.LIGBaseConsumer`.  The topic lists
+    are kept as sets so checking a topic against them doesn't depend on
+    how many there are.
+
+    Messages sent as line protocol (see :mod:`dataservants.wireformat`)
+    are written straight to the database, or for tkXMLSpecial topics,
+    handed to their parser already broken out; no XML is involved at all.
+
+    If ``fastxml`` is True, tXML topics are parsed with
+    the compiled extractors in :mod:`dataservants.iago.xmlfields` rather
+    than the generic schema parsing; anything they choke on still goes
+    the generic way.
+    """
+    def __init__(self, dbconn=None, tSpecial=None, tkXMLSpecial=None,
+                 tXML=None, tFloat=None, tStr=None, tBool=None,
+                 fastxml=False):
+        self.fastdb = dbconn
+        self.fastxml = fastxml
+        kinds = {'tSpecial': tSpecial, 'tkXMLSpecial': tkXMLSpecial,
+                 'tXML': tXML, 'tFloat': tFloat, 'tStr': tStr,
+                 'tBool': tBool}
+        self.router = buildRouter(**kinds)
+        self.knownTopics = set()
+
+        concrete = {kind: concreteOnly(kinds[kind]) for kind in kinds}
+        super(RoutedConsumer, self).__init__(dbconn=dbconn, **concrete)
+
+        for kind in LISTKINDS:
+            if isinstance(getattr(self, kind, None), list):
+                setattr(self, kind, set(getattr(self, kind)))
+
+    def learnTopic(self, topic):
+        """Add a topic matching a wildcard to the base consumer's routes.
+
+        Args:
+            topic (:obj:`str`)
+                Topic name, without any ``/topic/`` prefix.
+        """
+        if topic in self.knownTopics:
+            return
+        self.knownTopics.add(topic)
+
+        match = self.router.resolve(topic)
+        if match is None or match[0] == topic:
+            # Either nobody wants it, or the base already knows about it
+            return
+
+        pattern, (kind, func) = match
+        print("Routing %s as %s (matched %s)" % (topic, kind, pattern))
+        if kind in DICTKINDS:
+            if getattr(self, kind, None) is None:
+                setattr(self, kind, {})
+            getattr(self, kind).update({topic: func})
+        else:
+            if getattr(self, kind, None) is None:
+                setattr(self, kind, set())
+            getattr(self, kind).add(topic)
+
+    def fastXML(self, topic, body):
+        """Parse an XML topic with its compiled extractor.
+
+        Returns:
+            handled (:obj:`bool`)
+                True if the message was taken care of.
+        """
+        try:
+            rP = extractFields(topic, body)
+        except Exception as err:
+            print("Fast XML parse of %s failed (%s); using the schema" %
+                  (topic, str(err)))
+            return False
+
+        if self.fastdb is not None and rP[3] != {}:
+            packet = makeInfluxPacket(meas=[rP[0]], ts=rP[1],
+                                      fields=rP[3])
+            self.fastdb.singleCommit(packet, table=self.fastdb.tablename,
+                                     timeprec=rP[2], close=True)
+
+        return True
+
+    def lineProtocol(self, topic, body):
+        """Write (or hand off) a message that came in as line protocol.
+        """
+        try:
+            points = fromLineProtocol(body)
+        except (ValueError, IndexError) as err:
+            print("Bad line protocol message on %s! %s" % (topic, str(err)))
+            return
+
+        match = self.router.resolve(topic)
+        if match is not None and match[1][0] == 'tkXMLSpecial':
+            # Give it the same [meas, ts, timeprec, fields] it would have
+            #   gotten from the XML
+            func = match[1][1]
+            for point in points:
+                rP = [point['measurement'], point.get('time'), 'n',
+                      point['fields']]
+                func(rP, db=self.fastdb)
+        elif self.fastdb is not None and points != []:
+            self.fastdb.singleCommit(points, table=self.fastdb.tablename,
+                                     timeprec='n', close=True)
+
+    def on_message(self, *args, **kwargs):
+        headers, body = messageParts(args, kwargs)
+        topic = os.path.basename(headers.get('destination', ''))
+        self.learnTopic(topic)
+
+        if headers.get('content-type', '').startswith(LINECONTENTTYPE):
+            self.lineProtocol(topic, body)
+            return
+
+        if self.fastxml is True:
+            match = self.router.resolve(topic)
+            if match is not None and match[1][0] == 'tXML':
+                if self.fastXML(topic, body) is True:
+                    return
+
+        return super(RoutedConsumer, self).on_message(*args, **kwargs)
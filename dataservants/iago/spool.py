@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Local disk spool for points on their way to InfluxDB.
+
+Points are first appended to segment files in a spool directory, which is
+quick and doesn't care how the database is doing, and then a background
+drainer replays them into the database in big batches.  If the database
+is slow or down, the drainer just backs off and tries again later while
+the points pile up safely on disk; that includes across a restart of Iago
+itself, since anything left in the spool is picked up again at startup.
+
+Each record in a segment is a single line: the CRC32 of the JSON payload
+(as 8 hex digits), a space, and then the payload itself.  Records that
+don't check out (like a half-written one from a crash) are skipped.
+
+Replaying a record twice is harmless, since a point written to InfluxDB
+again with the same measurement, tags and time just replaces itself.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import os
+import glob
+import json
+import zlib
+import time
+import threading
+import datetime as dt
+
+
+def jsonDefault(obj):
+    """Let datetimes (the buffered points' timestamps) go into JSON.
+    """
+    if isinstance(obj, (dt.datetime, dt.date)):
+        return obj.isoformat()
+    raise TypeError("%s isn't JSON serializable" % (type(obj)))
+
+
+def encodeRecord(table, timeprec, points):
+    """Turn a batch of points into a single checksummed spool line.
+    """
+    payload = json.dumps({'table': table, 'timeprec': timeprec,
+                          'points': points}, default=jsonDefault)
+    crc = zlib.crc32(payload.encode('utf-8'))
+
+    return "%08x %s\n" % (crc, payload)
+
+
+def decodeRecord(line):
+    """Get the (table, timeprec, points) back out of a spool line.
+
+    Returns:
+        record (:obj:`tuple`)
+            (table, timeprec, points), or None if the line is damaged.
+    """
+    try:
+        crc, payload = line.rstrip("\n").split(" ", 1)
+        if int(crc, 16) != zlib.crc32(payload.encode('utf-8')):
+            return None
+        rec = json.loads(payload)
+        return rec['table'], rec['timeprec'], rec['points']
+    except (ValueError, KeyError):
+        return None
+
+
+class Spool(object):
+    """Append-only spool of points, drained into a database in the background.
+
+    Args:
+        spooldir (:obj:`str`)
+            Directory to keep the segment files in. Created if needed.
+        db (:class:`ligmos.utils.database.influxobj`)
+            The real database object that the points end up in.
+        segmentbytes (:obj:`int`, optional)
+            Start a new segment file once the current one is this big.
+            Defaults to 8 MiB.
+        batchpoints (:obj:`int`, optional)
+            Maximum points per database write when draining.
+            Defaults to 5000.
+        maxbackoff (:obj:`float`, optional)
+            Longest wait (seconds) between retries while the database is
+            unhappy. Defaults to 60.
+        fsync (:obj:`bool`, optional)
+            fsync after every append, for surviving power loss and not
+            just a crash of Iago. Defaults to False.
+        maxdelay (:obj:`float`, optional)
+            Close off the segment being written for draining once it's
+            this old (seconds), even if it isn't full. Defaults to 1.
+    """
+    def __init__(self, spooldir, db, segmentbytes=2**23, batchpoints=5000,
+                 maxbackoff=60., fsync=False, maxdelay=1.):
+        self.spooldir = os.path.abspath(os.path.expanduser(spooldir))
+        self.db = db
+        self.segmentbytes = segmentbytes
+        self.batchpoints = batchpoints
+        self.maxbackoff = maxbackoff
+        self.fsync = fsync
+        self.maxdelay = maxdelay
+
+        os.makedirs(self.spooldir, exist_ok=True)
+
+        # Anything still open was from a crash, so it's done now
+        for fname in glob.glob(os.path.join(self.spooldir, "*.seg.open")):
+            os.replace(fname, fname[:-len(".open")])
+
+        # Carry on numbering from whatever was left behind last time
+        leftover = self.closedSegments()
+        if leftover != []:
+            print("Found %d spool segments left in %s" % (len(leftover),
+                                                          self.spooldir))
+            self.seq = int(os.path.basename(leftover[-1]).split(".")[0]) + 1
+        else:
+            self.seq = 0
+
+        self.lock = threading.Lock()
+        self.active = None
+        self.activeBytes = 0
+        self.activeSince = None
+
+        # Chunks of a segment that made it to the database already, so a
+        #   retry after a partial failure doesn't redo them
+        self.doneChunks = {}
+
+        self.halt = False
+        self.wakeup = threading.Event()
+        self.drainer = threading.Thread(target=self._drainLoop,
+                                        name="Spool-drainer",
+                                        daemon=True)
+        self.drainer.start()
+
+    def closedSegments(self):
+        """Segment files that are finished being written, oldest first.
+        """
+        return sorted(glob.glob(os.path.join(self.spooldir, "*.seg")))
+
+    def _rotate(self):
+        """Close off the active segment so it can be drained.
+
+        Must be called with the lock held.
+        """
+        if self.active is not None:
+            fname = self.active.name
+            self.active.close()
+            self.active = None
+            self.activeBytes = 0
+            self.activeSince = None
+            os.replace(fname, fname[:-len(".open")])
+
+    def append(self, table, timeprec, points):
+        """Add a batch of points to the spool.
+
+        Args:
+            table (:obj:`str`)
+                Table (database) the points belong in.
+            timeprec (:obj:`str`)
+                Precision of the points' timestamps, or None for the
+                database object's default.
+            points (:obj:`list`)
+                InfluxDB points.
+        """
+        rec = encodeRecord(table, timeprec, points)
+        rotated = False
+        with self.lock:
+            if self.active is None:
+                fname = os.path.join(self.spooldir,
+                                     "%012d.seg.open" % (self.seq))
+                self.seq += 1
+                self.active = open(fname, 'a')
+                self.activeSince = time.monotonic()
+            self.active.write(rec)
+            self.active.flush()
+            if self.fsync is True:
+                os.fsync(self.active.fileno())
+            self.activeBytes += len(rec)
+            if self.activeBytes >= self.segmentbytes:
+                self._rotate()
+                rotated = True
+
+        # Only worth waking the drainer if there's a whole segment ready;
+        #   otherwise it'll get to it once the active one is old enough
+        if rotated is True:
+            self.wakeup.set()
+
+    def _drainSegment(self, fname):
+        """Write all of a segment's points to the database.
+
+        Returns:
+            done (:obj:`bool`)
+                True if everything in the segment made it.
+        """
+        batches = {}
+        nbad = 0
+        with open(fname, 'r') as f:
+            for line in f:
+                rec = decodeRecord(line)
+                if rec is None:
+                    nbad += 1
+                    continue
+                table, timeprec, points = rec
+                batches.setdefault((table, timeprec), []).extend(points)
+
+        if nbad > 0 and fname not in self.doneChunks:
+            print("Skipped %d damaged records in %s" % (nbad, fname))
+
+        # Chunk everything up the same way every time, so that doneChunks
+        #   always refers to the same ones
+        chunks = []
+        for key in sorted(batches.keys(), key=str):
+            points = batches[key]
+            for i in range(0, len(points), self.batchpoints):
+                chunks.append((key, points[i:i + self.batchpoints]))
+
+        ndone = self.doneChunks.get(fname, 0)
+        for (table, timeprec), points in chunks[ndone:]:
+            kwargs = {'table': table, 'close': False}
+            if timeprec is not None:
+                kwargs.update({'timeprec': timeprec})
+            try:
+                self.db.singleCommit(points, **kwargs)
+            except Exception as err:
+                print("Spool drain to %s failed! %s" % (table, str(err)))
+                self.doneChunks.update({fname: ndone})
+                return False
+            ndone += 1
+
+        self.doneChunks.pop(fname, None)
+
+        return True
+
+    def _drainLoop(self):
+        """Background thread that empties the spool into the database.
+        """
+        backoff = 1.
+        while self.halt is False:
+            segs = self.closedSegments()
+            if segs == []:
+                # Take whatever's accumulated in the active one, if it's
+                #   been collecting for long enough.  Points arrive here
+                #   one packet at a time, so this is what batches them up
+                with self.lock:
+                    if self.activeBytes > 0 and \
+                            (time.monotonic() -
+                             self.activeSince) >= self.maxdelay:
+                        self._rotate()
+                segs = self.closedSegments()
+
+            if segs == []:
+                self.wakeup.wait(timeout=min(0.5, self.maxdelay))
+                self.wakeup.clear()
+                continue
+
+            if self._drainSegment(segs[0]) is True:
+                os.remove(segs[0])
+                backoff = 1.
+            else:
+                # Database is unhappy, so give it some room
+                print("Retrying the spool in %.0f s" % (backoff))
+                self.wakeup.clear()
+                waited = 0.
+                while self.halt is False and waited < backoff:
+                    self.wakeup.wait(timeout=0.5)
+                    waited += 0.5
+                backoff = min(backoff*2., self.maxbackoff)
+
+    def depth(self):
+        """Number of bytes waiting in the spool to be written.
+        """
+        nbytes = 0
+        for fname in self.closedSegments():
+            try:
+                nbytes += os.path.getsize(fname)
+            except OSError:
+                pass
+
+        with self.lock:
+            return nbytes + self.activeBytes
+
+    def close(self):
+        """Stop draining, and make one last try at emptying the spool.
+
+        Anything that didn't make it to the database stays in the spool,
+        and will be picked up the next time around.
+        """
+        self.halt = True
+        self.wakeup.set()
+        self.drainer.join()
+
+        with self.lock:
+            self._rotate()
+
+        for fname in self.closedSegments():
+            if self._drainSegment(fname) is False:
+                break
+            os.remove(fname)
+
+        nleft = self.depth()
+        if nleft > 0:
+            print("%d bytes left in spool %s" % (nleft, self.spooldir))
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Compiled, per-topic extraction of InfluxDB fields from XML messages.
+
+The first message on a topic is used to work out (once) where every value
+lives in the XML and what type it should be; the schema named in the
+message is used for the types if xmlschema is installed, otherwise the
+types are inferred from the values themselves.  After that, each message
+is one parse and a single walk over the elements, with each value going
+straight through its converter into the fields.
+
+Field names are the element names (without namespaces).  If the same name
+shows up at more than one place in a message, those fields are named by
+their path below the root instead, joined with '_'.  The root element's
+name is the measurement, and an element called 'timestamp' (in any case)
+is used as the point's time rather than being a field.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import datetime as dt
+import xml.etree.ElementTree as ET
+
+try:
+    # This one might fail
+    import xmlschema
+except ImportError:
+    xmlschema = None
+
+
+XSINS = "{http://www.w3.org/2001/XMLSchema-instance}"
+
+# Loaded schemas, keyed by their location, so each is only loaded once
+schemaCache = {}
+
+
+def stripNS(tag):
+    """Remove any {namespace} prefix from an element name.
+    """
+    if tag[0] == "{":
+        return tag.split("}", 1)[1]
+    return tag
+
+
+def getSchema(location):
+    """Load (or recall the already loaded) schema at the given location.
+
+    Returns:
+        schema (:class:`xmlschema.XMLSchema`)
+            The schema, or None if xmlschema isn't installed or the schema
+            couldn't be loaded.
+    """
+    if xmlschema is None or location is None:
+        return None
+
+    if location not in schemaCache:
+        try:
+            schemaCache.update({location: xmlschema.XMLSchema(location)})
+        except Exception as err:
+            print("Couldn't load schema %s! %s" % (location, str(err)))
+            schemaCache.update({location: None})
+
+    return schemaCache[location]
+
+
+def toBool(val):
+    """Convert the XML style boolean strings, refusing anything else.
+    """
+    low = val.strip().lower()
+    if low in ['true', '1']:
+        return True
+    elif low in ['false', '0']:
+        return False
+    raise ValueError("%s isn't a boolean" % (val))
+
+
+def inferConverter(val):
+    """Guess at the right converter from a single example value.
+
+    Numbers are always floats when guessing, since a field that happens
+    to be a whole number in its first message and not in a later one
+    would otherwise change type, and InfluxDB won't take that.
+    """
+    for conv in [float, toBool]:
+        try:
+            conv(val)
+            return conv
+        except (ValueError, TypeError):
+            pass
+
+    return str
+
+
+def schemaConverters(schema, rootname):
+    """Get the converter for each element name from the schema's types.
+
+    Returns:
+        convs (:obj:`dict`)
+            Converter for each simple element in the schema (by name).
+    """
+    convs = {}
+    try:
+        root = schema.elements[rootname]
+        for elem in root.iter():
+            if elem.type.is_simple() is False:
+                continue
+            ptype = elem.type.primitive_type.local_name
+            if ptype in ['decimal', 'float', 'double']:
+                conv = float
+            elif ptype == 'boolean':
+                conv = toBool
+            else:
+                conv = str
+            # Integers are derived from decimal, so check for those
+            if elem.type.is_derived(schema.maps.types.get(
+                    '{http://www.w3.org/2001/XMLSchema}integer')):
+                conv = int
+            convs.update({stripNS(elem.name): conv})
+    except Exception as err:
+        print("Couldn't get types from schema! %s" % (str(err)))
+
+    return convs
+
+
+def parseTimestamp(val):
+    """Turn an ISO 8601 timestamp into a datetime, or None if it isn't one.
+    """
+    val = val.strip()
+    if val.endswith("Z"):
+        val = val[:-1] + "+00:00"
+    try:
+        return dt.datetime.fromisoformat(val)
+    except ValueError:
+        return None
+
+
+def leafPaths(root):
+    """Every leaf element in the tree, as (path below root, text) pairs.
+    """
+    leaves = []
+    stack = [(root, ())]
+    while stack != []:
+        elem, path = stack.pop()
+        kids = list(elem)
+        if kids == [] and elem is not root:
+            leaves.append((path, elem.text))
+        for kid in reversed(kids):
+            stack.append((kid, path + (stripNS(kid.tag),)))
+
+    return leaves
+
+
+class XMLExtractor(object):
+    """Compiled extractor for the messages on one topic.
+
+    Args:
+        body (:obj:`str` or :obj:`bytes`)
+            An example message to work everything out from.
+    """
+    def __init__(self, body):
+        root = ET.fromstring(body)
+        self.meas = stripNS(root.tag)
+
+        location = root.get(XSINS + "noNamespaceSchemaLocation")
+        schema = getSchema(location)
+        convs = {}
+        if schema is not None:
+            convs = schemaConverters(schema, root.tag)
+
+        leaves = leafPaths(root)
+
+        # Only use the full paths where the names alone would clash
+        counts = {}
+        for path, _ in leaves:
+            counts.update({path[-1]: counts.get(path[-1], 0) + 1})
+
+        self.tspath = None
+        self.fieldmap = {}
+        for path, text in leaves:
+            name = path[-1]
+            if name.lower() == 'timestamp' and self.tspath is None:
+                self.tspath = path
+                continue
+            if counts[name] > 1:
+                fname = "_".join(path)
+            else:
+                fname = name
+            conv = convs.get(name)
+            if conv is None:
+                conv = inferConverter(text) if text is not None else str
+            self.fieldmap.update({path: [fname, conv]})
+
+    def extract(self, body):
+        """Pull the fields out of a message.
+
+        Args:
+            body (:obj:`str` or :obj:`bytes`)
+                XML message.
+
+        Returns:
+            rP (:obj:`list`)
+                [meas, ts, timeprec, fields], the same as what the
+                tkXMLSpecial parsers are given.
+        """
+        root = ET.fromstring(body)
+
+        fields = {}
+        ts = None
+        stack = [(root, ())]
+        while stack != []:
+            elem, path = stack.pop()
+            for kid in elem:
+                kpath = path + (stripNS(kid.tag),)
+                if len(kid) > 0:
+                    stack.append((kid, kpath))
+                    continue
+                text = kid.text
+                if kpath == self.tspath:
+                    if text is not None:
+                        ts = parseTimestamp(text)
+                    continue
+                try:
+                    fname, conv = self.fieldmap[kpath]
+                except KeyError:
+                    # Something new; just keep it as a string
+                    fname, conv = "_".join(kpath), str
+                    self.fieldmap.update({kpath: [fname, conv]})
+                if text is None:
+                    continue
+                try:
+                    fields[fname] = conv(text)
+                except (ValueError, TypeError):
+                    # Something like "N/A" in a number field. Switching the
+                    #   field's type would make InfluxDB refuse every write
+                    #   from here on, so just leave this one value out
+                    print("Skipping bad value %r for %s.%s" %
+                          (text, self.meas, fname))
+
+        return [self.meas, ts, 'ms', fields]
+
+
+# Compiled extractors, keyed by topic
+extractors = {}
+
+
+def extractFields(topic, body):
+    """Extract the fields from a message, compiling an extractor if needed.
+
+    Args:
+        topic (:obj:`str`)
+            Topic the message came in on.
+        body (:obj:`str` or :obj:`bytes`)
+            XML message.
+
+    Returns:
+        rP (:obj:`list`)
+            [meas, ts, timeprec, fields]; see :meth:`XMLExtractor.extract`.
+    """
+    try:
+        extractor = extractors[topic]
+    except KeyError:
+        extractor = XMLExtractor(body)
+        extractors.update({topic: extractor})
+
+    return extractor.extract(body)
@@ -23,6 +23,114 @@ from ligmos import utils
 from .. import yvette
 
 
+def localHashes(sldirrp, lpfile, args, iobj):
+    """Read our hash file for a directory, making it first if need be.
+
+    Returns:
+        lhash (:obj:`dict`)
+            Hashes keyed by basename; empty if there weren't any files or
+            the hash file couldn't be written.
+    """
+    uH = utils.hashes
+
+    lhash = uH.readHashFile(lpfile, basenamed=True, debug=args.debug)
+
+    # If lhashes == {}} then we haven't made them yet
+    #   ... so do that and write the file
+    if lhash == {}:
+        lhash = yvette.filehashing.makeManifest(sldirrp,
+                                                htype=args.hashtype,
+                                                filetype=iobj.filemask,
+                                                debug=args.debug)
+        if lhash is None:
+            return {}
+
+        s = uH.writeHashFile(lhash, lpfile)
+        if s is False:
+            print("--> Failed to write hash file %s" % (lpfile))
+            lhash = {}
+        else:
+            # Read the hashes back in, but without the
+            #   path information so it's easier later
+            lhash = uH.readHashFile(lpfile, basenamed=True,
+                                    debug=args.debug)
+
+    return lhash
+
+
+def compareHashes(rhash, lhash):
+    """Check that every remote file is here, with the same hash.
+
+    Args:
+        rhash (:obj:`dict`)
+            Remote hashes, keyed by basename.
+        lhash (:obj:`dict`)
+            Local hashes, keyed by basename.
+
+    Returns:
+        deletable (:obj:`bool`)
+            True if they all are.
+    """
+    deletable = True
+    for key in rhash.keys():
+        try:
+            if rhash[key] != lhash[key]:
+                # A file failed its hash check!
+                deletable = False
+        except KeyError:
+            # A file doesn't exist locally!
+            deletable = False
+            print("--> %s not in local set!" % (key))
+
+    return deletable
+
+
+def merkleDifferences(eSSH, baseYcmd, args, rdir, sldirrp):
+    """Compare Yvette's Merkle tree of a directory against ours.
+
+    See :mod:`dataservants.yvette.merkle` for how it works.
+
+    Args:
+        eSSH (:class:`dataservants.utils.ssh.SSHHandler`)
+            Opened SSH connection to the instrument host.
+        baseYcmd (:obj:`str`)
+            String describing how to properly start Yvette on the target.
+        args (:class:`argparse.Namespace`)
+            Mandos' parsed arguments.
+        rdir (:obj:`str`)
+            Directory on the instrument host.
+        sldirrp (:obj:`str`)
+            The same directory here.
+
+    Returns:
+        rdiff (:obj:`dict`)
+            Remote {name: hash} entries from the parts of the tree that
+            don't match ours (empty if it all matched). None if Yvette
+            couldn't give us a (non-empty) tree, in which case it's time
+            to fall back to copying over her whole hash file.
+    """
+    yR = yvette.remote
+    yM = yvette.merkle
+
+    def getNodes(keys):
+        return yR.actionMerkle(eSSH, baseYcmd, rdir, args.hashtype,
+                               nodes=keys, agent=args.agent,
+                               debug=args.debug)
+
+    try:
+        rsumm = yR.actionMerkle(eSSH, baseYcmd, rdir, args.hashtype,
+                                agent=args.agent, debug=args.debug)
+        if rsumm is None or rsumm.get('nfiles', 0) == 0:
+            return None
+
+        ltree, _ = yM.dirTree(sldirrp, htype=args.hashtype,
+                              depth=rsumm['depth'], debug=args.debug)
+        return yM.remoteDifferences(ltree, rsumm, getNodes)
+    except Exception as err:
+        print("--> Merkle comparison failed! %s" % (str(err)))
+        return None
+
+
 def cleanRemote(eSSH, baseYcmd, args, iobj):
     """
     TODO: Include timeout/maxtime stuff here
@@ -32,7 +140,6 @@ def cleanRemote(eSSH, baseYcmd, args, iobj):
 
     # Rename to control line length
     yR = yvette.remote
-    yH = yvette.filehashing
     uH = utils.hashes
 
     # Need to make sure our destination directory actually exists first
@@ -43,11 +150,17 @@ def cleanRemote(eSSH, baseYcmd, args, iobj):
 
     print("--> Defining custom action set for cleaning old files...")
 
-    # Get the list of "old" files on the instrument host
+    # Get the list of "old" files on the instrument host.  With a quietAge
+    #   Yvette also has to fingerprint (stat every file in) each of those
+    #   directories, which can take a good while on a network disk
+    if args.quietAge > 0:
+        oldtime = 600.
+    else:
+        oldtime = 60.
     getOld = utils.common.processDescription(func=yR.commandYvetteSimple,
                                              name='GetOldDirs',
                                              timedelay=3.,
-                                             maxtime=60.,
+                                             maxtime=oldtime,
                                              needSSH=True,
                                              args=[eSSH, baseYcmd, args,
                                                    iobj, 'findold'],
@@ -71,12 +184,21 @@ def cleanRemote(eSSH, baseYcmd, args, iobj):
     bhfname = "AListofHashes.%s" % (args.hashtype)
     yhfname = "RemoteListofHashes.%s" % (args.hashtype)
 
+    # If we asked, we also got fingerprints of the directories; anything
+    #   that's still being written to is obviously not done yet
+    fprints = ans['DirsOld'][2] if len(ans['DirsOld']) > 2 else {}
+
     # Make Yvette verify these directories on her side
     #   This will make manifests in directories that don't have them
     for each in ans['DirsOld'][1]:
         # The final answer flag
         deletable = False
 
+        if each in fprints and fprints[each][3] < args.quietAge*3600.:
+            print("--> %s:%s was modified %.1f h ago; skipping" %
+                  (iobj.host, each, fprints[each][3]/3600.))
+            continue
+
         # Now to start the checking process, multi-stage
         iobj.srcdir = each
         print("--> Getting Yvette to verify %s on %s" % (each, iobj.host))
@@ -116,8 +238,31 @@ def cleanRemote(eSSH, baseYcmd, args, iobj):
                 sldircheck, sldirrp = utils.files.checkDir(specificLocalDir)
                 # print(specificLocalDir, sldircheck)
                 if sldircheck is True:
-                    # Open up our SSH file transfer pathway; if it works,
-                    #   eSSH.sftp will not be None
+                    # This is the file we made locally
+                    lpfile = "%s/%s" % (sldirrp, bhfname)
+                    lhash = localHashes(sldirrp, lpfile, args, iobj)
+
+                    # Compare Merkle trees first; if the directory made it
+                    #   here intact that's just the one quick question
+                    rdiff = merkleDifferences(eSSH, baseYcmd, args, each,
+                                              sldirrp)
+                    if rdiff is not None:
+                        if rdiff != {}:
+                            print("--> Merkle trees differ in %d remote"
+                                  " files" % (len(rdiff)))
+                        else:
+                            print("--> Merkle roots match")
+                        deletable = compareHashes(rdiff, lhash)
+                        if deletable is True:
+                            print("--> CAN DELETE %s:%s" % (iobj.host,
+                                                            each))
+                        else:
+                            print("--> Retransfer needed!")
+                        continue
+
+                    # Otherwise, do it the old way and get Yvette's whole
+                    #   hash file. Open up our SSH file transfer pathway;
+                    #   if it works, eSSH.sftp will not be None
                     eSSH.openSFTP()
                     # print("Opened SFTP connection")
                     if eSSH.sftp is not None:
@@ -125,8 +270,6 @@ def cleanRemote(eSSH, baseYcmd, args, iobj):
                         lfile = "%s/%s" % (sldirrp, yhfname)
                         # This is where Yvette's file is on her system
                         rfile = "%s/%s" % (each, bhfname)
-                        # This is the file we made locally
-                        lpfile = "%s/%s" % (sldirrp, bhfname)
 
                         # Now actually get the remote file
                         status = eSSH.getFile(lfile, rfile)
@@ -135,50 +278,13 @@ def cleanRemote(eSSH, baseYcmd, args, iobj):
                         if status is True:
                             # Verify the file we just got against our local one
                             #   by comparing the hashes directly
-                            # print("File transfer complete")
-                            # print(lfile, rfile)
                             # These are the hashes from our file from Yvette
                             rhash = uH.readHashFile(lfile,
                                                     basenamed=True,
                                                     debug=args.debug)
-                            # These are the hashes that we made locally
-                            lhash = uH.readHashFile(lpfile,
-                                                    basenamed=True,
-                                                    debug=args.debug)
-                            # print(lhash)
-                            # If lhashes == {}} then we haven't made them yet
-                            #   ... so do that and write the file
-                            if lhash == {}:
-                                lhash = yH.makeManifest(sldirrp,
-                                                        htype=args.hashtype,
-                                                        filetype=iobj.filemask,
-                                                        debug=args.debug)
-                                # print("Writing hashes to %s" % (rfile))
-                                s = uH.writeHashFile(lhash,
-                                                     lpfile)
-                                if s is False:
-                                    print("--> Failed to write hash file %s" %
-                                          (lpfile))
-                                else:
-                                    # Read the hashes back in, but without the
-                                    #   path information so it's easier later
-                                    lhash = uH.readHashFile(lpfile,
-                                                            basenamed=True,
-                                                            debug=args.debug)
 
                             # Compare the remote ones against our local ones
-                            deletable = True
-                            for key in rhash.keys():
-                                try:
-                                    comp = rhash[key] == lhash[key]
-                                    if comp is False:
-                                        # A file failed its hash check!
-                                        deletable = False
-                                    # print("File %s is %s" % (key, comp))
-                                except KeyError:
-                                    # A file doesn't exist locally!
-                                    deletable = False
-                                    print("--> %s not in local set!" % (key))
+                            deletable = compareHashes(rhash, lhash)
 
                             if deletable is True:
                                 print("--> CAN DELETE %s:%s" % (iobj.host,
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Quick timestamp parsing and timezone handling for the parsers.
+
+Every message that comes through Abu or Iago gets a strptime, a
+pytz.timezone() lookup, and a localize() or astimezone(); all of which are
+surprisingly slow when done a few thousand times a second.  Instead:
+
+* Timezones are looked up once and kept around.
+* Fixed layouts (anything with just %Y %m %d %H %M %S %f and separators)
+  are parsed by slicing the string, rather than going through strptime.
+  Anything that doesn't fit the layout (not zero padded, etc.) still goes
+  through strptime, so nothing that used to parse stops parsing.
+* The timezone offset is worked out once for each hour and then reused.
+  If an hour has a DST change in it somewhere, nothing is cached for it
+  and it's all done the slow way, so the answer is always exactly what
+  pytz would have said.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import re
+import datetime as dt
+
+import pytz
+
+
+# These are all just caches, filled in as things get used
+timezoneCache = {}
+layoutCache = {}
+offsetCache = {}
+
+# Width of each fixed width strptime code; %f is special and is whatever
+#   number of digits is there (up to 6)
+LAYOUTWIDTHS = {'Y': 4, 'm': 2, 'd': 2, 'H': 2, 'M': 2, 'S': 2}
+
+
+def getTimezone(tzname):
+    """Get the (cached) pytz timezone for tzname.
+    """
+    try:
+        return timezoneCache[tzname]
+    except KeyError:
+        tz = pytz.timezone(tzname)
+        timezoneCache.update({tzname: tz})
+        return tz
+
+
+def compileLayout(fmt):
+    """Turn a strptime format into a list of string slices, if possible.
+
+    Args:
+        fmt (:obj:`str`)
+            strptime style format.
+
+    Returns:
+        layout (:obj:`tuple`)
+            (total length without any %f digits, list of (code, start, end),
+            regex that the whole string must match), or None if fmt has
+            something in it that isn't a fixed width field.
+    """
+    pos = 0
+    slices = []
+    regex = []
+    parts = re.split(r"(%.)", fmt)
+    for i, part in enumerate(parts):
+        if part.startswith("%") and len(part) == 2:
+            code = part[1]
+            if code in LAYOUTWIDTHS:
+                width = LAYOUTWIDTHS[code]
+                slices.append((code, pos, pos + width))
+                regex.append(r"\d{%d}" % (width))
+                pos += width
+            elif code == 'f' and i == len(parts) - 2 and parts[-1] == '':
+                # Only bother with fractions that are the very last thing
+                slices.append((code, pos, None))
+                regex.append(r"\d{1,6}")
+            else:
+                return None
+        else:
+            regex.append(re.escape(part))
+            pos += len(part)
+
+    return pos, slices, re.compile("".join(regex) + "$")
+
+
+def parseTimestamp(text, fmt):
+    """Like dt.datetime.strptime(text, fmt), but quicker for fixed layouts.
+
+    Args:
+        text (:obj:`str`)
+            Timestamp string.
+        fmt (:obj:`str`)
+            strptime style format.
+
+    Returns:
+        dtobj (:class:`datetime.datetime`)
+            Naive datetime.
+    """
+    try:
+        layout = layoutCache[fmt]
+    except KeyError:
+        layout = compileLayout(fmt)
+        layoutCache.update({fmt: layout})
+
+    if layout is not None:
+        length, slices, regex = layout
+        # The length check is super cheap, and catches nearly everything
+        #   that's not in the layout; the regex makes sure of it
+        if len(text) >= length and regex.match(text) is not None:
+            vals = {'Y': 1, 'm': 1, 'd': 1, 'H': 0, 'M': 0, 'S': 0, 'f': 0}
+            for code, start, end in slices:
+                if code == 'f':
+                    frac = text[start:]
+                    vals['f'] = int(frac)*10**(6 - len(frac))
+                else:
+                    vals[code] = int(text[start:end])
+            try:
+                return dt.datetime(vals['Y'], vals['m'], vals['d'],
+                                   vals['H'], vals['M'], vals['S'],
+                                   vals['f'])
+            except ValueError:
+                # Let strptime complain about it in its usual way
+                pass
+
+    return dt.datetime.strptime(text, fmt)
+
+
+def hourlyOffset(key, tz, start, wayin):
+    """Get the (tzinfo, utcoffset) to use for every time in one hour.
+
+    Returns None (and caches nothing) if the offset changes in the hour.
+    """
+    try:
+        return offsetCache[key]
+    except KeyError:
+        pass
+
+    first = wayin(tz, start)
+    last = wayin(tz, start + dt.timedelta(minutes=59, seconds=59,
+                                          microseconds=999999))
+    if first.utcoffset() == last.utcoffset() and \
+       first.tzinfo is last.tzinfo:
+        offset = (first.tzinfo, first.utcoffset())
+    else:
+        offset = None
+
+    # Don't let this grow forever in something that runs for months
+    if len(offsetCache) > 10000:
+        offsetCache.clear()
+    offsetCache.update({key: offset})
+
+    return offset
+
+
+def localizeTime(dtobj, tzname):
+    """Quicker pytz.timezone(tzname).localize(dtobj).
+
+    Args:
+        dtobj (:class:`datetime.datetime`)
+            Naive datetime, in the timezone's local time.
+        tzname (:obj:`str`)
+            Timezone name, like 'US/Arizona'.
+
+    Returns:
+        dtobj_aware (:class:`datetime.datetime`)
+            Timezone aware datetime.
+    """
+    tz = getTimezone(tzname)
+    start = dtobj.replace(minute=0, second=0, microsecond=0)
+    offset = hourlyOffset(('local', tzname, start), tz, start,
+                          lambda tz, when: tz.localize(when))
+    if offset is None:
+        return tz.localize(dtobj)
+
+    return dtobj.replace(tzinfo=offset[0])
+
+
+def utcToZone(dtobj, tzname):
+    """Quicker dtobj.replace(tzinfo=pytz.UTC).astimezone(tzname).
+
+    Args:
+        dtobj (:class:`datetime.datetime`)
+            Naive (or UTC) datetime, in UTC.
+        tzname (:obj:`str`)
+            Timezone name, like 'US/Arizona'.
+
+    Returns:
+        dtobj_aware (:class:`datetime.datetime`)
+            Timezone aware datetime in tzname.
+    """
+    tz = getTimezone(tzname)
+    utc = dtobj.replace(tzinfo=None)
+    start = utc.replace(minute=0, second=0, microsecond=0)
+    offset = hourlyOffset(('utc', tzname, start), tz, start,
+                          lambda tz, when:
+                          when.replace(tzinfo=pytz.UTC).astimezone(tz))
+    if offset is None:
+        return utc.replace(tzinfo=pytz.UTC).astimezone(tz)
+
+    return (utc + offset[1]).replace(tzinfo=offset[0])
@@ -1,2 +1,6 @@
 from . import tasks
+from . import ledger
+from . import throttle
+from . import transfer
 from . import parseargs
+from . import rsyncstats
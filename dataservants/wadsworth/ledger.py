@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""A local record of what's been transferred, so it isn't done again.
+
+With ``--rangeNew 7`` every directory from the last week gets rsync'd
+every single cycle, and each of those makes the instrument host build a
+file list and stat every file in it even though most of those nights
+finished days ago.  Instead, Yvette also sends a cheap fingerprint of each
+directory (:func:`dataservants.yvette.filehashing.dirFingerprint`) and the
+last successful sync of each one is kept here in a little SQLite database.
+If a directory's fingerprint is the same as it was the last time it was
+successfully synced, it's skipped.
+
+Directories are still resynced every ``recheck`` hours regardless, just in
+case something changed on our end instead.
+
+Each Wadsworth host worker opens its own connection (SQLite is fine with
+several processes, as long as they don't hold on to transactions).
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import json
+import time
+import sqlite3
+
+
+class TransferLedger(object):
+    """Last successful sync and fingerprint of each instrument directory.
+
+    Args:
+        dbfile (:obj:`str`)
+            SQLite database file; it's created if it doesn't exist.
+        recheck (:obj:`float`, optional)
+            Hours after which a directory is resynced even if its
+            fingerprint hasn't changed. 0 means never. Defaults to 24.
+    """
+    def __init__(self, dbfile, recheck=24.):
+        self.dbfile = dbfile
+        self.recheck = recheck
+
+        self.conn = sqlite3.connect(dbfile, timeout=30.)
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS transfers ("
+                              "host TEXT, srcdir TEXT, destdir TEXT, "
+                              "nfiles INTEGER, totsize INTEGER, "
+                              "maxmtime REAL, lastsync REAL, "
+                              "lastattempt REAL, returncode INTEGER, "
+                              "stats TEXT, "
+                              "PRIMARY KEY (host, srcdir))")
+
+    def lookup(self, host, srcdir):
+        """Get the stored record for a directory.
+
+        Returns:
+            record (:obj:`dict`)
+                All of the stored columns, or None if it's never been seen.
+        """
+        cur = self.conn.execute("SELECT * FROM transfers WHERE "
+                                "host = ? AND srcdir = ?", (host, srcdir))
+        row = cur.fetchone()
+        if row is None:
+            return None
+
+        return dict(zip([col[0] for col in cur.description], row))
+
+    def unchanged(self, host, srcdir, fprint):
+        """Check whether a directory can be skipped.
+
+        Args:
+            host (:obj:`str`)
+                Instrument host.
+            srcdir (:obj:`str`)
+                Directory on the instrument host.
+            fprint (:obj:`list`)
+                Its current fingerprint, as [nfiles, totsize, maxmtime].
+
+        Returns:
+            unchanged (:obj:`bool`)
+                True if it was successfully synced with this same
+                fingerprint, recently enough to trust.
+        """
+        if fprint is None:
+            return False
+
+        rec = self.lookup(host, srcdir)
+        if rec is None or rec['returncode'] != 0 or rec['lastsync'] is None:
+            return False
+
+        if self.recheck > 0 and \
+           time.time() - rec['lastsync'] > self.recheck*3600.:
+            return False
+
+        return [rec['nfiles'], rec['totsize'], rec['maxmtime']] == \
+            [int(fprint[0]), int(fprint[1]), float(fprint[2])]
+
+    def record(self, host, srcdir, destdir, fprint, result, when=None):
+        """Store the outcome of an rsync of a directory.
+
+        Args:
+            host (:obj:`str`)
+                Instrument host.
+            srcdir (:obj:`str`)
+                Directory on the instrument host.
+            destdir (:obj:`str`)
+                Where it went.
+            fprint (:obj:`list`)
+                The directory's fingerprint from *before* the rsync started,
+                so anything that changed during it gets picked up next time.
+                Can be None if it's unknown.
+            result (:obj:`tuple`)
+                (return code, stats or error) from the rsync.
+            when (:obj:`float`, optional)
+                Unix time it finished. Defaults to None, meaning now.
+        """
+        if when is None:
+            when = time.time()
+        code, ans = result
+
+        if code == 0 and fprint is not None:
+            vals = (int(fprint[0]), int(fprint[1]), float(fprint[2]), when)
+        else:
+            # Forget the old fingerprint so it'll definitely be retried
+            vals = (None, None, None, None)
+
+        with self.conn:
+            # Keep the last good sync time if this one didn't work out
+            self.conn.execute("INSERT INTO transfers VALUES "
+                              "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                              "ON CONFLICT (host, srcdir) DO UPDATE SET "
+                              "destdir = excluded.destdir, "
+                              "nfiles = excluded.nfiles, "
+                              "totsize = excluded.totsize, "
+                              "maxmtime = excluded.maxmtime, "
+                              "lastsync = COALESCE(excluded.lastsync, "
+                              "transfers.lastsync), "
+                              "lastattempt = excluded.lastattempt, "
+                              "returncode = excluded.returncode, "
+                              "stats = excluded.stats",
+                              (host, srcdir, destdir) + vals[:3] +
+                              (vals[3], when, code, json.dumps(ans)))
+
+    def close(self):
+        self.conn.close()
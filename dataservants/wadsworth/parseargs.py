@@ -40,4 +40,102 @@ def extraArguments(parser):
                         help='Type of hash to use for file integrity checks',
                         default="xx64")
 
+    hstr = "Keep a persistent Yvette agent running on each instrument host "
+    hstr += "for the duration of each SSH connection, rather than starting "
+    hstr += "a new Yvette for every query."
+    parser.add_argument('--agent', action='store_true',
+                        help=hstr,
+                        default=False)
+
+    fvstr = 'Have Yvette only rehash files whose stat fingerprint changed'
+    parser.add_argument('--fastverify', action='store_true',
+                        help=fvstr,
+                        default=False)
+
+    sfstr = 'Fraction of unchanged files to rehash anyways with --fastverify'
+    parser.add_argument('--samplefrac', type=float,
+                        help=sfstr,
+                        default=0.02)
+
+    hstr = "Number of instrument hosts to poll concurrently, each in "
+    hstr += "its own process. 1 polls them one after another."
+    parser.add_argument('--hostWorkers', type=int,
+                        help=hstr,
+                        default=1)
+
+    rhstr = "Most rsyncs to run at once from any single instrument host"
+    parser.add_argument('--rsyncPerHost', type=int,
+                        help=rhstr,
+                        default=2)
+
+    rustr = "Most rsyncs to run at once in total, across all instrument "
+    rustr += "hosts (i.e. through the site uplink). 0 means no limit."
+    parser.add_argument('--rsyncUplink', type=int,
+                        help=rustr,
+                        default=4)
+
+    parser.add_argument('--rsyncTimeout', type=float,
+                        help='Seconds each rsync may run (0 is forever)',
+                        default=0.)
+
+    bwstr = "Most total bandwidth (KiB/s) to use for rsyncs from any single "
+    bwstr += "instrument host. 0 means no limit."
+    parser.add_argument('--rsyncBWLimit', type=int,
+                        help=bwstr,
+                        default=0)
+
+    llstr = "Instrument host load average at or below which rsyncs run at "
+    llstr += "full speed"
+    parser.add_argument('--loadLow', type=float,
+                        help=llstr,
+                        default=1.0)
+
+    lhstr = "Instrument host load average at or above which rsyncs are "
+    lhstr += "throttled as much as possible"
+    parser.add_argument('--loadHigh', type=float,
+                        help=lhstr,
+                        default=4.0)
+
+    ufstr = "Fraction of free disk space on an instrument host below which "
+    ufstr += "rsyncs run at full speed regardless of load"
+    parser.add_argument('--urgentFree', type=float,
+                        help=ufstr,
+                        default=0.05)
+
+    mfstr = "Fraction of --rsyncBWLimit to still use when fully throttled"
+    parser.add_argument('--minBWFrac', type=float,
+                        help=mfstr,
+                        default=0.1)
+
+    tistr = "Seconds between rechecking the instrument host's load while "
+    tistr += "rsyncs are running. 0 only checks before starting them."
+    parser.add_argument('--throttleInterval', type=float,
+                        help=tistr,
+                        default=60.)
+
+    ldstr = "SQLite file in which to keep track of what's been transferred, "
+    ldstr += "so directories that haven't changed can be skipped"
+    parser.add_argument('--ledger', type=str,
+                        help=ldstr,
+                        default=None)
+
+    lrstr = "Hours after which to resync a directory even if it hasn't "
+    lrstr += "changed (0 is never)"
+    parser.add_argument('--ledgerRecheck', type=float,
+                        help=lrstr,
+                        default=24.)
+
+    qastr = "Hours since anything in an old directory was last modified "
+    qastr += "before it's considered done and can be verified/cleaned "
+    qastr += "(0 doesn't check). Yvette has to stat every file in every old "
+    qastr += "directory to know, so this is off by default"
+    parser.add_argument('--quietAge', type=float,
+                        help=qastr,
+                        default=0.)
+
+    spstr = "Seconds to keep each idle shared SSH connection for rsync open"
+    parser.add_argument('--sshPersist', type=int,
+                        help=spstr,
+                        default=600)
+
     return parser
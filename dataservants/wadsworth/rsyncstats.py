@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Parse rsync --stats output, and turn it into transfer metrics.
+
+This is the grown-up version of the parser that was prototyped in
+``toymodels/rsyncTesting.py``.  It understands both the rsync >= 3.1 output
+(with thousands separators and the per-type breakdowns in parentheses)
+and the older plain style, and also picks up the two summary lines at the
+very end::
+
+    sent 1,234 bytes  received 5,678,901 bytes  1,234,567.89 bytes/sec
+    total size is 12,345,678  speedup is 2.17
+
+Each finished transfer ends up as a ``TransferStats`` point so slow links
+and badly tuned transfers can be found from the data later.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import re
+import datetime as dt
+
+from ligmos import utils
+
+
+# rsync --stats label: our key.  The older rsyncs say "Number of files
+#   transferred" rather than "Number of regular files transferred"
+STATSKEYS = {'Number of files': 'nfiles',
+             'Number of created files': 'ncreated',
+             'Number of deleted files': 'ndeleted',
+             'Number of regular files transferred': 'nregxfered',
+             'Number of files transferred': 'nregxfered',
+             'Total file size': 'totsize',
+             'Total transferred file size': 'totxfersize',
+             'Literal data': 'literaldata',
+             'Matched data': 'matchdata',
+             'File list size': 'flistsize',
+             'File list generation time': 'flisttime',
+             'File list transfer time': 'flistxfertime',
+             'Total bytes sent': 'totsent',
+             'Total bytes received': 'totrecv'}
+
+# The breakdowns in parentheses, like "(reg: 2, dir: 1)"
+BREAKDOWNKEYS = {'reg': 'reg', 'dir': 'dir', 'link': 'link',
+                 'dev': 'dev', 'special': 'special'}
+
+summarySent = re.compile(r"sent ([\d,.]+) bytes\s+received ([\d,.]+) bytes"
+                         r"\s+([\d,.]+) bytes/sec")
+summarySize = re.compile(r"total size is ([\d,.]+)\s+speedup is ([\d,.]+)")
+
+
+def toNumber(val):
+    """'1,234,567 bytes' or '0.001 seconds' -> float, or None if it isn't.
+    """
+    try:
+        return float(val.split()[0].replace(",", ""))
+    except (IndexError, ValueError):
+        return None
+
+
+def parseRsyncStats(outbuf):
+    """Parse the output of rsync --stats.
+
+    Args:
+        outbuf (:obj:`str` or :obj:`bytes`)
+            rsync's stdout.
+
+    Returns:
+        stats (:obj:`dict`)
+            Flat dict of the stats that were found, all as floats, keyed
+            by the values of :data:`STATSKEYS` plus 'rate' (bytes/s) and
+            'speedup' from the summary lines.  Breakdowns are stored as
+            e.g. 'nfiles_reg' and 'nfiles_dir'.
+    """
+    if isinstance(outbuf, bytes):
+        outbuf = outbuf.decode("utf-8", errors='replace')
+
+    stats = {}
+    if outbuf is None:
+        return stats
+
+    for line in outbuf.splitlines():
+        line = line.strip()
+        if ":" in line:
+            label, val = line.split(":", 1)
+            key = STATSKEYS.get(label.strip(), None)
+            if key is not None:
+                # Number of files: 3 (reg: 2, dir: 1)
+                if "(" in val:
+                    val, breakdown = val.split("(", 1)
+                    # Careful, the numbers have commas in them too
+                    for part in re.split(r",\s+", breakdown.rstrip(")")):
+                        if ":" in part:
+                            bkey, bval = part.split(":", 1)
+                            bkey = BREAKDOWNKEYS.get(bkey.strip(), None)
+                            bval = toNumber(bval)
+                            if bkey is not None and bval is not None:
+                                stats.update({"%s_%s" % (key, bkey): bval})
+                num = toNumber(val)
+                if num is not None:
+                    stats.update({key: num})
+                continue
+
+        match = summarySent.match(line)
+        if match is not None:
+            stats.update({'rate': toNumber(match.group(3))})
+            continue
+
+        match = summarySize.match(line)
+        if match is not None:
+            stats.update({'speedup': toNumber(match.group(2))})
+
+    return stats
+
+
+def transferMetrics(stats, elapsed):
+    """Work out throughput and efficiency numbers for one transfer.
+
+    Args:
+        stats (:obj:`dict`)
+            Parsed stats, from :func:`parseRsyncStats`.
+        elapsed (:obj:`float`)
+            Wall clock time (seconds) that the whole rsync took.
+
+    Returns:
+        metrics (:obj:`dict`)
+            Whatever could be calculated of:
+            wireRate (bytes/s actually received over the network),
+            dataRate (bytes/s of file data brought up to date),
+            literalFrac (fraction of the file data that had to be sent,
+            rather than reused from what was already here),
+            deltaSpeedup (file data / literal data, i.e. what the rsync
+            algorithm saved), and speedup (rsync's own: total size /
+            bytes on the wire).
+    """
+    metrics = {}
+    wire = stats.get('totsent', 0.) + stats.get('totrecv', 0.)
+    literal = stats.get('literaldata', None)
+    matched = stats.get('matchdata', None)
+
+    if elapsed is not None and elapsed > 0:
+        metrics.update({'elapsed': elapsed})
+        if 'totrecv' in stats:
+            metrics.update({'wireRate': stats['totrecv']/elapsed})
+        if 'totxfersize' in stats:
+            metrics.update({'dataRate': stats['totxfersize']/elapsed})
+
+    if literal is not None and matched is not None and \
+       literal + matched > 0:
+        metrics.update({'literalFrac': literal/(literal + matched)})
+        if literal > 0:
+            metrics.update({'deltaSpeedup': (literal + matched)/literal})
+
+    if 'speedup' in stats:
+        metrics.update({'speedup': stats['speedup']})
+    elif 'totsize' in stats and wire > 0:
+        metrics.update({'speedup': stats['totsize']/wire})
+
+    return metrics
+
+
+def packetTransfer(job, iobj, db=None):
+    """Turn a finished transfer into a TransferStats InfluxDB packet.
+
+    Args:
+        job (:class:`dataservants.wadsworth.transfer.RsyncJob`)
+            The finished rsync job.
+        iobj (:class:`dataservants.utils.common.InstrumentHost`)
+            Class containing instrument machine target information.
+        db (:class:`dataservants.utils.database.influxobj`, optional)
+            Database object in which to write the results. Defaults to
+            None, in which case the packet is constructed but not written.
+
+    Returns:
+        packet (:obj:`list` of :obj:`dicts`)
+            InfluxDB style packet.
+
+            .. code-block:: python
+
+                packet = [{'measurement': 'TransferStats',
+                           'tags': {'host': 'rc2',
+                                    'srcdir': '/mnt/lemi/lois/20180306a'},
+                           'time': datetime.datetime(2018, 3, 6,
+                                                     21, 38, 38, 581119),
+                           'fields': {'returncode': 0,
+                                      'totrecv': 5678901.0,
+                                      'wireRate': 1234567.89,
+                                      'deltaSpeedup': 3.2,
+                                      ...}}]
+    """
+    if job.result is None:
+        return []
+
+    code, ans = job.result
+    fields = {'returncode': code}
+    if code == 0 and isinstance(ans, dict):
+        fields.update(ans)
+        elapsed = None
+        if job.started is not None and job.finished is not None:
+            elapsed = job.finished - job.started
+        fields.update(transferMetrics(ans, elapsed))
+    else:
+        fields.update({'error': str(ans)})
+
+    if job.finished is not None:
+        ts = dt.datetime.utcfromtimestamp(job.finished)
+    else:
+        ts = dt.datetime.utcnow()
+
+    meas = ['TransferStats']
+    tags = {'host': iobj.host, 'srcdir': job.src}
+    packet = utils.packetizer.makeInfluxPacket(meas=meas,
+                                               ts=ts,
+                                               tags=tags,
+                                               fields=fields)
+
+    if db is not None:
+        # Actually commit the packet. singleCommit opens it,
+        #   writes the packet, and then optionally closes it.
+        db.singleCommit(packet, table=iobj.tablename, close=True)
+
+    return packet
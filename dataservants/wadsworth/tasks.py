@@ -20,9 +20,13 @@ import datetime as dt
 
 from ligmos import utils
 from .. import yvette
+from . import ledger
+from . import throttle
+from . import rsyncstats
+from . import transfer
 
 
-def buttleData(eSSH, baseYcmd, args, iobj):
+def buttleData(eSSH, baseYcmd, args, iobj, db=None):
     """
     """
     # For debugging alarms
@@ -52,13 +56,75 @@ def buttleData(eSSH, baseYcmd, args, iobj):
     # Actually get the dir list on Yvette's machine
     ans, _ = utils.common.instAction(getNew)
 
-    # rsync each directory, one by one so we can gather the stats
+    # If we're keeping a ledger, Yvette also sent along fingerprints of the
+    #   directories so we can skip any that haven't changed since the last
+    #   time they were successfully synced
+    if args.ledger is not None:
+        tledger = ledger.TransferLedger(args.ledger,
+                                        recheck=args.ledgerRecheck)
+        fprints = ans['DirsNew'][2] if len(ans['DirsNew']) > 2 else {}
+    else:
+        tledger = None
+        fprints = {}
+
+    todo = []
     for each in ans['DirsNew'][1]:
-        # Now to start the checking process, multi-stage
-        print("--> rsyncing remote %s:%s to local %s" % (iobj.host,
-                                                         each, iobj.destdir))
-
-        rsyncsrc = "%s@%s:%s" % (iobj.user, iobj.host, each)
-        print(rsyncsrc)
-        ret = utils.rsyncer.subpRsync(rsyncsrc, iobj.destdir, timeout=0)
-        print(ret)
+        if tledger is not None and \
+           tledger.unchanged(iobj.host, each, fprints.get(each, None)):
+            print("--> %s:%s is unchanged; skipping" % (iobj.host, each))
+        else:
+            todo.append(each)
+
+    if todo == []:
+        print("--> Nothing to buttle!")
+        if tledger is not None:
+            tledger.close()
+        return
+
+    # rsync all the directories at once, or at least as many at once as
+    #   we're allowed; see transfer.TransferEngine for the details
+    engine = transfer.TransferEngine(maxperhost=args.rsyncPerHost,
+                                     persist=args.sshPersist,
+                                     debug=args.debug)
+    port = getattr(iobj, 'port', 22)
+
+    # Go only as fast as the instrument host can take right now
+    maxrsyncs, bwlimit = throttle.checkHost(eSSH, baseYcmd, iobj, args)
+    engine.setHostLimits(iobj.user, iobj.host, port=port,
+                         maxrsyncs=maxrsyncs, bwlimit=bwlimit)
+    try:
+        for each in todo:
+            engine.submit(iobj.user, iobj.host, each, iobj.destdir,
+                          port=port, timeout=args.rsyncTimeout)
+
+        # Keep an eye on the host while things are running, and adjust
+        #   the limits for any rsyncs that haven't started yet
+        waittime = args.throttleInterval if args.throttleInterval > 0 \
+            else None
+        results = engine.wait(timeout=waittime)
+        while results is None:
+            maxrsyncs, bwlimit = throttle.checkHost(eSSH, baseYcmd, iobj,
+                                                    args)
+            engine.setHostLimits(iobj.user, iobj.host, port=port,
+                                 maxrsyncs=maxrsyncs, bwlimit=bwlimit)
+            results = engine.wait(timeout=waittime)
+
+        for job, ret in results:
+            if job.finished is not None:
+                print("--> %s finished in %.1f s" %
+                      (job.name, job.finished - job.started))
+            print(job.name, ret)
+            rsyncstats.packetTransfer(job, iobj, db=db)
+            if tledger is not None and ret is not None:
+                tledger.record(iobj.host, job.src, job.dest,
+                               fprints.get(job.src, None), ret,
+                               when=job.finished)
+    finally:
+        # If we got here because of an alarm or something, make sure
+        #   there aren't any rsyncs left running in the background
+        engine.stop()
+        if tledger is not None:
+            tledger.close()
+
+    endt = dt.datetime.utcnow()
+    print("--> Buttling took %.1f s" % ((endt - startt).total_seconds()))
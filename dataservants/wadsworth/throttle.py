@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Slow down (or speed up) data transfers based on how busy the host is.
+
+A full speed rsync from an instrument host that's in the middle of taking
+data can get in the way of the data taking, which is the whole reason
+buttling used to only happen in the morning.  Instead, before and during
+the transfers Yvette is asked for the host's load average and free space
+(one :func:`dataservants.yvette.remote.actionBatch` round trip), and the
+number of simultaneous rsyncs and their ``--bwlimit`` are scaled between
+a floor and the instrument's ceilings:
+
+* At or below a load of ``loadlow``, transfers go as fast as the ceilings
+  allow.  At or above ``loadhigh`` they drop to a single rsync at
+  ``minfrac`` of the bandwidth ceiling, and in between it's linear.
+* If the host's disk is nearly full (``percentfree`` below ``urgentfree``)
+  the ceilings are used no matter the load, since a full disk stops
+  the data taking outright which is way worse than a slow one.
+* If Yvette can't be reached, the floor is used just to be safe.
+
+The ceilings and thresholds come from the Wadsworth command line, but any
+of them can be set per instrument in its configuration section too, using
+the same names as the keys in :func:`hostCeilings`.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+from .. import yvette
+
+
+def hostCeilings(iobj, args):
+    """Get the throttling limits for an instrument.
+
+    Args:
+        iobj (:class:`dataservants.utils.common.InstrumentHost`)
+            Class containing instrument machine target information.
+        args (:class:`argparse.Namespace`)
+            Wadsworth's parsed arguments, for the defaults.
+
+    Returns:
+        ceilings (:obj:`dict`)
+            maxrsyncs (most rsyncs at once), bwlimit (total KiB/s across
+            all of them, 0 for no limit), loadlow, loadhigh, urgentfree
+            (fraction of the disk free) and minfrac (fraction of bwlimit
+            to still use when the load is high).
+    """
+    defaults = {'maxrsyncs': args.rsyncPerHost,
+                'bwlimit': args.rsyncBWLimit,
+                'loadlow': args.loadLow,
+                'loadhigh': args.loadHigh,
+                'urgentfree': args.urgentFree,
+                'minfrac': args.minBWFrac}
+
+    ceilings = {}
+    for key in defaults:
+        val = getattr(iobj, key, None)
+        try:
+            val = float(val)
+        except (TypeError, ValueError):
+            val = float(defaults[key])
+        ceilings.update({key: val})
+
+    return ceilings
+
+
+def throttleFactor(load, percentfree, ceilings):
+    """How far (0 - 1) between the floor and the ceilings to run at.
+
+    Args:
+        load (:obj:`float`)
+            Host's 1 minute load average, or None if unknown.
+        percentfree (:obj:`float`)
+            Fraction of the host's disk that's free, or None if unknown.
+        ceilings (:obj:`dict`)
+            Limits from :func:`hostCeilings`.
+
+    Returns:
+        factor (:obj:`float`)
+            1 is full speed, 0 is as slow as it gets.
+    """
+    if percentfree is not None and percentfree < ceilings['urgentfree']:
+        return 1.
+    if load is None:
+        return 0.
+
+    loadlow, loadhigh = ceilings['loadlow'], ceilings['loadhigh']
+    if load <= loadlow:
+        return 1.
+    elif load >= loadhigh:
+        return 0.
+    else:
+        return (loadhigh - load)/(loadhigh - loadlow)
+
+
+def throttleSettings(factor, ceilings):
+    """Turn a throttle factor into the actual rsync settings.
+
+    Returns:
+        maxrsyncs (:obj:`int`)
+            Most rsyncs to run at once.
+        bwlimit (:obj:`int`)
+            --bwlimit (KiB/s) for each rsync, 0 for no limit.
+    """
+    maxrsyncs = max(1, int(round(factor*ceilings['maxrsyncs'])))
+
+    if ceilings['bwlimit'] > 0:
+        # The total is split up between the rsyncs, so it's the total
+        #   that gets throttled no matter how many of them there are
+        frac = ceilings['minfrac'] + factor*(1. - ceilings['minfrac'])
+        bwlimit = max(1, int(ceilings['bwlimit']*frac/maxrsyncs))
+    else:
+        bwlimit = 0
+
+    return maxrsyncs, bwlimit
+
+
+def checkHost(eSSH, baseYcmd, iobj, args, db=None):
+    """Ask Yvette how busy the host is, and decide how fast to go.
+
+    Args:
+        eSSH (:class:`dataservants.utils.ssh.SSHHandler`)
+            Class describing parameters needed to open SSH connection to
+            instantiated class's host.
+        baseYcmd (:obj:`str`)
+            String describing how to properly start Yvette on the target.
+        iobj (:class:`dataservants.utils.common.InstrumentHost`)
+            Class containing instrument machine target information.
+        args (:class:`argparse.Namespace`)
+            Wadsworth's parsed arguments.
+        db (:class:`dataservants.utils.database.influxobj`, optional)
+            Database object in which to also write the host stats.
+            Defaults to None.
+
+    Returns:
+        maxrsyncs (:obj:`int`)
+            Most rsyncs to run at once.
+        bwlimit (:obj:`int`)
+            --bwlimit (KiB/s) for each rsync, 0 for no limit.
+    """
+    ceilings = hostCeilings(iobj, args)
+
+    try:
+        res = yvette.remote.actionBatch(eSSH, baseYcmd, iobj,
+                                        actions=['freespace', 'cpumem'],
+                                        db=db, agent=args.agent,
+                                        debug=args.debug)
+    except Exception as err:
+        print("--> Couldn't check how busy %s is! %s" % (iobj.host,
+                                                          str(err)))
+        res = {}
+
+    # Both packets are lists of (at most) one point
+    load, percentfree = None, None
+    if res.get('cpumem', []) != []:
+        load = res['cpumem'][0]['fields'].get('sys1MinLoad', None)
+    if res.get('freespace', []) != []:
+        percentfree = res['freespace'][0]['fields'].get('percentfree', None)
+
+    factor = throttleFactor(load, percentfree, ceilings)
+    maxrsyncs, bwlimit = throttleSettings(factor, ceilings)
+
+    print("--> %s load: %s, free: %s; rsyncs: %d, bwlimit: %s" %
+          (iobj.host, load, percentfree, maxrsyncs,
+           "%d KiB/s" % (bwlimit) if bwlimit > 0 else "none"))
+
+    return maxrsyncs, bwlimit
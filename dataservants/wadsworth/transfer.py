@@ -0,0 +1,542 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Run a bunch of rsyncs at once, without swamping anything.
+
+:func:`dataservants.wadsworth.tasks.buttleData` used to rsync each new
+directory one after another, each with its own brand new SSH connection.
+This runs them concurrently instead, with two limits:
+
+* At most ``maxperhost`` at once from any single instrument host, so the
+  instrument machine doesn't get bogged down while it's taking data.
+* At most ``maxuplink`` at once in total, across every host *and* every
+  Wadsworth host worker process (see :mod:`dataservants.hostpool`), so
+  the site's uplink doesn't get swamped.  Call :func:`setUplinkLimit`
+  before any workers are forked for that to cover all of them.  Each slot
+  is an flock()'d lock file, so a slot held by a worker that gets killed
+  (for running past its deadline, say) is freed right along with it.
+
+All the rsyncs to a host share one SSH connection (an OpenSSH control
+master), so there's only one SSH handshake/login per host rather than
+one per directory.  rsync's progress is read as it goes, rather than
+only finding out how it went at the very end.
+
+The return values are the same as from ``utils.rsyncer.subpRsync``:
+(0, stats dict) if it worked, or (negative code, error string) if not,
+though the stats are parsed by :mod:`dataservants.wadsworth.rsyncstats`.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import os
+import re
+import time
+import fcntl
+import shlex
+import threading
+import subprocess as sub
+
+from ligmos import utils
+
+from . import rsyncstats
+
+
+# Lock file for each uplink slot, set by setUplinkLimit()
+uplinkSlots = []
+
+# rsync --info=progress2 lines look like:
+#       1,234,567  45%   12.34MB/s    0:00:10 (xfr#3, to-chk=5/20)
+progressLine = re.compile(r"^\s*([\d,]+)\s+(\d+)%\s+(\S+/s)\s+"
+                          r"(\d+:\d\d:\d\d)")
+
+
+def setUplinkLimit(nslots, lockdir="/tmp"):
+    """Set how many rsyncs can run at once across the whole site uplink.
+
+    This needs to be called in the parent process before any host worker
+    processes are forked, so they all end up sharing the same limit.
+
+    Args:
+        nslots (:obj:`int`)
+            Maximum number of simultaneous rsyncs. 0 means no limit.
+        lockdir (:obj:`str`, optional)
+            Directory for the slots' lock files. Defaults to "/tmp".
+    """
+    global uplinkSlots
+
+    if nslots > 0:
+        uplinkSlots = ["%s/wadsworth-uplink.%d" % (lockdir, i)
+                       for i in range(nslots)]
+    else:
+        uplinkSlots = []
+
+
+def acquireUplink(halted=None, pollsleep=0.5):
+    """Take a free uplink slot, waiting for one if they're all in use.
+
+    The lock is held by the open file, so once this process and the
+    rsync it hands the fd to (see :meth:`TransferEngine.rsync`) are both
+    gone, even by SIGKILL, the kernel lets go of it and the slot is free.
+
+    Args:
+        halted (:obj:`callable`, optional)
+            Checked while waiting; if it returns True, give up. Defaults
+            to None, meaning wait for as long as it takes.
+        pollsleep (:obj:`float`, optional)
+            Seconds between looks for a free slot. Defaults to 0.5.
+
+    Returns:
+        fd (:obj:`int`)
+            Open (and locked) file descriptor of the slot to hand back to
+            :func:`releaseUplink`, or None if there's no limit or we gave
+            up waiting.
+    """
+    while uplinkSlots != []:
+        for slot in uplinkSlots:
+            fd = os.open(slot, os.O_RDWR | os.O_CREAT, 0o666)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except OSError:
+                # Someone else has this one
+                os.close(fd)
+        if halted is not None and halted() is True:
+            break
+        time.sleep(pollsleep)
+
+    return None
+
+
+def releaseUplink(fd):
+    """Give back a slot from :func:`acquireUplink`.
+    """
+    if fd is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+def controlPath(user, host, port=22):
+    """Where the SSH control master socket for user@host:port lives.
+    """
+    return "/tmp/wadsworth-ssh-%s@%s:%s" % (user, host, port)
+
+
+def sshCommand(user, host, port=22, persist=600):
+    """Build the SSH command (for rsync's -e) that uses the control master.
+
+    Args:
+        user (:obj:`str`)
+            Username.
+        host (:obj:`str`)
+            Hostname.
+        port (:obj:`int`, optional)
+            SSH port. Defaults to 22.
+        persist (:obj:`int`, optional)
+            Seconds to keep the master connection around after the last
+            use of it. Defaults to 600.
+
+    Returns:
+        sshcmd (:obj:`list`)
+            The ssh command and its arguments.
+    """
+    # BatchMode so it fails rather than sitting there waiting for a
+    #   password that's never going to come
+    sshcmd = ['ssh', '-p', str(port),
+              '-o', 'BatchMode=yes',
+              '-o', 'ControlMaster=auto',
+              '-o', 'ControlPath=%s' % (controlPath(user, host, port)),
+              '-o', 'ControlPersist=%d' % (persist)]
+
+    return sshcmd
+
+
+def startMaster(user, host, port=22, persist=600, timeout=60.):
+    """Open the SSH control master for a host, if it's not already open.
+
+    If this fails the rsyncs will still work, since with ControlMaster=auto
+    the first of them will just become the master instead; it's just nicer
+    to not have them all race to do it.
+
+    Returns:
+        status (:obj:`bool`)
+            Whether there's a working master connection.
+    """
+    sshcmd = sshCommand(user, host, port=port, persist=persist)
+    target = "%s@%s" % (user, host)
+    try:
+        # See if there's one already
+        check = sub.run(sshcmd + ['-O', 'check', target], timeout=timeout,
+                        stdout=sub.DEVNULL, stderr=sub.DEVNULL)
+        if check.returncode == 0:
+            return True
+
+        # -f sends it to the background once it's logged in, and -N means
+        #   don't bother running a command there
+        start = sub.run(sshcmd + ['-f', '-N', target], timeout=timeout,
+                        stdout=sub.DEVNULL, stderr=sub.PIPE)
+        if start.returncode != 0:
+            print("--> SSH master to %s failed: %s" %
+                  (target, start.stderr.decode("utf-8").strip()))
+            return False
+    except (sub.TimeoutExpired, FileNotFoundError) as err:
+        print("--> SSH master to %s failed: %s" % (target, str(err)))
+        return False
+
+    return True
+
+
+def stopMaster(user, host, port=22):
+    """Close the SSH control master for a host, if there is one.
+    """
+    sshcmd = sshCommand(user, host, port=port)
+    try:
+        sub.run(sshcmd + ['-O', 'exit', "%s@%s" % (user, host)],
+                timeout=10., stdout=sub.DEVNULL, stderr=sub.DEVNULL)
+    except (sub.TimeoutExpired, FileNotFoundError):
+        pass
+
+
+class RsyncJob(object):
+    """One rsync of a remote directory, and how it's going.
+    """
+    def __init__(self, user, host, src, dest, port=22, timeout=0):
+        self.user = user
+        self.host = host
+        self.port = port
+        self.src = src
+        self.dest = dest
+        self.timeout = timeout
+
+        self.proc = None
+        self.result = None
+        self.started = None
+        self.finished = None
+
+        # Progress, straight from rsync
+        self.bytesdone = 0
+        self.percent = 0
+        self.rate = ''
+        self.eta = ''
+
+    @property
+    def name(self):
+        return "%s@%s:%s" % (self.user, self.host, self.src)
+
+
+class TransferEngine(object):
+    """Run rsync jobs concurrently, limited per host and per uplink.
+
+    Args:
+        maxperhost (:obj:`int`, optional)
+            Most rsyncs to run at once from any one host. Defaults to 2.
+        persist (:obj:`int`, optional)
+            Seconds to keep idle SSH master connections around.
+            Defaults to 600.
+        rsyncargs (:obj:`list`, optional)
+            rsync arguments. Defaults to None, which is the same as
+            ``utils.rsyncer.subpRsync`` plus the progress reporting.
+        progressinterval (:obj:`float`, optional)
+            Seconds between progress messages for each job; 0 to never
+            print them. Defaults to 30.
+        progress (:obj:`callable`, optional)
+            Called with the :class:`RsyncJob` whenever rsync reports
+            progress, instead of printing it. Defaults to None.
+        debug (:obj:`bool`, optional)
+            Print all of rsync's output. Defaults to False.
+    """
+    def __init__(self, maxperhost=2, persist=600, rsyncargs=None,
+                 progressinterval=30., progress=None, debug=False):
+        self.maxperhost = max(1, maxperhost)
+        self.persist = persist
+        self.progressinterval = progressinterval
+        self.progress = progress
+        self.debug = debug
+
+        if rsyncargs is None:
+            # Same as subpRsync's defaults, plus a running total of the
+            #   overall progress rather than a line for every single file
+            rsyncargs = ['-armz', '--stats', '--partial',
+                         '--info=progress2']
+        self.rsyncargs = rsyncargs
+
+        self.jobs = []
+        self.threads = []
+        self.masters = set()
+        self.halt = False
+        self.lock = threading.Lock()
+
+        # Per host limits (see setHostLimits) and how many are running;
+        #   a condition rather than semaphores so the limits can change
+        #   while things are waiting to start
+        self.hostLimits = {}
+        self.hostRunning = {}
+        self.slotsFree = threading.Condition()
+
+    def setHostLimits(self, user, host, port=22, maxrsyncs=None,
+                      bwlimit=None):
+        """Change the limits for one host, for rsyncs that haven't started.
+
+        Anything already running just keeps going as it was.
+
+        Args:
+            maxrsyncs (:obj:`int`, optional)
+                Most rsyncs to run at once from this host. Defaults to None,
+                which leaves it as it was (or maxperhost, at first).
+            bwlimit (:obj:`int`, optional)
+                rsync --bwlimit (KiB/s) to give each new rsync from this
+                host; 0 means no limit. Defaults to None, which leaves it
+                as it was (or no limit, at first).
+        """
+        key = (user, host, port)
+        with self.slotsFree:
+            limits = self.hostLimits.setdefault(key, [self.maxperhost, 0])
+            if maxrsyncs is not None:
+                limits[0] = max(1, maxrsyncs)
+            if bwlimit is not None:
+                limits[1] = max(0, bwlimit)
+            self.slotsFree.notify_all()
+
+    def submit(self, user, host, src, dest, port=22, timeout=0):
+        """Queue up an rsync of src on user@host into dest; it starts ASAP.
+
+        Args:
+            timeout (:obj:`float`, optional)
+                Seconds the rsync is allowed to run (once it's actually
+                started); 0 for forever. Defaults to 0.
+
+        Returns:
+            job (:class:`RsyncJob`)
+                The job, whose result is filled in when it's done.
+        """
+        job = RsyncJob(user, host, src, dest, port=port, timeout=timeout)
+        with self.slotsFree:
+            self.hostLimits.setdefault((user, host, port),
+                                       [self.maxperhost, 0])
+        with self.lock:
+            self.jobs.append(job)
+
+        thread = threading.Thread(target=self.runJob, args=(job,),
+                                  daemon=True)
+        self.threads.append(thread)
+        thread.start()
+
+        return job
+
+    def wait(self, timeout=None):
+        """Wait for every submitted job to finish.
+
+        Args:
+            timeout (:obj:`float`, optional)
+                Most seconds to wait. Defaults to None, meaning forever.
+
+        Returns:
+            results (:obj:`list`)
+                (job, result) for each job, in the order they were
+                submitted, or None if they weren't all done in time.
+        """
+        if timeout is not None:
+            deadline = time.monotonic() + timeout
+        for thread in self.threads:
+            # Short joins so signals (like the instLooper alarms) still
+            #   get through to the main thread
+            while thread.is_alive():
+                thread.join(0.5)
+                if timeout is not None and time.monotonic() > deadline:
+                    return None
+
+        return [(job, job.result) for job in self.jobs]
+
+    def stop(self):
+        """Kill anything still running and don't start anything else.
+        """
+        self.halt = True
+        with self.slotsFree:
+            self.slotsFree.notify_all()
+        for job in self.jobs:
+            if job.proc is not None and job.proc.poll() is None:
+                print("--> Stopping rsync of %s" % (job.name))
+                job.proc.kill()
+
+    def runJob(self, job):
+        """Wait for a free slot, and then actually do the rsync.
+        """
+        key = (job.user, job.host, job.port)
+
+        # Always get the host slot first, then the uplink one, so nothing
+        #   hogs an uplink slot while it's stuck waiting on its host
+        with self.slotsFree:
+            while self.halt is False and \
+                    self.hostRunning.get(key, 0) >= self.hostLimits[key][0]:
+                self.slotsFree.wait()
+            self.hostRunning[key] = self.hostRunning.get(key, 0) + 1
+            bwlimit = self.hostLimits[key][1]
+
+        try:
+            slot = acquireUplink(halted=lambda: self.halt)
+            try:
+                if self.halt is True:
+                    job.result = -99, "'%s' stopped before it started" % \
+                        (job.name)
+                    return
+                self.checkMaster(job)
+                job.result = self.rsync(job, bwlimit=bwlimit, slot=slot)
+            finally:
+                releaseUplink(slot)
+        finally:
+            with self.slotsFree:
+                self.hostRunning[key] -= 1
+                self.slotsFree.notify_all()
+
+    def checkMaster(self, job):
+        """Start the SSH master for the job's host, if it's the first one.
+        """
+        key = (job.user, job.host, job.port)
+        with self.lock:
+            if key in self.masters:
+                return
+            self.masters.add(key)
+        startMaster(job.user, job.host, port=job.port, persist=self.persist)
+
+    def closeMasters(self):
+        """Close all of the SSH master connections that were opened.
+        """
+        for user, host, port in self.masters:
+            stopMaster(user, host, port=port)
+        self.masters = set()
+
+    def rsync(self, job, bwlimit=0, slot=None):
+        """Run the rsync, reading the progress as it happens.
+
+        Args:
+            bwlimit (:obj:`int`, optional)
+                rsync --bwlimit in KiB/s; 0 for no limit. Defaults to 0.
+            slot (:obj:`int`, optional)
+                Uplink slot fd from :func:`acquireUplink`, handed down to
+                rsync so the slot stays taken for as long as rsync is
+                running. Defaults to None.
+
+        Returns:
+            result (:obj:`tuple`)
+                (0, stats dict) or (error code, error string), exactly like
+                ``utils.rsyncer.subpRsync``.
+        """
+        sshcmd = sshCommand(job.user, job.host, port=job.port,
+                            persist=self.persist)
+        cmd = ['rsync'] + self.rsyncargs
+        if bwlimit > 0:
+            cmd += ['--bwlimit=%d' % (bwlimit)]
+        cmd += ['-e', " ".join(shlex.quote(x) for x in sshcmd),
+                "%s@%s:%s" % (job.user, job.host, job.src), job.dest]
+
+        print("--> rsyncing remote %s to local %s%s" %
+              (job.name, job.dest,
+               " at %d KiB/s" % (bwlimit) if bwlimit > 0 else ""))
+        job.started = time.time()
+        # rsync gets its own copy of the slot's fd, since flock locks
+        #   belong to the open file and not the process.  If this whole
+        #   process is killed out from under a running rsync (hostpool's
+        #   deadline) the slot then stays taken until rsync is done too,
+        #   instead of letting the next cycle start another one on top
+        if slot is not None:
+            fds = (slot,)
+        else:
+            fds = ()
+        try:
+            job.proc = sub.Popen(cmd, stdout=sub.PIPE, stderr=sub.PIPE,
+                                 pass_fds=fds)
+        except FileNotFoundError as err:
+            return -9999, err.strerror
+
+        # stderr needs to be read at the same time or it could fill up and
+        #   make everything grind to a halt
+        errbuf = []
+        errthread = threading.Thread(target=lambda:
+                                     errbuf.append(job.proc.stderr.read()),
+                                     daemon=True)
+        errthread.start()
+
+        timedout = []
+        if job.timeout > 0:
+            def killer():
+                timedout.append(True)
+                job.proc.kill()
+            timer = threading.Timer(job.timeout, killer)
+            timer.daemon = True
+            timer.start()
+        else:
+            timer = None
+
+        outbuf = self.readOutput(job)
+
+        job.proc.wait()
+        errthread.join()
+        if timer is not None:
+            timer.cancel()
+        job.finished = time.time()
+
+        outstr = b"".join(outbuf).decode("utf-8", errors='replace')
+        errstr = b"".join(errbuf).decode("utf-8", errors='replace')
+        if self.debug is True:
+            print(outstr)
+
+        if timedout != []:
+            return -99, "'%s' timed out" % (" ".join(cmd))
+        elif job.proc.returncode != 0:
+            if self.debug is True:
+                print("Full STDERR: %s" % (errstr))
+            errmsg = utils.rsyncer.parseRsyncErr(errstr)
+            if errmsg is None:
+                errmsg = "'%s' returned code %d" % (" ".join(cmd),
+                                                    job.proc.returncode)
+            return -999, errmsg
+
+        return 0, rsyncstats.parseRsyncStats(outstr)
+
+    def readOutput(self, job):
+        """Read rsync's stdout as it comes, picking out the progress lines.
+
+        Returns:
+            outbuf (:obj:`list`)
+                All the output that wasn't progress, as bytes.
+        """
+        outbuf = []
+        partial = b''
+        lastprint = 0.
+        fd = job.proc.stdout.fileno()
+        while True:
+            chunk = os.read(fd, 65536)
+            if chunk == b'':
+                break
+            # Progress lines end in \r so they overwrite each other on a
+            #   terminal; everything else ends in \n
+            lines = re.split(b"[\r\n]", partial + chunk)
+            partial = lines.pop()
+            for line in lines:
+                match = progressLine.match(line.decode("utf-8",
+                                                       errors='replace'))
+                if match is None:
+                    outbuf.append(line + b"\n")
+                    continue
+
+                job.bytesdone = int(match.group(1).replace(",", ""))
+                job.percent = int(match.group(2))
+                job.rate = match.group(3)
+                job.eta = match.group(4)
+                if self.progress is not None:
+                    self.progress(job)
+                elif self.progressinterval > 0 and \
+                        time.time() - lastprint >= self.progressinterval:
+                    print("--> %s: %d bytes, %d%% at %s (%s left)" %
+                          (job.name, job.bytesdone, job.percent, job.rate,
+                           job.eta))
+                    lastprint = time.time()
+        outbuf.append(partial)
+
+        return outbuf
@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Payload formats for packets sent from Abu to Iago over the broker.
+
+XML is the default, and is what everything has always understood.  The
+alternative is InfluxDB line protocol, which carries typed fields and the
+timestamp straight through so Iago can write the points without any
+XML parsing (or schema fetching) at all.  Messages in line protocol are
+marked with a STOMP ``content-type`` header of :data:`LINECONTENTTYPE`;
+anything without that header is assumed to be XML, like always.
+
+When going to line protocol, the ``influx_ts_ms`` or ``influx_ts_s``
+values that the Abu parsers add become the point's timestamp and datetimes
+become ISO 8601 strings.  Otherwise every value keeps the type the parser
+gave it (ints as ints, floats as floats, and strings as strings, even if
+they look like numbers) so the fields match what the XML schemas have
+always put in the database.  That means a parser needs to hand over its
+numbers as actual numbers, just like it should for the XML.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import math
+import numbers
+import datetime as dt
+
+import xmltodict as xmld
+
+
+LINECONTENTTYPE = "application/x-influx-line"
+
+FORMATS = ['xml', 'line']
+
+
+def escapeKey(key, extra=''):
+    """Escape a measurement name or field key for line protocol.
+    """
+    key = str(key).replace("\\", "\\\\")
+    for char in ", =" if extra == '' else extra:
+        key = key.replace(char, "\\" + char)
+
+    return key
+
+
+def formatValue(val):
+    """Turn a field value into its line protocol form, or None to skip it.
+    """
+    if val is None:
+        return None
+    elif isinstance(val, bool):
+        return "true" if val is True else "false"
+    elif isinstance(val, numbers.Integral):
+        return "%di" % (val)
+    elif isinstance(val, numbers.Real):
+        if math.isfinite(val) is False:
+            return None
+        return repr(float(val))
+    elif isinstance(val, (dt.datetime, dt.date)):
+        val = val.isoformat()
+    else:
+        val = str(val)
+
+    return '"%s"' % (val.replace("\\", "\\\\").replace('"', '\\"'))
+
+
+def flattenFields(fields, prefix=''):
+    """Flatten any nested dicts, joining their keys with '_'.
+    """
+    flat = {}
+    for key in fields:
+        fkey = "%s_%s" % (prefix, key) if prefix != '' else key
+        if isinstance(fields[key], dict):
+            flat.update(flattenFields(fields[key], prefix=fkey))
+        else:
+            flat.update({fkey: fields[key]})
+
+    return flat
+
+
+def formatLine(meas, fields, ts=None):
+    """Make a single line protocol line.
+
+    Args:
+        meas (:obj:`str`)
+            Measurement name.
+        fields (:obj:`dict`)
+            Flat dict of field names and values.
+        ts (:obj:`int`, optional)
+            Timestamp in integer nanoseconds. Defaults to None, which
+            leaves it up to the database.
+
+    Returns:
+        line (:obj:`str`)
+            The line, or None if there weren't any usable fields.
+    """
+    fstrs = []
+    for key in fields:
+        fval = formatValue(fields[key])
+        if fval is not None:
+            fstrs.append("%s=%s" % (escapeKey(key), fval))
+    if fstrs == []:
+        return None
+
+    line = "%s %s" % (escapeKey(meas, extra=", "), ",".join(fstrs))
+    if ts is not None:
+        line += " %d" % (ts)
+
+    return line
+
+
+def toLineProtocol(root):
+    """Turn an Abu packet dict into line protocol.
+
+    Args:
+        root (:obj:`dict`)
+            {measurement: fields} for each point, which is exactly what
+            would otherwise be turned into XML.
+
+    Returns:
+        lines (:obj:`str`)
+            One line protocol line for each measurement that has fields.
+    """
+    lines = []
+    for meas in root:
+        fields = flattenFields(root[meas] or {})
+
+        ts = None
+        if 'influx_ts_ms' in fields:
+            ts = int(fields.pop('influx_ts_ms'))*1000000
+            fields.pop('influx_ts_s', None)
+        elif 'influx_ts_s' in fields:
+            ts = int(fields.pop('influx_ts_s'))*1000000000
+
+        line = formatLine(meas, fields, ts=ts)
+        if line is not None:
+            lines.append(line)
+
+    return "\n".join(lines)
+
+
+def encodePacket(root, wireformat='xml'):
+    """Turn an Abu packet dict into the requested payload format.
+
+    Args:
+        root (:obj:`dict`)
+            {measurement: fields}, as built by the Abu parsers.
+        wireformat (:obj:`str`, optional)
+            Either 'xml' or 'line'. Defaults to 'xml'.
+
+    Returns:
+        packet (:obj:`str`)
+            The payload, ready to publish.
+    """
+    if wireformat == 'line':
+        return toLineProtocol(root)
+    else:
+        return xmld.unparse(root, pretty=True)
+
+
+def splitUnescaped(text, sep, maxsplit=-1):
+    """Split on sep, ignoring escaped ones and ones inside double quotes.
+    """
+    parts = []
+    cur = []
+    inquote = False
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if char == "\\" and i + 1 < len(text):
+            cur.append(text[i:i + 2])
+            i += 2
+            continue
+        if char == '"':
+            inquote = not inquote
+        if char == sep and inquote is False and \
+           (maxsplit < 0 or len(parts) < maxsplit):
+            parts.append("".join(cur))
+            cur = []
+        else:
+            cur.append(char)
+        i += 1
+    parts.append("".join(cur))
+
+    return parts
+
+
+def unescape(text):
+    """Remove line protocol backslash escapes.
+    """
+    out = []
+    i = 0
+    while i < len(text):
+        if text[i] == "\\" and i + 1 < len(text):
+            out.append(text[i + 1])
+            i += 2
+        else:
+            out.append(text[i])
+            i += 1
+
+    return "".join(out)
+
+
+def parseValue(val):
+    """Turn a line protocol field value back into a python value.
+    """
+    if val.startswith('"'):
+        return unescape(val[1:-1])
+    elif val in ['t', 'T', 'true', 'True', 'TRUE']:
+        return True
+    elif val in ['f', 'F', 'false', 'False', 'FALSE']:
+        return False
+    elif val.endswith('i'):
+        return int(val[:-1])
+    else:
+        return float(val)
+
+
+def fromLineProtocol(payload):
+    """Turn line protocol back into InfluxDB points.
+
+    Args:
+        payload (:obj:`str` or :obj:`bytes`)
+            One or more line protocol lines.
+
+    Returns:
+        points (:obj:`list`)
+            Points like from :func:`ligmos.utils.packetizer.makeInfluxPacket`
+            with any timestamps as integer nanoseconds, so write them
+            with a time precision of 'n'.
+    """
+    if isinstance(payload, bytes):
+        payload = payload.decode('utf-8')
+
+    points = []
+    for line in payload.split("\n"):
+        line = line.strip()
+        if line == '' or line.startswith("#"):
+            continue
+
+        parts = splitUnescaped(line, " ", maxsplit=2)
+        series = splitUnescaped(parts[0], ",")
+        point = {'measurement': unescape(series[0]), 'tags': {},
+                 'fields': {}}
+        for tag in series[1:]:
+            key, val = splitUnescaped(tag, "=", maxsplit=1)
+            point['tags'].update({unescape(key): unescape(val)})
+        for field in splitUnescaped(parts[1], ","):
+            key, val = splitUnescaped(field, "=", maxsplit=1)
+            point['fields'].update({unescape(key): parseValue(val)})
+        if len(parts) > 2 and parts[2] != '':
+            point.update({'time': int(parts[2])})
+        points.append(point)
+
+    return points
@@ -1,4 +1,6 @@
+from . import agent
 from . import filehashing
+from . import merkle
 from . import parseargs
 from . import remote
 from . import tasks
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Yvette as a long-running agent, answering requests over stdin/stdout.
+
+Starting a fresh Python (and importing everything) for every single
+question asked over SSH is most of the cost of a typical Yvette query.
+In agent mode Yvette starts once and then answers a simple line-based
+JSON protocol until stdin is closed, which happens automatically when the
+SSH channel that started her goes away.
+
+Each request is a single line of JSON containing the Yvette arguments
+exactly as they would be given on the command line:
+
+    .. code-block:: python
+
+        {"id": 3, "argv": ["-f", "/mnt/lemi/lois/", "--cpumem"]}
+
+and each answer is a single line of JSON with the same id:
+
+    .. code-block:: python
+
+        {"id": 3, "status": 0, "answer": {"FreeSpace": {...}, ...}}
+
+A non-zero status means the request failed, and "error" will contain
+the reason.  Sending ``{"cmd": "quit"}`` tells the agent to exit.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import sys
+import json
+from contextlib import redirect_stdout
+
+from . import parseargs
+
+
+def handleRequest(req, actions):
+    """Run a single agent request and construct the answer to it.
+
+    Args:
+        req (:obj:`dict`)
+            Decoded request; see the module description for the format.
+        actions (:obj:`function`)
+            Function that takes a parsed :class:`argparse.Namespace` and
+            returns a dict of results, normally
+            :func:`dataservants.yvette.tidy.tidyActions`.
+
+    Returns:
+        ans (:obj:`dict`)
+            Answer to send back to the caller.
+    """
+    ans = {"id": req.get("id", None)}
+
+    argv = req.get("argv", [])
+    if not isinstance(argv, list):
+        ans.update({"status": 2, "error": "argv must be a list"})
+        return ans
+
+    # argparse likes to quit when it's unhappy, so catch that and just
+    #   pass the complaint back instead of killing the whole agent
+    try:
+        _, args = parseargs.setup_arguments(argv=[str(a) for a in argv])
+    except SystemExit:
+        ans.update({"status": 2, "error": "Invalid arguments: %s" % (argv)})
+        return ans
+
+    if args.agent is True:
+        ans.update({"status": 2, "error": "Already running as an agent"})
+        return ans
+
+    try:
+        rjson = actions(args)
+        ans.update({"status": 0, "answer": rjson})
+    except Exception as err:
+        ans.update({"status": 1, "error": str(err)})
+
+    return ans
+
+
+def serveAgent(actions, instream=None, outstream=None):
+    """Answer JSON requests, one per line, until told to quit or EOF.
+
+    Args:
+        actions (:obj:`function`)
+            Function that takes a parsed :class:`argparse.Namespace` and
+            returns a dict of results, normally
+            :func:`dataservants.yvette.tidy.tidyActions`.
+        instream (:obj:`file`, optional)
+            Where to read requests from. Defaults to None, meaning stdin.
+        outstream (:obj:`file`, optional)
+            Where to write answers to. Defaults to None, meaning stdout.
+    """
+    if instream is None:
+        instream = sys.stdin
+    if outstream is None:
+        outstream = sys.stdout
+
+    # Anything printed by the actions themselves would end up mixed into
+    #   the answers, so shove all of that over to stderr instead and keep
+    #   outstream for answers only. remote.YvetteAgent sends stderr to
+    #   /dev/null when it starts us, since nobody would ever read it.
+    with redirect_stdout(sys.stderr):
+        while True:
+            line = instream.readline()
+            if line == '':
+                # EOF, which means whoever started us has gone away
+                break
+
+            line = line.strip()
+            if line == '':
+                continue
+
+            try:
+                req = json.loads(line)
+            except ValueError:
+                req = None
+
+            if not isinstance(req, dict):
+                ans = {"id": None, "status": 2, "error": "Bad request"}
+            elif req.get("cmd", None) == "quit":
+                break
+            else:
+                ans = handleRequest(req, actions)
+
+            outstream.write(json.dumps(ans) + "\n")
+            outstream.flush()
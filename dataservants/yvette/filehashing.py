@@ -15,17 +15,31 @@ Actual hashing functions can be found in :mod:`dataservants.utils.hashes`.
 
 from __future__ import division, print_function, absolute_import
 
+import os
+import re
+import json
+import time
+import random
+import fnmatch
 import datetime as dt
 from os.path import basename, getsize
+from functools import partial
 from collections import OrderedDict
+from concurrent import futures
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 import numpy as np
 
 from ligmos import utils
 
 
+# Yvette's own files that live in the data directories
+BOOKKEEPING = "AListof"
+
+
 def MegaMaid(loc, dirmask="[0-9]{8}.*", filetype="*.fits",
-             youngest=20, oldest=7300, htype='xx64', debug=False):
+             youngest=20, oldest=7300, htype='xx64', workers=1, walkers=1,
+             debug=False):
     """
     Create a whole buttload of data manifests, one by one.
 
@@ -43,6 +57,8 @@ def MegaMaid(loc, dirmask="[0-9]{8}.*", filetype="*.fits",
         hfname = odir + "/AListofHashes." + htype
         hashes = makeManifest(odir, htype=htype,
                               filetype=filetype,
+                              workers=workers,
+                              walkers=walkers,
                               debug=debug)
         if hashes is not None:
             status = utils.hashes.writeHashFile(hashes, hfname,
@@ -58,7 +74,137 @@ def MegaMaid(loc, dirmask="[0-9]{8}.*", filetype="*.fits",
     return results
 
 
-def getListFilesSizes(mdir, filetype="*.fits", debug=False):
+def compileMask(filetype):
+    """Turn a (comma separated) file mask into one compiled matcher.
+
+    Masks like "*.fit,*.fits" used to mean a separate glob of every
+    directory for each pattern; instead they're all translated and joined
+    into a single regular expression so each name is only checked once.
+    Just like glob, a hidden (dot) file only matches a pattern that
+    itself starts with a dot.
+
+    Args:
+        filetype (:obj:`str`)
+            Wildcard string(s) to match files, like "*.fits".
+
+    Returns:
+        matcher (:obj:`function`)
+            The compiled expression's ``match`` method; call it with a
+            file's basename.
+    """
+    pats = []
+    for pat in filetype.split(","):
+        pat = pat.strip()
+        if pat == "":
+            continue
+        regex = fnmatch.translate(pat)
+        if not pat.startswith("."):
+            regex = r"(?!\.)" + regex
+        pats.append(regex)
+
+    return re.compile("|".join(pats)).match
+
+
+def scanOne(sdir, matcher):
+    """Single :func:`os.scandir` pass over just one directory.
+
+    Args:
+        sdir (:obj:`str`)
+            Directory to scan.
+        matcher (:obj:`function`)
+            From :func:`compileMask`.
+
+    Returns:
+        found (:obj:`dict`)
+            :func:`statFingerprint` style [size, mtime in ns, inode] of each
+            matching file, keyed by full path.
+        subdirs (:obj:`list`)
+            Subdirectories still to be scanned.
+    """
+    found = {}
+    subdirs = []
+    try:
+        entries = os.scandir(sdir)
+    except OSError:
+        # Gone or unreadable since we found it
+        return found, subdirs
+
+    with entries:
+        for entry in entries:
+            try:
+                # The type comes straight from the directory listing, so
+                #   only the files that actually match ever get stat'd.
+                #   On POSIX entry.stat() is still one stat() call per
+                #   matching file; it's just not done twice.
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif matcher(entry.name) is not None:
+                    fstats = entry.stat()
+                    found[entry.path] = [fstats.st_size,
+                                         fstats.st_mtime_ns,
+                                         fstats.st_ino]
+            except OSError:
+                # Things like broken links or files deleted under us
+                continue
+
+    return found, subdirs
+
+
+def scanFiles(mdir, filetype="*.fits", walkers=1):
+    """Find and stat every file matching filetype at and underneath mdir.
+
+    This is one pass over the tree with :func:`os.scandir`, rather than a
+    separate glob of every directory for every pattern.  Each matching
+    file still gets one stat() call on POSIX (:meth:`os.DirEntry.stat`
+    isn't free there, only on Windows); what's saved is the repeated
+    directory listings and the stats of files that don't match.  With
+    ``walkers`` > 1 the directories are scanned by a pool of threads,
+    which helps a lot on network mounted disks where each directory
+    listing is a round trip to the server.
+
+    Args:
+        mdir (:obj:`str`)
+            Directory to look for files.
+        filetype (:obj:`str`, optional)
+            Wildcard string(s) to match files; see :func:`compileMask`.
+            Defaults to "*.fits".
+        walkers (:obj:`int`, optional)
+            Number of threads to scan directories with. Defaults to 1.
+
+    Returns:
+        found (:obj:`collections.OrderedDict`)
+            [size in bytes, modification time in ns, inode number] of each
+            matching file, keyed by full path and sorted by it.
+    """
+    matcher = compileMask(filetype)
+    found = {}
+
+    if walkers <= 1:
+        todo = [mdir]
+        while todo != []:
+            dfound, subdirs = scanOne(todo.pop(), matcher)
+            found.update(dfound)
+            todo += subdirs
+    else:
+        # Each directory is its own job, and any subdirectories it turns
+        #   up go right back into the pool so the threads stay busy
+        #   no matter how lopsided the tree is
+        with ThreadPoolExecutor(max_workers=walkers) as pool:
+            running = set([pool.submit(scanOne, mdir, matcher)])
+            while running:
+                done, running = futures.wait(running,
+                                             return_when=futures.
+                                             FIRST_COMPLETED)
+                for fut in done:
+                    dfound, subdirs = fut.result()
+                    found.update(dfound)
+                    for sdir in subdirs:
+                        running.add(pool.submit(scanOne, sdir, matcher))
+
+    return OrderedDict(sorted(found.items()))
+
+
+def getListFilesSizes(mdir, filetype="*.fits", walkers=1, debug=False):
     """Get a list of directories and the size of each file matching filetype.
 
     Args:
@@ -66,6 +212,9 @@ def getListFilesSizes(mdir, filetype="*.fits", debug=False):
             Directory to look for files
         filetype (:obj:`str`, optional)
             Wildcard string to match files. Defaults to "*.fits".
+        walkers (:obj:`int`, optional)
+            Number of threads to look for files with; see :func:`scanFiles`.
+            Defaults to 1.
         debug (:obj:`bool`, optional)
             Bool to trigger additional debugging outputs. Defaults to False.
 
@@ -77,16 +226,17 @@ def getListFilesSizes(mdir, filetype="*.fits", debug=False):
             List of sizes of each file in ``ff``, in GiB. Need to have them
             in GiB to make sum(sizes) not overrun 32-bit limits.
     """
-    # Find all the files matching filetype at and underneath mdir
-    ff = utils.files.recursiveSearcher(mdir, fileext=filetype)
-    if ff == []:
+    # Find (and stat) all the files matching filetype at and underneath mdir
+    found = scanFiles(mdir, filetype=filetype, walkers=walkers)
+    if found == {}:
         # No files found, so return None for both ff and sizes to show this
         return None, None
 
     # Need to convert to be in GiB right off the bat since some of the inst.
-    #   host machines are 32-bit, and os.path.getsize() returns bytes, so
-    #   sum(os.path.getsize()) will overrun the 32-bit val and go negative!
-    sizes = [getsize(e)/1024./1024./1024. for e in ff]
+    #   host machines are 32-bit, and the sizes are in bytes, so
+    #   summing them directly will overrun the 32-bit val and go negative!
+    ff = list(found)
+    sizes = [found[e][0]/1024./1024./1024. for e in ff]
     tsize = np.sum(sizes)
     if debug is True:
         print("Found %d files in %s" % (len(ff), mdir))
@@ -101,9 +251,125 @@ def checkMismatches(flist, htype='xx64', bsize=2**25, debug=False):
     pass
 
 
+def hashOne(fname, htype='xx64', bsize=2**25, debug=False):
+    """Hash a single file and return only the picklable bits of the result.
+
+    Hash objects can't be sent back across a process boundary, so this
+    returns the hex digest along with the bookkeeping needed to report
+    the hashing rate of each worker.
+
+    Args:
+        fname (:obj:`str`)
+            Full path to the file to hash.
+        htype (:obj:`str`, optional)
+            Hashing function type. Defaults to 'xx64'.
+        bsize (:obj:`int`, optional)
+            Hashing function bite size in bytes. Defaults to 2**25.
+        debug (:obj:`bool`, optional)
+            Bool to trigger additional debugging outputs. Defaults to False.
+
+    Returns:
+        result (:obj:`tuple`)
+            (hexdigest, bytes hashed, seconds spent hashing, worker PID).
+            If the file couldn't be read (usually because it was deleted
+            or moved since it was found) the hexdigest is None and the
+            bytes hashed is 0.
+    """
+    t1 = time.time()
+    try:
+        hval = utils.hashes.hashfunc(fname, htype=htype, bsize=bsize,
+                                     debug=debug)
+        hdig, nbytes = hval.hexdigest(), getsize(fname)
+    except (IOError, OSError) as err:
+        # One vanished file shouldn't sink the whole manifest
+        print("Couldn't hash %s: %s" % (fname, str(err)))
+        hdig, nbytes = None, 0
+    t2 = time.time()
+
+    return hdig, nbytes, t2 - t1, os.getpid()
+
+
+def hashFiles(flist, htype='xx64', bsize=2**25, workers=1, debug=False):
+    """Hash a list of files, optionally spread across a pool of processes.
+
+    Hashing is CPU bound once the disks are warmed up, so a pool of
+    processes (rather than threads) is used to get around the GIL. The
+    results are returned in the same order as ``flist`` no matter how
+    the work was spread out, so manifests stay deterministic.
+
+    Args:
+        flist (:obj:`list`)
+            List of full paths to the files to hash.
+        htype (:obj:`str`, optional)
+            Hashing function type. Defaults to 'xx64'.
+        bsize (:obj:`int`, optional)
+            Hashing function bite size in bytes. Defaults to 2**25.
+        workers (:obj:`int`, optional)
+            Number of hashing processes to use. 1 hashes serially in this
+            process, and 0 (or None) uses one per CPU core. Defaults to 1.
+        debug (:obj:`bool`, optional)
+            Bool to trigger additional debugging outputs. Defaults to False.
+
+    Returns:
+        results (:obj:`list` of :obj:`tuple`)
+            One (hexdigest, bytes, seconds, pid) tuple per file in ``flist``,
+            in the same order as ``flist``. See :func:`hashOne`; files that
+            couldn't be read have a hexdigest of None.
+    """
+    if workers is None or workers < 1:
+        workers = os.cpu_count() or 1
+
+    # No sense in spinning up more processes than there are files
+    workers = min(workers, len(flist))
+
+    hasher = partial(hashOne, htype=htype, bsize=bsize, debug=debug)
+    if workers <= 1:
+        results = [hasher(each) for each in flist]
+    else:
+        # map() hands the results back in submission order, which is
+        #   exactly what we want for a deterministic AListofHashes
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(hasher, flist))
+
+    return results
+
+
+def printHashRates(results, telapsed):
+    """Print per-worker and aggregate hashing rates in GiB/sec.
+
+    Args:
+        results (:obj:`list` of :obj:`tuple`)
+            Results from :func:`hashFiles`.
+        telapsed (:obj:`float`)
+            Wall clock time (seconds) that the entire set of hashes took.
+    """
+    gib = 1024.*1024.*1024.
+
+    # Collect (nfiles, bytes, busy seconds) for each worker process
+    perWorker = OrderedDict()
+    for _, nbytes, tspent, pid in results:
+        nf, nb, ts = perWorker.get(pid, (0, 0, 0.))
+        perWorker[pid] = (nf + 1, nb + nbytes, ts + tspent)
+
+    for pid in perWorker:
+        nf, nb, ts = perWorker[pid]
+        if ts > 0:
+            rate = nb/gib/ts
+        else:
+            rate = 0.
+        print("Worker %d: %d files, %.2f GiB, %.5f GiB/sec" %
+              (pid, nf, nb/gib, rate))
+
+    tbytes = sum([each[1] for each in results])
+    if telapsed > 0:
+        print("%.5f GiB/sec aggregate hash rate across %d worker(s)" %
+              (tbytes/gib/telapsed, len(perWorker)))
+
+
 def makeManifest(mdir, htype='xx64', bsize=2**25,
                  filetype="*.fits", forcerecheck=False,
-                 fullpath=True, debug=False):
+                 fullpath=True, workers=1, walkers=1, ff=None,
+                 debug=False):
     """Create a CSV manifest of files,hashval for files matching `filetype`.
 
     Given a directory, recursively look for all files matching filetype. Look
@@ -141,6 +407,15 @@ def makeManifest(mdir, htype='xx64', bsize=2**25,
             Bool to trigger whether the returned dict has keys giving the
             full path of the file that was hashed (True) or whether it is
             basenamed first (False). Defaults to True.
+        workers (:obj:`int`, optional)
+            Number of hashing processes to use; see :func:`hashFiles`.
+            Defaults to 1.
+        walkers (:obj:`int`, optional)
+            Number of threads to look for files with; see :func:`scanFiles`.
+            Defaults to 1.
+        ff (:obj:`list`, optional)
+            Files that were already found, if the caller just looked.
+            Defaults to None, meaning go look for them.
         debug (:obj:`bool`, optional)
             Bool to trigger additional debugging outputs. Defaults to False.
 
@@ -157,20 +432,20 @@ def makeManifest(mdir, htype='xx64', bsize=2**25,
                                   '/mnt/lemi/lois/20140619/lmi.0003.fits':
                                   'bc0c46fff7a10fa5'}
     """
-    ff, sizes = getListFilesSizes(mdir, filetype=filetype, debug=debug)
+    if ff is None:
+        ff, _ = getListFilesSizes(mdir, filetype=filetype, walkers=walkers,
+                                  debug=debug)
 
     # If there's no files, there's nothing to do.
     if ff is None:
         return None
 
-    tsize = np.sum(sizes)
-
     if forcerecheck is False:
         # Check to see if any of the files already have a valid hash
         #   BUT don't verify that has, assume that it's good for now
         hfname = mdir + "/AListofHashes." + htype
         existingHashes = utils.hashes.readHashFile(hfname, basenamed=False)
-        existingFiles = [basename(each) for each in existingHashes]
+        existingFiles = set(basename(each) for each in existingHashes)
         if debug is True:
             print("%d files in hashfile %s" % (len(existingFiles), hfname))
     else:
@@ -194,20 +469,23 @@ def makeManifest(mdir, htype='xx64', bsize=2**25,
             print("Calculating hashes...")
         dt1 = dt.datetime.utcnow()
         # Potential for a big time sink here; consider a signal/alarm?
-        hs = [utils.hashes.hashfunc(e, htype=htype,
-                                    bsize=bsize, debug=debug) for e in unq]
+        hs = hashFiles(unq, htype=htype, bsize=bsize,
+                       workers=workers, debug=debug)
         dt2 = dt.datetime.utcnow()
         telapsed = (dt2 - dt1).total_seconds()
 
-        # For informational purposes{
+        # For informational purposes
         if debug is True:
             print("")
             print("Hashes completed in %.2f seconds" % (telapsed))
-            print("%.5f seconds per file" % (telapsed/len(ff)))
-            print("%.5f GiB/sec hash rate" % (tsize/telapsed))
+            print("%.5f seconds per file" % (telapsed/len(unq)))
+            printHashRates(hs, telapsed)
 
-        # We just care about just the actual hash value, not the hash obj.
-        newKeys = OrderedDict(zip(unq, [h.hexdigest() for h in hs]))
+        # We just care about just the actual hash value, not the stats.
+        #   Anything that couldn't be read is left out, just like it had
+        #   never been found in the first place
+        newKeys = OrderedDict([(f, h[0]) for f, h in zip(unq, hs)
+                               if h[0] is not None])
 
     # The above loop, if there are files to do, will return the dict
     #   of just the new files; need to append them to the old ones too
@@ -225,8 +503,340 @@ def makeManifest(mdir, htype='xx64', bsize=2**25,
     return returnDict
 
 
+def statFingerprint(fname):
+    """Cheap fingerprint of a file that changes whenever its contents should.
+
+    Args:
+        fname (:obj:`str`)
+            Full path to the file.
+
+    Returns:
+        fprint (:obj:`list`)
+            [size in bytes, modification time in ns, inode number]
+    """
+    fstats = os.stat(fname)
+
+    return [fstats.st_size, fstats.st_mtime_ns, fstats.st_ino]
+
+
+def dirFingerprint(ddir, now=None):
+    """Cheap fingerprint of a whole directory tree, for spotting changes.
+
+    Anything that rsync would need to copy (new, grown, rewritten, renamed
+    or deleted files) changes at least one of the first three parts of it,
+    and the last one says whether anything's still being written there.
+    Renames are caught because they update the file's ctime, which counts
+    along with its mtime.  Yvette's own bookkeeping (the ``AListof*``
+    hash, fingerprint and Merkle files) is left out entirely, as are the
+    directories' own mtimes, since writing those files would otherwise
+    make a long finished directory look brand new.
+
+    It's all done in a single :func:`os.scandir` pass over the tree, but
+    that still means one stat() call per file on POSIX systems; it's the
+    separate directory listings that are saved, not the stats.
+
+    Args:
+        ddir (:obj:`str`)
+            Directory to fingerprint.
+        now (:obj:`float`, optional)
+            Current Unix time, for the age. Defaults to None, meaning now.
+
+    Returns:
+        fprint (:obj:`list`)
+            [number of files, total size in bytes, newest modification
+            (or change) time (seconds since the epoch) of any file, seconds
+            since then]. With no files at all, the directory's own mtime
+            stands in for the newest one.
+    """
+    if now is None:
+        now = time.time()
+
+    nfiles, totsize, newest = 0, 0, None
+    todo = [ddir]
+    while todo != []:
+        try:
+            entries = os.scandir(todo.pop())
+        except OSError:
+            # Gone or unreadable since we found it
+            continue
+        with entries:
+            for entry in entries:
+                if entry.name.startswith(BOOKKEEPING):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        todo.append(entry.path)
+                        continue
+                    fstats = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                nfiles += 1
+                totsize += fstats.st_size
+                fchange = max(fstats.st_mtime, fstats.st_ctime)
+                if newest is None or fchange > newest:
+                    newest = fchange
+
+    if newest is None:
+        newest = os.stat(ddir).st_mtime
+
+    return [nfiles, totsize, newest, max(0., now - newest)]
+
+
+def dirFingerprints(dirs, debug=False):
+    """Fingerprint each of a list of directories.
+
+    Args:
+        dirs (:obj:`list`)
+            Directories to fingerprint.
+        debug (:obj:`bool`, optional)
+            Bool to trigger additional debugging outputs. Defaults to False.
+
+    Returns:
+        fprints (:obj:`dict`)
+            :func:`dirFingerprint` of each directory, keyed by directory.
+            Any that couldn't be done at all are left out.
+    """
+    now = time.time()
+    fprints = {}
+    for each in dirs:
+        try:
+            fprints.update({each: dirFingerprint(each, now=now)})
+        except OSError as err:
+            if debug is True:
+                print("Couldn't fingerprint %s: %s" % (each, str(err)))
+
+    return fprints
+
+
+def readFingerprints(ffname, debug=False):
+    """Read the sidecar index of file fingerprints and their last hashes.
+
+    Args:
+        ffname (:obj:`str`)
+            Full path to the fingerprint index file.
+        debug (:obj:`bool`, optional)
+            Bool to trigger additional debugging outputs. Defaults to False.
+
+    Returns:
+        fprints (:obj:`dict`)
+            Dict keyed by file basename, with values of
+            [size, mtime_ns, inode, hash]. Empty if the index doesn't exist
+            or couldn't be understood, which just means everything
+            gets rehashed.
+    """
+    fprints = {}
+    try:
+        with open(ffname, 'r') as f:
+            fprints = json.load(f)
+    except (IOError, OSError, ValueError) as err:
+        if debug is True:
+            print("Fingerprint index %s unusable: %s" % (ffname, str(err)))
+        fprints = {}
+
+    if not isinstance(fprints, dict):
+        fprints = {}
+
+    return fprints
+
+
+def writeFingerprints(fprints, ffname, debug=False):
+    """Write the sidecar index of file fingerprints and their last hashes.
+
+    The index is written to a temporary file first and then moved into
+    place so an interrupted write can't leave a half-written index behind.
+
+    Args:
+        fprints (:obj:`dict`)
+            Dict keyed by file basename; see :func:`readFingerprints`.
+        ffname (:obj:`str`)
+            Full path to the fingerprint index file.
+        debug (:obj:`bool`, optional)
+            Bool to trigger additional debugging outputs. Defaults to False.
+
+    Returns:
+        status (:obj:`bool`)
+            True if the index was written successfully, False otherwise.
+    """
+    tmpname = ffname + ".tmp"
+    try:
+        with open(tmpname, 'w') as f:
+            json.dump(fprints, f)
+        os.replace(tmpname, ffname)
+        status = True
+    except (IOError, OSError) as err:
+        print("Failed to write fingerprint index %s" % (ffname))
+        print(str(err))
+        status = False
+
+    if debug is True and status is True:
+        print("Wrote %d fingerprints to %s" % (len(fprints), ffname))
+
+    return status
+
+
+def fastManifest(mdir, ff, htype='xx64', bsize=2**25, samplefrac=0.,
+                 workers=1, fprints=None, debug=False):
+    """Hash only the files whose stat fingerprint changed since last time.
+
+    Each file's size, mtime (in ns) and inode are compared against the
+    sidecar index ``AListofFingerprints`` with extension ``htype``.  Files
+    whose fingerprint is unchanged reuse the hash stored in the index;
+    everything else is rehashed.  Since an unchanged fingerprint says
+    nothing about bit rot, a random fraction ``samplefrac`` of the
+    unchanged files are rehashed anyways.  The index is rewritten with the
+    current fingerprints before returning.
+
+    Args:
+        mdir (:obj:`str`)
+            Directory containing the files.
+        ff (:obj:`list`)
+            List of files (full paths) to get hashes for.
+        htype (:obj:`str`, optional)
+            Hashing function type. Defaults to 'xx64'.
+        bsize (:obj:`int`, optional)
+            Hashing function bite size in bytes. Defaults to 2**25.
+        samplefrac (:obj:`float`, optional)
+            Fraction (0-1) of unchanged files to rehash as a spot check.
+            Defaults to 0.
+        workers (:obj:`int`, optional)
+            Number of hashing processes to use; see :func:`hashFiles`.
+            Defaults to 1.
+        fprints (:obj:`dict`, optional)
+            Fingerprints of the files in ``ff`` keyed by full path, if they
+            were already stat'd when they were found (see
+            :func:`scanFiles`). Defaults to None, meaning stat them here.
+        debug (:obj:`bool`, optional)
+            Bool to trigger additional debugging outputs. Defaults to False.
+
+    Returns:
+        newKeys (:obj:`dict`)
+            Dictionary of hashes keyed to the basename of each file in ``ff``.
+    """
+    ffname = mdir + "/AListofFingerprints." + htype
+    oldprints = readFingerprints(ffname, debug=debug)
+
+    # Sort the files into ones we can trust and ones we need to rehash.
+    #   Stat *before* hashing so a file that changes while we're hashing
+    #   it will just get rehashed next time around.
+    newprints = {}
+    trusted = {}
+    rehash = []
+    for each in ff:
+        bname = basename(each)
+        try:
+            if fprints is not None and each in fprints:
+                fprint = fprints[each]
+            else:
+                fprint = statFingerprint(each)
+        except OSError:
+            # Let the hashing step deal with (and complain about) it;
+            #   if it's really gone it'll be left out below
+            rehash.append(each)
+            continue
+
+        newprints[bname] = fprint
+        prev = oldprints.get(bname)
+        if prev is not None and len(prev) == 4 and prev[:3] == fprint:
+            trusted[each] = prev[3]
+        else:
+            rehash.append(each)
+
+    # Spot check some of the trusted ones for bit rot
+    if samplefrac > 0 and trusted != {}:
+        nsample = max(1, int(round(len(trusted)*min(samplefrac, 1.))))
+        rehash += random.sample(sorted(trusted), nsample)
+
+    if debug is True:
+        print("%d of %d files unchanged; rehashing %d" % (len(trusted),
+                                                          len(ff),
+                                                          len(rehash)))
+
+    hashed = {}
+    if rehash != []:
+        hs = hashFiles(rehash, htype=htype, bsize=bsize,
+                       workers=workers, debug=debug)
+        hashed = dict(zip(rehash, [h[0] for h in hs]))
+
+    newKeys = OrderedDict()
+    for each in ff:
+        bname = basename(each)
+        if each in hashed:
+            hval = hashed[each]
+        else:
+            hval = trusted[each]
+
+        if hval is None:
+            # Couldn't be hashed, so it's gone as far as we're concerned
+            newprints.pop(bname, None)
+            continue
+        newKeys[bname] = hval
+
+        if bname in newprints:
+            newprints[bname] = newprints[bname][:3] + [hval]
+
+    writeFingerprints(newprints, ffname, debug=debug)
+
+    return newKeys
+
+
+def reconcileManifests(ff, newKeys, existingHashes):
+    """Sort out which files are missing, unhashed, or have the wrong hash.
+
+    Everything is compared by basename so this can be used between machines
+    that differ only in mount points/file structure & layout.  Each of the
+    inputs is only gone through once, and all the lookups are in dicts or
+    sets, so this stays quick even for directories with 100k+ files.
+
+    Args:
+        ff (:obj:`list`)
+            Full paths of the files actually in the directory.
+        newKeys (:obj:`dict`)
+            Freshly calculated hashes, keyed by basename.
+        existingHashes (:obj:`dict`)
+            Hashes from the hash file, keyed by the full path they had when
+            it was written.
+
+    Returns:
+        fpmissing (:obj:`list`)
+            Files in the hash file (as full paths from the hash file) that
+            aren't in the directory anymore.
+        nohash (:obj:`list`)
+            Files in the directory that aren't in the hash file.
+        mismatch (:obj:`list`)
+            Files in both whose hashes don't match.
+    """
+    # Repack the hash file to be relative, but still refer to the original
+    relExisting = {}
+    for fkey, hval in existingHashes.items():
+        relExisting[basename(fkey)] = hval
+
+    inDR = set()
+    nohash = []
+    mismatch = []
+    for tf in ff:
+        testfile = basename(tf)
+        inDR.add(testfile)
+        try:
+            if newKeys[testfile] != relExisting[testfile]:
+                # This means that a file in the directory failed its comparison
+                #   to the value found in the hashfile.
+                #   Store the full path to make retransfters easier!
+                mismatch.append(tf)
+        except KeyError:
+            # This means that a valid file is in the directory but
+            #   it doesn't have a hash in the hashfile
+            nohash.append(tf)
+
+    # Highlight files that were in the hash file but aren't in the directory
+    fpmissing = [fkey for fkey in existingHashes
+                 if basename(fkey) not in inDR]
+
+    return fpmissing, nohash, mismatch
+
+
 def verifyFiles(mdir, htype='xx64', bsize=2**25,
-                filetype="*.fits", debug=False):
+                filetype="*.fits", fast=False, samplefrac=0.,
+                workers=1, walkers=1, debug=False):
     """Verify file hashes against those in a given list.
 
     Given a directory, recursively look for all files matching filetype
@@ -254,6 +864,19 @@ def verifyFiles(mdir, htype='xx64', bsize=2**25,
             33554432 bits (a.k.a. 4 MiB).
         filetype (:obj:`str`)
             Wildcard string to match files. Defaults to "*.fits".
+        fast (:obj:`bool`, optional)
+            Bool to only rehash files whose stat fingerprint changed since
+            the last verification; see :func:`fastManifest`.
+            Defaults to False.
+        samplefrac (:obj:`float`, optional)
+            Fraction of unchanged files to rehash anyways when ``fast``
+            is True. Defaults to 0.
+        workers (:obj:`int`, optional)
+            Number of hashing processes to use; see :func:`hashFiles`.
+            Defaults to 1.
+        walkers (:obj:`int`, optional)
+            Number of threads to look for files with; see :func:`scanFiles`.
+            Defaults to 1.
         debug (:obj:`bool`)
             Bool to trigger additional debugging outputs. Defaults to False.
 
@@ -268,14 +891,18 @@ def verifyFiles(mdir, htype='xx64', bsize=2**25,
     mismatch = []
     nohash = []
 
-    # ff, sizes = getListFilesSizes(mdir, filetype=filetype, debug=debug)
-    ff, _ = getListFilesSizes(mdir, filetype=filetype, debug=debug)
+    # Find the files and stat them all in one go, so the fast verification
+    #   doesn't need to go back and stat them all over again
+    found = scanFiles(mdir, filetype=filetype, walkers=walkers)
 
     # Record the number of files found matching given filetype
-    if ff is None:
+    if found == {}:
         return nfound, fpmissing, nohash, mismatch
     else:
+        ff = list(found)
         nfound = len(ff)
+        if debug is True:
+            print("Found %d files in %s" % (nfound, mdir))
 
     # Read in the existing hash file
     hfname = mdir + "/AListofHashes." + htype
@@ -284,54 +911,31 @@ def verifyFiles(mdir, htype='xx64', bsize=2**25,
     existingHashes = utils.hashes.readHashFile(hfname,
                                                basenamed=False,
                                                debug=debug)
-    existingFiles = [basename(each) for each in existingHashes]
-
     if debug is True:
-        print("%d files in hashfile %s" % (len(existingFiles), hfname))
+        print("%d files in hashfile %s" % (len(existingHashes), hfname))
 
     # Calculate the new hashes by just calling the other hash logic.
     #   Big difference is that the keys are relative to the given dir, not
     #   as a full mounting path. This makes comparisons way easier.
     newKeys = {}
-    newKeys = makeManifest(mdir, htype=htype, bsize=bsize,
-                           filetype=filetype, forcerecheck=True,
-                           fullpath=False, debug=debug)
-
-    # Now compare the new against the old file list. Strip out path info again.
-    inDR = [basename(each) for each in ff]
-
-    # Highlight files that were in the hash file but aren't in the directory
-    #   then get the filename from the hashfile but now is missing
-    missing = list(set(existingFiles) - set(inDR))
-
-    # TODO: Clean this up with a fancy list comprehension
-    for s in missing:
-        for fullpathfile in existingHashes:
-            if s in fullpathfile:
-                fpmissing.append(fullpathfile)
-
-    # Want to verify on basename basis so this can be used between machines
-    #   who differ only in mount points/file structure & layout.
-    #   At this point existingHashes is keyed with full paths, so repack it
-    #   to be relative but still refer to the original.
-
-    #     ff == list of files in directory
-    relExisting = {}
-    for it in existingHashes.items():
-        relExisting.update({basename(it[0]): [it[0], it[1]]})
-
-    for tf in ff:
-        testfile = basename(tf)
-        try:
-            if newKeys[testfile] != relExisting[testfile][1]:
-                # This means that a file in the directory failed its comparison
-                #   to the value found in the hashfile.
-                #   Store the full path to make retransfters easier!
-                mismatch.append(tf)
-        except KeyError:
-            # This means that a valid file is in the directory but
-            #   it doesn't have a hash in the hashfile
-            nohash.append(tf)
+    if fast is True:
+        newKeys = fastManifest(mdir, ff, htype=htype, bsize=bsize,
+                               samplefrac=samplefrac, workers=workers,
+                               fprints=found, debug=debug)
+    else:
+        newKeys = makeManifest(mdir, htype=htype, bsize=bsize,
+                               filetype=filetype, forcerecheck=True,
+                               fullpath=False, workers=workers, ff=ff,
+                               debug=debug)
+
+    # Anything that disappeared while we were hashing is missing, not
+    #   unhashed, so only keep the files that actually got hashed
+    ff = [each for each in ff if basename(each) in newKeys]
+    nfound = len(ff)
+
+    # Now compare the new against the old file list, by basename
+    fpmissing, nohash, mismatch = reconcileManifests(ff, newKeys,
+                                                     existingHashes)
 
     if debug is True:
         print({"NFilesFound": nfound})
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Merkle tree digests of a directory's hash file, for cheap comparisons.
+
+Checking that a directory made it safely to the archive used to mean
+copying the instrument host's whole ``AListofHashes`` file over SFTP and
+comparing it line by line with ours.  Instead, both sides boil their hash
+file down to a tree of digests:
+
+* Each file lands in one of 16**depth buckets, picked by the first
+  ``depth`` hex characters of the SHA1 of its basename (so adding a file
+  only changes the digests on its own path up the tree).
+* A bucket's digest is the SHA1 of its sorted "name hash" lines, and every
+  node above that is the SHA1 of its (up to 16) children's digests.
+
+If the two roots match, the directory is done with one round trip.  If
+they don't, only the children that differ are asked for, level by level,
+until the buckets with differences are found; only the entries in those
+buckets are actually sent over.
+
+Each tree is kept in a sidecar ``AListofMerkle`` (with the extension of
+the hash type) next to the hash file, and is rebuilt whenever the size or
+mtime of the hash file changes.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import os
+import json
+import hashlib
+from os.path import basename
+
+from ligmos import utils
+
+
+# 16**3 = 4096 buckets, so even 100k files is only a couple dozen per bucket
+DEPTH = 3
+
+
+def bucketKey(fname, depth=DEPTH):
+    """Which bucket a file goes in.
+
+    Args:
+        fname (:obj:`str`)
+            File name; only the basename is used.
+        depth (:obj:`int`, optional)
+            Depth of the tree. Defaults to :data:`DEPTH`.
+
+    Returns:
+        key (:obj:`str`)
+            The first ``depth`` hex characters of the SHA1 of the basename.
+    """
+    bname = basename(fname).encode("utf-8")
+
+    return hashlib.sha1(bname).hexdigest()[:depth]
+
+
+def bucketEntries(hashes, depth=DEPTH):
+    """Sort the entries of a hash file into their buckets.
+
+    Args:
+        hashes (:obj:`dict`)
+            Hash values keyed by basename, as read by
+            :func:`ligmos.utils.hashes.readHashFile` with basenamed=True.
+        depth (:obj:`int`, optional)
+            Depth of the tree. Defaults to :data:`DEPTH`.
+
+    Returns:
+        buckets (:obj:`dict`)
+            Dict of {name: hash} dicts, keyed by bucket.
+    """
+    buckets = {}
+    for fname, hval in hashes.items():
+        buckets.setdefault(bucketKey(fname, depth=depth), {})[fname] = hval
+
+    return buckets
+
+
+def nodeDigest(items):
+    """SHA1 of sorted (name, value) pairs, one "name value" line each.
+    """
+    hval = hashlib.sha1()
+    for name, val in sorted(items):
+        hval.update(("%s %s\n" % (name, val)).encode("utf-8"))
+
+    return hval.hexdigest()
+
+
+def buildTree(hashes, depth=DEPTH):
+    """Build the whole tree of digests for a hash file.
+
+    Args:
+        hashes (:obj:`dict`)
+            Hash values keyed by basename.
+        depth (:obj:`int`, optional)
+            Depth of the tree. Defaults to :data:`DEPTH`.
+
+    Returns:
+        tree (:obj:`dict`)
+            Digest of every non-empty node, keyed by its prefix; the root
+            is keyed by "" and the buckets by their full ``depth``
+            character keys.
+    """
+    tree = {}
+    for key, entries in bucketEntries(hashes, depth=depth).items():
+        tree[key] = nodeDigest(entries.items())
+
+    # Work up from the buckets, one level at a time
+    level = list(tree)
+    for _ in range(depth):
+        parents = {}
+        for key in level:
+            parents.setdefault(key[:-1], []).append((key, tree[key]))
+        for key, kids in parents.items():
+            tree[key] = nodeDigest(kids)
+        level = list(parents)
+
+    if "" not in tree:
+        # Empty hash file
+        tree[""] = nodeDigest([])
+
+    return tree
+
+
+def childDigests(tree, key):
+    """Digests of the (non-empty) children of one node.
+
+    Returns:
+        kids (:obj:`dict`)
+            Digests keyed by the childrens' prefixes.
+    """
+    kids = {}
+    for ckey in ["%s%x" % (key, i) for i in range(16)]:
+        if ckey in tree:
+            kids[ckey] = tree[ckey]
+
+    return kids
+
+
+def hashFileStamp(hfname):
+    """[size, mtime in ns] of the hash file, or None if it's not there.
+    """
+    try:
+        hstats = os.stat(hfname)
+    except OSError:
+        return None
+
+    return [hstats.st_size, hstats.st_mtime_ns]
+
+
+def dirTree(mdir, htype='xx64', depth=DEPTH, debug=False):
+    """Get the tree for a directory, from its sidecar if that's up to date.
+
+    Args:
+        mdir (:obj:`str`)
+            Directory containing the hash file.
+        htype (:obj:`str`, optional)
+            Hash type (and file extension) of the hash file.
+            Defaults to 'xx64'.
+        depth (:obj:`int`, optional)
+            Depth of the tree. Defaults to :data:`DEPTH`.
+        debug (:obj:`bool`, optional)
+            Bool to trigger additional debugging outputs. Defaults to False.
+
+    Returns:
+        tree (:obj:`dict`)
+            See :func:`buildTree`.
+        nfiles (:obj:`int`)
+            Number of files in the hash file; 0 if there isn't one.
+    """
+    hfname = mdir + "/AListofHashes." + htype
+    mfname = mdir + "/AListofMerkle." + htype
+    stamp = hashFileStamp(hfname)
+    if stamp is None:
+        return buildTree({}, depth=depth), 0
+
+    try:
+        with open(mfname, 'r') as f:
+            side = json.load(f)
+        if side['hashfile'] == stamp and side['depth'] == depth:
+            return side['nodes'], side['nfiles']
+    except (IOError, OSError, ValueError, KeyError, TypeError) as err:
+        if debug is True:
+            print("Merkle sidecar %s unusable: %s" % (mfname, str(err)))
+
+    hashes = utils.hashes.readHashFile(hfname, basenamed=True, debug=debug)
+    tree = buildTree(hashes, depth=depth)
+
+    # Same trick as the fingerprint index; write it to the side and then
+    #   move it into place. Not being able to write it isn't fatal, it'll
+    #   just get rebuilt next time too.
+    side = {'hashfile': stamp, 'depth': depth, 'nfiles': len(hashes),
+            'nodes': tree}
+    tmpname = mfname + ".tmp"
+    try:
+        with open(tmpname, 'w') as f:
+            json.dump(side, f)
+        os.replace(tmpname, mfname)
+    except (IOError, OSError) as err:
+        print("Failed to write Merkle sidecar %s" % (mfname))
+        print(str(err))
+
+    return tree, len(hashes)
+
+
+def rootSummary(mdir, htype='xx64', depth=DEPTH, debug=False):
+    """What Yvette answers to ``--merkle``.
+
+    The root's children are sent along too, since they're tiny and if the
+    roots don't match they'll be the next thing asked for anyways.
+
+    Returns:
+        summary (:obj:`dict`)
+            {'depth': depth, 'nfiles': number of hashed files,
+            'root': root digest, 'children': :func:`childDigests` of root}
+    """
+    tree, nfiles = dirTree(mdir, htype=htype, depth=depth, debug=debug)
+
+    return {'depth': depth, 'nfiles': nfiles, 'root': tree[""],
+            'children': childDigests(tree, "")}
+
+
+def nodeSummary(mdir, keys, htype='xx64', depth=DEPTH, debug=False):
+    """What Yvette answers to ``--merkleNodes``.
+
+    Args:
+        mdir (:obj:`str`)
+            Directory containing the hash file.
+        keys (:obj:`list`)
+            Prefixes of the nodes being asked about.
+
+    Returns:
+        nodes (:obj:`dict`)
+            For each prefix, either the :func:`childDigests` of that node
+            or, for the buckets at the bottom of the tree, the actual
+            {name: hash} entries in it.
+    """
+    tree, _ = dirTree(mdir, htype=htype, depth=depth, debug=debug)
+
+    nodes = {}
+    buckets = None
+    for key in keys:
+        if len(key) < depth:
+            nodes[key] = childDigests(tree, key)
+        else:
+            # Only read the hash file itself if we actually need to
+            if buckets is None:
+                hfname = mdir + "/AListofHashes." + htype
+                hashes = utils.hashes.readHashFile(hfname, basenamed=True,
+                                                   debug=debug)
+                buckets = bucketEntries(hashes, depth=depth)
+            nodes[key] = buckets.get(key, {})
+
+    return nodes
+
+
+def remoteDifferences(ltree, rsummary, getNodes):
+    """Descend through the parts of a remote tree that don't match ours.
+
+    Only differences that could mean the remote side has something we
+    don't are chased down; extra files on our side don't matter.
+
+    Args:
+        ltree (:obj:`dict`)
+            Our tree, from :func:`dirTree`.
+        rsummary (:obj:`dict`)
+            The remote's :func:`rootSummary`.
+        getNodes (:obj:`function`)
+            Called with a list of prefixes, returns the remote's
+            :func:`nodeSummary` of them (or None if it couldn't).
+
+    Returns:
+        rentries (:obj:`dict`)
+            Remote {name: hash} entries from every bucket that doesn't
+            match ours; empty if the trees match.  None if the remote
+            stopped answering (or its tree changed) partway through.
+    """
+    depth = rsummary['depth']
+    if rsummary['root'] == ltree.get(""):
+        return {}
+
+    kids = rsummary['children']
+    rentries = {}
+    for level in range(1, depth + 1):
+        todo = sorted([key for key in kids if kids[key] != ltree.get(key)])
+        if todo == []:
+            break
+
+        nodes = getNodes(todo)
+        if nodes is None or any(key not in nodes for key in todo):
+            return None
+
+        if level < depth:
+            kids = {}
+            for key in todo:
+                kids.update(nodes.get(key, {}))
+        else:
+            for key in todo:
+                rentries.update(nodes.get(key, {}))
+
+    return rentries
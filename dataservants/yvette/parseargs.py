@@ -13,12 +13,16 @@ from __future__ import division, print_function, absolute_import
 import argparse as argp
 
 
-def setup_arguments(prog=None):
+def setup_arguments(prog=None, argv=None):
     """Setup command line arguments that Yvette will use.
 
     Yvette itself is intended to have minimal processing logic - it'll do
     what it is told/asked and it is up to the (remote) calling function to
     orchestrate the activities appropriately.
+
+    ``argv`` is normally None so the real command line is parsed, but it can
+    be given a list of arguments instead; that's how requests are handled
+    when Yvette is running as an agent (see :mod:`dataservants.yvette.agent`).
     """
     fclass = argp.ArgumentDefaultsHelpFormatter
 
@@ -59,6 +63,26 @@ def setup_arguments(prog=None):
                         help='Type of hash to use for file integrity checks',
                         default="xx64")
 
+    whstr = 'Number of processes to use when hashing (0 uses all CPU cores)'
+    parser.add_argument('--workers', type=int,
+                        help=whstr,
+                        default=1)
+
+    wkstr = 'Number of threads to use when looking for files'
+    parser.add_argument('--walkers', type=int,
+                        help=wkstr,
+                        default=1)
+
+    fvstr = 'Only rehash files whose size/mtime/inode changed when verifying'
+    parser.add_argument('--fastverify', action='store_true',
+                        help=fvstr,
+                        default=False)
+
+    sfstr = 'Fraction of unchanged files to rehash anyways with --fastverify'
+    parser.add_argument('--samplefrac', type=float,
+                        help=sfstr,
+                        default=0.02)
+
     parser.add_argument('--debug', action='store_true',
                         help='Print extra debugging messages while running',
                         default=False)
@@ -76,14 +100,38 @@ def setup_arguments(prog=None):
                         help='Look for new data directories matching regexp',
                         default=False)
 
+    fpstr = 'With --look or --old, also give a (files, bytes, newest mtime, '
+    fpstr += 'seconds since then) fingerprint of each directory found'
+    parser.add_argument('--fingerprint', action='store_true',
+                        help=fpstr,
+                        default=False)
+
     parser.add_argument('-o', '--old', action='store_true',
                         help='Look for data directories older than rangeOld',
                         default=False)
 
+    mkstr = 'Give the Merkle tree root digest of the hash file in dir'
+    parser.add_argument('--merkle', action='store_true',
+                        help=mkstr,
+                        default=False)
+
+    mnstr = 'Comma separated list of Merkle tree nodes (by prefix) to give '
+    mnstr += 'the children or files of'
+    parser.add_argument('--merkleNodes', type=str,
+                        help=mnstr,
+                        default=None)
+
     parser.add_argument('--checkProcess', type=str,
                         help='Return stats for given process name',
                         default=None)
 
+    # A front end to ask for several of the above actions all at once
+    astr = 'Comma separated list of actions to do (any of freespace, '
+    astr += 'cpumem, checkProcess, look, old, fingerprint)'
+    parser.add_argument('--actions', type=str,
+                        help=astr,
+                        default=None)
+
     # The actual actions are defined to be mutually exclusive, meaning
     #   only ONE of them will act per call to Yvette.
     #
@@ -116,13 +164,19 @@ def setup_arguments(prog=None):
                         help=argp.SUPPRESS,
                         default=False)
 
+    # Stay running and answer JSON requests on stdin rather than doing one
+    #   set of actions and quitting; only the remote callers should use this
+    parser.add_argument('--agent', action='store_true',
+                        help=argp.SUPPRESS,
+                        default=False)
+
     # For creating large numbers of manifests
     grp3 = parser.add_mutually_exclusive_group(required=False)
     grp3.add_argument('--MegaMaid', action="store_true",
                       help=argp.SUPPRESS,
                       default=False)
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     return parser, args
 
@@ -18,29 +18,182 @@ lower level routines internal to Yvette that actually do the work
 from __future__ import division, print_function, absolute_import
 
 import json
+import shlex
 import datetime as dt
 
 from ligmos import utils
 
 
-def rStringVerify(baseYcmd, ldir, filetype):
+class YvetteAgent(object):
+    """A persistent Yvette on the far end of an already open SSH connection.
+
+    Rather than starting a new Yvette for every query, start her once in
+    agent mode (see :mod:`dataservants.yvette.agent`) and then pass
+    requests back and forth over the same SSH channel.
+
+    Args:
+        eSSH (:class:`dataservants.utils.ssh.SSHHandler`)
+            Opened SSH connection to the instrument host.
+        baseYcmd (:obj:`str`)
+            String describing how to properly start Yvette on the target.
+        timeout (:obj:`float`, optional)
+            Seconds to wait for any single answer before giving up.
+            Defaults to 600.
+    """
+    def __init__(self, eSSH, baseYcmd, timeout=600.):
+        self.eSSH = eSSH
+        self.baseYcmd = baseYcmd
+        self.timeout = timeout
+        self.stdin = None
+        self.stdout = None
+        self.nrequests = 0
+
+    def start(self):
+        # Nothing ever reads the agent's stderr (where all of the actions'
+        #   own printing ends up), and if it's left to pile up in the SSH
+        #   channel's window the agent eventually blocks writing to it and
+        #   stops answering. So just throw it away on the far end.
+        acmd = "%s --agent 2>/dev/null" % (self.baseYcmd.strip())
+        chans = self.eSSH.ssh.exec_command(acmd, timeout=self.timeout)
+        self.stdin, self.stdout = chans[0], chans[1]
+
+    def alive(self):
+        if self.stdout is None:
+            return False
+        chan = self.stdout.channel
+        return chan.closed is False and chan.exit_status_ready() is False
+
+    def query(self, argv, debug=False):
+        """Send one request to the agent and wait for its answer.
+
+        Args:
+            argv (:obj:`list`)
+                Yvette arguments, exactly as they'd be on the command line.
+            debug (:obj:`bool`)
+                Bool to trigger additional debugging outputs.
+                Defaults to False.
+
+        Returns:
+            ans (:obj:`dict`)
+                Decoded answer from the agent; see
+                :mod:`dataservants.yvette.agent` for the format.
+        """
+        self.nrequests += 1
+        req = {"id": self.nrequests, "argv": argv}
+        if debug is True:
+            print("Sending request to Yvette agent: %s" % (req))
+        self.stdin.write(json.dumps(req) + "\n")
+        self.stdin.flush()
+
+        line = self.stdout.readline()
+        if line == '':
+            raise IOError("Yvette agent went away!")
+
+        ans = json.loads(line)
+        if ans.get("id", None) != self.nrequests:
+            raise IOError("Yvette agent answered the wrong question!")
+
+        return ans
+
+    def stop(self):
+        try:
+            if self.alive() is True:
+                self.stdin.write(json.dumps({"cmd": "quit"}) + "\n")
+                self.stdin.flush()
+            self.stdout.channel.close()
+        except Exception as err:
+            print("Error stopping Yvette agent: %s" % (str(err)))
+        self.stdin, self.stdout = None, None
+
+
+def sendYvette(eSSH, baseYcmd, fcmd, agent=False, debug=False):
+    """Send a command to Yvette, via a persistent agent if requested.
+
+    If ``agent`` is True, the command is handed to a :class:`YvetteAgent`
+    that is started the first time it's needed and then stored on ``eSSH``
+    so every other action using that same connection can reuse it.  If
+    the agent can't be started or stops answering, this quietly falls
+    back to starting Yvette just for this one command.
+
+    Args:
+        eSSH (:class:`dataservants.utils.ssh.SSHHandler`)
+            Opened SSH connection to the instrument host.
+        baseYcmd (:obj:`str`)
+            String describing how to properly start Yvette on the target.
+        fcmd (:obj:`str`)
+            Full command, starting with ``baseYcmd``, from one of the
+            rString* functions.
+        agent (:obj:`bool`, optional)
+            Bool to use a persistent Yvette agent. Defaults to False.
+        debug (:obj:`bool`)
+            Bool to trigger additional debugging outputs. Defaults to False.
+
+    Returns:
+        ans (:obj:`tuple`)
+            (exit status, JSON string) in the same form as
+            :func:`dataservants.utils.ssh.SSHHandler.sendCommand` so it can
+            be handed straight to :func:`decodeAnswer`.
+    """
+    if agent is True and fcmd.startswith(baseYcmd):
+        yagent = getattr(eSSH, 'yvetteAgent', None)
+        try:
+            if yagent is None or yagent.alive() is False:
+                yagent = YvetteAgent(eSSH, baseYcmd)
+                yagent.start()
+                eSSH.yvetteAgent = yagent
+
+            argv = shlex.split(fcmd[len(baseYcmd):])
+            ans = yagent.query(argv, debug=debug)
+            if ans['status'] == 0:
+                return 0, json.dumps(ans['answer'])
+            else:
+                print("Yvette agent error: %s" % (ans.get('error', '')))
+                return ans['status'], ''
+        except Exception as err:
+            print("Yvette agent failed! %s" % (str(err)))
+            print("Falling back to a one-off Yvette command")
+            if yagent is not None:
+                yagent.stop()
+            eSSH.yvetteAgent = None
+
+    return eSSH.sendCommand(fcmd, debug=debug)
+
+
+def rStringVerify(baseYcmd, ldir, filetype, fast=False, samplefrac=0.02):
     fcmd = "%s --verify %s --filetype %s" % (baseYcmd, ldir, filetype)
+    if fast is True:
+        fcmd += " --fastverify --samplefrac %f" % (samplefrac)
     return fcmd
 
 
-def rStringLookNew(baseYcmd, bdir, dirmask, newage=2):
+def rStringLookNew(baseYcmd, bdir, dirmask, newage=2, fingerprint=False):
     fcmd = "%s -l %s -r %s --rangeNew %d" % (baseYcmd,
                                              bdir,
                                              dirmask,
                                              newage)
+    if fingerprint is True:
+        fcmd += " --fingerprint"
     return fcmd
 
 
-def rStringLookOld(baseYcmd, bdir, dirmask, newage=2, oldage=365):
+def rStringLookOld(baseYcmd, bdir, dirmask, newage=2, oldage=365,
+                   fingerprint=False):
     fcmd = "%s -o %s -r %s --rangeOld %d --oldest %d" % (baseYcmd,
                                                          bdir,
                                                          dirmask,
                                                          newage, oldage)
+    if fingerprint is True:
+        fcmd += " --fingerprint"
+    return fcmd
+
+
+def rStringMerkle(baseYcmd, ldir, htype, nodes=None):
+    if nodes is None:
+        fcmd = "%s %s --merkle --hashtype %s" % (baseYcmd, ldir, htype)
+    else:
+        fcmd = "%s %s --merkleNodes %s --hashtype %s" % (baseYcmd, ldir,
+                                                         ",".join(nodes),
+                                                         htype)
     return fcmd
 
 
@@ -59,6 +212,17 @@ def rStringStats(baseYcmd):
     return fcmd
 
 
+def rStringBatch(baseYcmd, mdir, actions, dirmask="[0-9]{8}.*",
+                 procName='lois', newage=2, oldage=21, oldest=7300):
+    fcmd = "%s %s --actions %s" % (baseYcmd, mdir, ",".join(actions))
+    if 'checkProcess' in actions:
+        fcmd += " --checkProcess %s" % (procName)
+    if 'look' in actions or 'old' in actions:
+        fcmd += " -r %s --rangeNew %d --rangeOld %d --oldest %d" % \
+            (shlex.quote(dirmask), newage, oldage, oldest)
+    return fcmd
+
+
 def commandYvetteSimple(eSSH, baseYcmd, args, iobj, cmd, debug=False):
     """
     A simplifier to cut down on copy-and-paste-itis for commands that
@@ -70,6 +234,12 @@ def commandYvetteSimple(eSSH, baseYcmd, args, iobj, cmd, debug=False):
             fnd = {"DirsNew":
                     (2, ["/mnt/lemi/lois/20180305a",
                     "/mnt/lemi/lois/20180306a"])}
+
+        If 'findnew' is asked for with a transfer ledger in use (see
+        :mod:`dataservants.wadsworth.ledger`), or 'findold' with a
+        ``quietAge``, there's also a third element: a dict of each
+        directory's fingerprint from
+        :func:`dataservants.yvette.filehashing.dirFingerprint`.
     """
     # Make comparisons a bit easier
     cmd = cmd.lower()
@@ -77,34 +247,73 @@ def commandYvetteSimple(eSSH, baseYcmd, args, iobj, cmd, debug=False):
     # Command menu
     if cmd == 'findnew':
         fcmd = rStringLookNew(baseYcmd, iobj.srcdir, iobj.dirmask,
-                              newage=args.rangeNew)
+                              newage=args.rangeNew,
+                              fingerprint=getattr(args, 'ledger',
+                                                  None) is not None)
     elif cmd == 'findold':
         fcmd = rStringLookOld(baseYcmd, iobj.srcdir, iobj.dirmask,
-                              newage=args.rangeOld, oldage=args.oldest)
+                              newage=args.rangeOld, oldage=args.oldest,
+                              fingerprint=getattr(args, 'quietAge', 0) > 0)
     elif cmd == 'verify':
-        fcmd = rStringVerify(baseYcmd, iobj.srcdir, iobj.filemask)
+        fcmd = rStringVerify(baseYcmd, iobj.srcdir, iobj.filemask,
+                             fast=args.fastverify,
+                             samplefrac=args.samplefrac)
     else:
         print("Command unknown! Ignoring.")
         return None
 
     # If we got here, the command is valid so we'll send it
-    nd = eSSH.sendCommand(fcmd, debug=debug)
+    nd = sendYvette(eSSH, baseYcmd, fcmd, agent=args.agent, debug=debug)
     print(nd)
     fnd = decodeAnswer(nd)
 
     return fnd
 
 
+def actionMerkle(eSSH, baseYcmd, ldir, htype, nodes=None, agent=False,
+                 debug=False):
+    """Ask Yvette about the Merkle tree of a directory's hash file.
+
+    Args:
+        eSSH (:class:`dataservants.utils.ssh.SSHHandler`)
+            Opened SSH connection to the instrument host.
+        baseYcmd (:obj:`str`)
+            String describing how to properly start Yvette on the target.
+        ldir (:obj:`str`)
+            Directory on the instrument host.
+        htype (:obj:`str`)
+            Hash type of the hash file.
+        nodes (:obj:`list`, optional)
+            Prefixes of the tree nodes to ask about. Defaults to None,
+            which asks for the root.
+        agent (:obj:`bool`, optional)
+            Bool to use a persistent Yvette agent. Defaults to False.
+        debug (:obj:`bool`)
+            Bool to trigger additional debugging outputs. Defaults to False.
+
+    Returns:
+        ans (:obj:`dict`)
+            :func:`dataservants.yvette.merkle.rootSummary` if ``nodes`` is
+            None, otherwise :func:`dataservants.yvette.merkle.nodeSummary`.
+            None if Yvette didn't (or couldn't) answer.
+    """
+    fcmd = rStringMerkle(baseYcmd, ldir, htype, nodes=nodes)
+    nd = sendYvette(eSSH, baseYcmd, fcmd, agent=agent, debug=debug)
+    fnd = decodeAnswer(nd, debug=debug)
+
+    if nodes is None:
+        return fnd.get('Merkle', None)
+    else:
+        return fnd.get('MerkleNodes', None)
+
+
 def actionProcess(eSSH, baseYcmd, iobj, procName='lois',
-                  db=None, debug=False):
+                  db=None, agent=False, debug=False):
     """
     """
-    # A place to store any/all packets that are made here, to be returned
-    packets = []
-
     # Get the command string that Yvette will understand and then send it
     fcmd = rStringCheckProcess(baseYcmd, name=procName)
-    fs = eSSH.sendCommand(fcmd)
+    fs = sendYvette(eSSH, baseYcmd, fcmd, agent=agent)
 
     # Timestamp of when this all (just) occured
     ts = dt.datetime.utcnow()
@@ -112,6 +321,32 @@ def actionProcess(eSSH, baseYcmd, iobj, procName='lois',
     # Turn Yvette's JSON answer into an object
     fsa = decodeAnswer(fs, debug=debug)
 
+    packets = packetsProcess(fsa, iobj, ts, db=db)
+
+    return packets
+
+
+def packetsProcess(fsa, iobj, ts, db=None):
+    """Turn Yvette's (decoded) answer to --checkProcess into InfluxDB packets.
+
+    Args:
+        fsa (:obj:`dict`)
+            Decoded answer from Yvette, from :func:`decodeAnswer`.
+        iobj (:class:`dataservants.utils.common.InstrumentHost`)
+            Class containing instrument machine target information.
+        ts (:class:`datetime.datetime`)
+            Timestamp to give the packets.
+        db (:class:`dataservants.utils.database.influxobj`, optional)
+            Database object in which to write the results. Defaults to
+            None, in which case the packets are constructed but not written.
+
+    Returns:
+        packets (:obj:`list`)
+            List of InfluxDB style packets; see :func:`actionProcess`.
+    """
+    # A place to store any/all packets that are made here, to be returned
+    packets = []
+
     # Now make the packet given the deserialized json answer
     meas = ['ProcessStats']
     tags = {'host': iobj.host}
@@ -245,7 +480,7 @@ def actionProcess(eSSH, baseYcmd, iobj, procName='lois',
     return packets
 
 
-def actionSpace(eSSH, baseYcmd, iobj, db=None, debug=False):
+def actionSpace(eSSH, baseYcmd, iobj, db=None, agent=False, debug=False):
     """Check free space at the specified directory.
 
     Uses a `Paramiko <http://docs.paramiko.org/en/latest/>`_ SSH
@@ -270,6 +505,9 @@ def actionSpace(eSSH, baseYcmd, iobj, db=None, debug=False):
             InfluxDB database name in which to write the results. Defaults to
             None, in which case the InfluxDB packet is constructed but
             not written anywhere.
+        agent (:obj:`bool`, optional)
+            Bool to ask a persistent Yvette agent rather than starting a
+            new Yvette; see :func:`sendYvette`. Defaults to False.
         debug (:obj:`bool`)
             Bool to trigger additional debugging outputs. Defaults to False.
 
@@ -294,17 +532,40 @@ def actionSpace(eSSH, baseYcmd, iobj, db=None, debug=False):
                                       'free': 268.3059501647949,
                                       'percentfree': 0.67}}]
     """
-    # In case of emergency
-    superdebug = False
-
     fcmd = rStringSpace(baseYcmd, iobj.srcdir)
-    fs = eSSH.sendCommand(fcmd)
+    fs = sendYvette(eSSH, baseYcmd, fcmd, agent=agent)
     # Timestamp of when this all (just) occured
     ts = dt.datetime.utcnow()
 
     # Turn Yvette's JSON answer into an object
     fsa = decodeAnswer(fs, debug=debug)
 
+    packet = packetSpace(fsa, iobj, ts, db=db)
+
+    return packet
+
+
+def packetSpace(fsa, iobj, ts, db=None):
+    """Turn Yvette's (decoded) answer to --freespace into an InfluxDB packet.
+
+    Args:
+        fsa (:obj:`dict`)
+            Decoded answer from Yvette, from :func:`decodeAnswer`.
+        iobj (:class:`dataservants.utils.common.InstrumentHost`)
+            Class containing instrument machine target information.
+        ts (:class:`datetime.datetime`)
+            Timestamp to give the packet.
+        db (:class:`dataservants.utils.database.influxobj`, optional)
+            Database object in which to write the results. Defaults to
+            None, in which case the packet is constructed but not written.
+
+    Returns:
+        packet (:obj:`list` of :obj:`dicts`)
+            InfluxDB style packet; see :func:`actionSpace`.
+    """
+    # In case of emergency
+    superdebug = False
+
     # Now make the packet given the deserialized json answer
     meas = ['FreeSpace']
     tags = {'host': iobj.host}
@@ -343,7 +604,7 @@ def actionSpace(eSSH, baseYcmd, iobj, db=None, debug=False):
     return packet
 
 
-def actionStats(eSSH, baseYcmd, iobj, db=None, debug=False):
+def actionStats(eSSH, baseYcmd, iobj, db=None, agent=False, debug=False):
     """Check CPU and RAM information on the remote machine.
 
     Uses a `Paramiko <http://docs.paramiko.org/en/latest/>`_ SSH
@@ -368,6 +629,9 @@ def actionStats(eSSH, baseYcmd, iobj, db=None, debug=False):
             InfluxDB database name in which to write the results. Defaults to
             None, in which case the InfluxDB packet is constructed but
             not written anywhere.
+        agent (:obj:`bool`, optional)
+            Bool to ask a persistent Yvette agent rather than starting a
+            new Yvette; see :func:`sendYvette`. Defaults to False.
         debug (:obj:`bool`)
             Bool to trigger additional debugging outputs. Defaults to False.
 
@@ -404,7 +668,7 @@ def actionStats(eSSH, baseYcmd, iobj, db=None, debug=False):
     superdebug = False
 
     fcmd = rStringStats(baseYcmd)
-    fs = eSSH.sendCommand(fcmd, debug=debug)
+    fs = sendYvette(eSSH, baseYcmd, fcmd, agent=agent, debug=debug)
     # Timestamp of when this all (just) occured
     ts = dt.datetime.utcnow()
 
@@ -414,6 +678,32 @@ def actionStats(eSSH, baseYcmd, iobj, db=None, debug=False):
         print(fs)
         print(fsa)
 
+    packet = packetStats(fsa, iobj, ts, db=db)
+
+    return packet
+
+
+def packetStats(fsa, iobj, ts, db=None):
+    """Turn Yvette's (decoded) answer to --cpumem into an InfluxDB packet.
+
+    Args:
+        fsa (:obj:`dict`)
+            Decoded answer from Yvette, from :func:`decodeAnswer`.
+        iobj (:class:`dataservants.utils.common.InstrumentHost`)
+            Class containing instrument machine target information.
+        ts (:class:`datetime.datetime`)
+            Timestamp to give the packet.
+        db (:class:`dataservants.utils.database.influxobj`, optional)
+            Database object in which to write the results. Defaults to
+            None, in which case the packet is constructed but not written.
+
+    Returns:
+        packet (:obj:`list` of :obj:`dicts`)
+            InfluxDB style packet; see :func:`actionStats`.
+    """
+    # In case of emergency
+    superdebug = False
+
     # Now make the packet given the deserialized json answer
     meas = ['MachineStats']
     tags = {'host': iobj.host}
@@ -470,6 +760,106 @@ def actionStats(eSSH, baseYcmd, iobj, db=None, debug=False):
     return packet
 
 
+def actionBatch(eSSH, baseYcmd, iobj, actions=None, procName='lois',
+                newage=2, oldage=21, oldest=7300,
+                db=None, agent=False, debug=False):
+    """Ask Yvette several questions at once, in a single round trip.
+
+    Rather than one Yvette call each for :func:`actionSpace`,
+    :func:`actionStats`, :func:`actionProcess` and the directory listings,
+    send them all as one ``--actions`` list and split the single combined
+    answer back up into the same packets/results those would give.
+
+    Args:
+        eSSH (:class:`dataservants.utils.ssh.SSHHandler`)
+            Class describing parameters needed to open SSH connection to
+            instantiated class's host.
+        baseYcmd (:obj:`str`)
+            String describing how to properly start Yvette on the target.
+        iobj (:class:`dataservants.utils.common.InstrumentHost`)
+            Class containing instrument machine target information
+            populated via :func:`dataservants.utils.confparsers.parseInstConf`.
+        actions (:obj:`list`, optional)
+            Any of 'freespace', 'cpumem', 'checkProcess', 'look' and 'old',
+            plus 'fingerprint' to have the 'look' and 'old' answers include
+            each directory's fingerprint too.
+            Defaults to None, meaning ['freespace', 'cpumem'].
+        procName (:obj:`str`, optional)
+            Process name to look for with 'checkProcess'. Defaults to 'lois'.
+        newage (:obj:`int`, optional)
+            Maximum age (days) of directories found by 'look'. Defaults to 2.
+        oldage (:obj:`int`, optional)
+            Minimum age (days) of directories found by 'old'. Defaults to 21.
+        oldest (:obj:`int`, optional)
+            Age (days) beyond which 'old' ignores directories.
+            Defaults to 7300.
+        db (:class:`dataservants.utils.database.influxobj`, optional)
+            Database object in which to write the packets. Defaults to
+            None, in which case the packets are constructed but not written.
+        agent (:obj:`bool`, optional)
+            Bool to ask a persistent Yvette agent rather than starting a
+            new Yvette; see :func:`sendYvette`. Defaults to False.
+        debug (:obj:`bool`)
+            Bool to trigger additional debugging outputs. Defaults to False.
+
+    Returns:
+        results (:obj:`dict`)
+            Dict keyed by each requested action. 'freespace', 'cpumem'
+            and 'checkProcess' give the same packets as :func:`actionSpace`,
+            :func:`actionStats` and :func:`actionProcess`, while 'look' and
+            'old' give Yvette's (count, list of directories) answers.
+            Actions that Yvette didn't answer give an empty list, and
+            'fingerprint' isn't in there at all since it's not an answer.
+
+            .. code-block:: python
+
+                results = {'freespace': [{'measurement': 'FreeSpace', ...}],
+                           'look': (2, ["/mnt/lemi/lois/20180305a",
+                                        "/mnt/lemi/lois/20180306a"])}
+    """
+    if actions is None:
+        actions = ['freespace', 'cpumem']
+
+    fcmd = rStringBatch(baseYcmd, iobj.srcdir, actions,
+                        dirmask=getattr(iobj, 'dirmask', "[0-9]{8}.*"),
+                        procName=procName, newage=newage,
+                        oldage=oldage, oldest=oldest)
+    fs = sendYvette(eSSH, baseYcmd, fcmd, agent=agent, debug=debug)
+    # Timestamp of when this all (just) occured
+    ts = dt.datetime.utcnow()
+
+    # Turn Yvette's JSON answer into an object
+    fsa = decodeAnswer(fs, debug=debug)
+
+    # Which key in Yvette's answer belongs to each action
+    answerKeys = {'freespace': 'FreeSpace',
+                  'cpumem': 'MachineCPU',
+                  'checkProcess': 'ProcessStats',
+                  'look': 'DirsNew',
+                  'old': 'DirsOld'}
+
+    # These just change how other actions are answered, so they don't get
+    #   any answer (or result) of their own
+    modifiers = ['fingerprint']
+
+    results = {}
+    for each in actions:
+        if each in modifiers:
+            continue
+        elif answerKeys.get(each, None) not in fsa:
+            results.update({each: []})
+        elif each == 'freespace':
+            results.update({each: packetSpace(fsa, iobj, ts, db=db)})
+        elif each == 'cpumem':
+            results.update({each: packetStats(fsa, iobj, ts, db=db)})
+        elif each == 'checkProcess':
+            results.update({each: packetsProcess(fsa, iobj, ts, db=db)})
+        else:
+            results.update({each: fsa[answerKeys[each]]})
+
+    return results
+
+
 def decodeAnswer(ans, debug=False):
     """Parse the JSON formatted output from Yvette.
 
@@ -45,7 +45,9 @@ def packActions(args, hfname, debug=False):
     """
     # Create a manifest dict
     hash1 = filehashing.makeManifest(args.dir, filetype=args.filetype,
-                                     htype=args.hashtype, debug=debug)
+                                     htype=args.hashtype,
+                                     workers=args.workers,
+                                     walkers=args.walkers, debug=debug)
 
     # If hash1 is None, then there were no files to hash
     if hash1 is not None:
@@ -84,19 +86,30 @@ def verificationActions(args, hfname, debug=False):
     """
     # Verification step
     broken = filehashing.verifyFiles(args.dir, filetype=args.filetype,
-                                     htype=args.hashtype, debug=debug)
+                                     htype=args.hashtype,
+                                     fast=args.fastverify,
+                                     samplefrac=args.samplefrac,
+                                     workers=args.workers,
+                                     walkers=args.walkers, debug=debug)
 
     # If norepack is False and there's files to repack...then do it
     if args.norepack is False and broken[2] != []:
         hash1 = filehashing.makeManifest(args.dir, filetype=args.filetype,
-                                         htype=args.hashtype, debug=debug)
+                                         htype=args.hashtype,
+                                         workers=args.workers,
+                                         walkers=args.walkers, debug=debug)
 
         hfcheck = utils.hashes.writeHashFile(hash1, hfname, debug=debug)
         # Return logging; only try again if we wrote the file correctly
         if hfcheck is True:
             # Verify one more time to see if we got them all
             broken = filehashing.verifyFiles(args.dir, filetype=args.filetype,
-                                             htype=args.hashtype, debug=debug)
+                                             htype=args.hashtype,
+                                             fast=args.fastverify,
+                                             samplefrac=args.samplefrac,
+                                             workers=args.workers,
+                                             walkers=args.walkers,
+                                             debug=debug)
 
     # Return the results, whatever they are. Ideally
     #   unhashed files and missing files are [] but sometimes
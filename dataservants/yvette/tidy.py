@@ -28,9 +28,11 @@ except ImportError:
     xxhash = None
 
 from ligmos import utils
+from . import agent
 from . import tasks
 from . import parseargs
 from . import filehashing
+from . import merkle
 
 
 def nanny(args):
@@ -63,6 +65,170 @@ def nanny(args):
     return dirstatus, vdir
 
 
+def applyActionList(args):
+    """Turn an ``--actions`` list into the equivalent individual flags.
+
+    Args:
+        args (:class:`argparse.Namespace`)
+            Class containing parsed arguments, returned from
+            :func:`dataservants.yvette.parseargs.setup_arguments`.
+            Modified in place.
+
+    Returns:
+        unknown (:obj:`list`)
+            Any requested actions that aren't understood.
+    """
+    # checkProcess is special since it also needs a process name, which
+    #   has to come from --checkProcess itself
+    flags = {'freespace': 'freespace',
+             'cpumem': 'cpumem',
+             'look': 'look',
+             'old': 'old',
+             'fingerprint': 'fingerprint'}
+
+    unknown = []
+    for each in args.actions.split(","):
+        each = each.strip()
+        if each in flags:
+            setattr(args, flags[each], True)
+        elif each == 'checkProcess' and args.checkProcess is not None:
+            pass
+        elif each != '':
+            unknown.append(each)
+
+    return unknown
+
+
+def tidyActions(args):
+    """Do all of the actions requested in args, and collect the results.
+
+    This is the guts of :func:`beginTidying`, split out so it can also be
+    used to answer requests when Yvette is running as an agent
+    (see :mod:`dataservants.yvette.agent`).
+
+    Args:
+        args (:class:`argparse.Namespace`)
+            Class containing parsed arguments, returned from
+            :func:`dataservants.yvette.parseargs.setup_arguments`.
+
+    Returns:
+        rjson (:obj:`dict`)
+            Dictionary of results from specified actions. See
+            :mod:`dataservants.yvette.remote` for specifics on format.
+    """
+    rjson = {}
+
+    # Expand a list of requested actions, if we got one
+    if args.actions is not None:
+        unknown = applyActionList(args)
+        if unknown != []:
+            rjson.update({"UnknownActions": unknown})
+
+    # Take care of some nanny actions
+    dirstatus, vdir = nanny(args)
+    if dirstatus is False:
+        print("Directory %s not found or accessible!" % (vdir))
+
+    # Setting some variables that don't depend on states/actions
+    #   but might be useful to have declared for all of them
+    hfname = args.dir + "/AListofHashes." + args.hashtype
+
+    # ACTIONS start here.  If the logic is more than one or two
+    #   function calls, it's been broken out into another function
+    #   elsewhere
+    if args.freespace is True:
+        frees = utils.files.checkFreeSpace(args.dir, debug=args.debug)
+        rjson.update({"FreeSpace": frees})
+
+    if args.cpumem is True:
+        cpus = utils.cpumem.checkCPUusage()
+        mems = utils.cpumem.checkMemStats()
+        loads = utils.cpumem.checkLoadAvgs()
+        rjson.update({"MachineCPU": cpus, "MachineMem": mems,
+                      "MachineLoads": loads})
+
+    if args.checkProcess is not None:
+        pstats = utils.cpumem.checkProcess(name=args.checkProcess)
+        rjson.update({"ProcessStats": pstats})
+
+    if dirstatus is True:
+        # Check for non-exclusionary actions
+        if args.look is True:
+            ndirs = utils.files.getDirListing(vdir,
+                                              dirmask=args.regexp,
+                                              window=args.rangeNew,
+                                              comptype='newer',
+                                              debug=args.debug)
+            if args.fingerprint is True:
+                fprints = filehashing.dirFingerprints(ndirs,
+                                                      debug=args.debug)
+                rjson.update({"DirsNew": (len(ndirs), ndirs, fprints)})
+            else:
+                rjson.update({"DirsNew": (len(ndirs), ndirs)})
+
+        if args.old is True:
+            odirs = utils.files.getDirListing(vdir,
+                                              dirmask=args.regexp,
+                                              window=args.rangeOld,
+                                              oldest=args.oldest,
+                                              comptype='older',
+                                              debug=args.debug)
+
+            if args.fingerprint is True:
+                fprints = filehashing.dirFingerprints(odirs,
+                                                      debug=args.debug)
+                rjson.update({"DirsOld": (len(odirs), odirs, fprints)})
+            else:
+                rjson.update({"DirsOld": (len(odirs), odirs)})
+
+        if args.merkle is True:
+            summ = merkle.rootSummary(vdir, htype=args.hashtype,
+                                      debug=args.debug)
+            rjson.update({"Merkle": summ})
+
+        if args.merkleNodes is not None:
+            keys = args.merkleNodes.split(",")
+            nodes = merkle.nodeSummary(vdir, keys, htype=args.hashtype,
+                                       debug=args.debug)
+            rjson.update({"MerkleNodes": nodes})
+
+        # Check for EXCLUSIONARY actions (there can be only one)
+        if args.clean is True:
+            # TODO: Write the cleaning logic
+            pass
+
+        if args.pack is True:
+            # Create a manifest dict
+            hfname = tasks.packActions(args, hfname, debug=args.debug)
+            rjson.update({"HashFile": hfname})
+
+        if args.verify is True:
+            broken = tasks.verificationActions(args, hfname,
+                                               debug=args.debug)
+            if isinstance(broken, tuple):
+                rjson.update({"HashChecks": {"NFilesFound": broken[0],
+                                             "MissingFiles": broken[1],
+                                             "UnhashedFiles": broken[2],
+                                             "DifferentFiles": broken[3]}})
+            else:
+                rjson.update({"HashChecks": "PROBLEMS"})
+
+        if args.MegaMaid is True:
+            res = filehashing.MegaMaid(vdir, dirmask=args.regexp,
+                                       filetype=args.filetype,
+                                       youngest=args.rangeOld,
+                                       oldest=args.oldest,
+                                       htype=args.hashtype,
+                                       workers=args.workers,
+                                       walkers=args.walkers,
+                                       debug=args.debug)
+            rjson.update({"MegaMaid": res})
+    else:
+        print("%s doesn't exist or isnt' readable" % (args.dir))
+
+    return rjson
+
+
 def beginTidying(noprint=False):
     """Main entry point for Yvette, which also handles arguments
 
@@ -73,7 +239,9 @@ def beginTidying(noprint=False):
 
     If this code is called remotely via :mod:`dataservants.wadsworth` or
     :mod:`dataservants:alfred` then the interactions are defined in
-    :mod:`dataservants.yvette.remote`.
+    :mod:`dataservants.yvette.remote`.  If Yvette was started with
+    ``--agent`` then she stays running and answers requests until her
+    input is closed; see :mod:`dataservants.yvette.agent`.
 
     Args:
         noprint (:obj:`bool`, optional)
@@ -97,85 +265,11 @@ def beginTidying(noprint=False):
 
     if len(sys.argv) == 1:
         parser.print_help()
+    elif args.agent is True:
+        # Nothing comes back from here until we're told to quit
+        agent.serveAgent(tidyActions)
     else:
-        # Take care of some nanny actions
-        dirstatus, vdir = nanny(args)
-        if dirstatus is False:
-            print("Directory %s not found or accessible!" % (vdir))
-
-        # Setting some variables that don't depend on states/actions
-        #   but might be useful to have declared for all of them
-        hfname = args.dir + "/AListofHashes." + args.hashtype
-
-        # ACTIONS start here.  If the logic is more than one or two
-        #   function calls, it's been broken out into another function
-        #   elsewhere
-        if args.freespace is True:
-            frees = utils.files.checkFreeSpace(args.dir, debug=args.debug)
-            rjson.update({"FreeSpace": frees})
-
-        if args.cpumem is True:
-            cpus = utils.cpumem.checkCPUusage()
-            mems = utils.cpumem.checkMemStats()
-            loads = utils.cpumem.checkLoadAvgs()
-            rjson.update({"MachineCPU": cpus, "MachineMem": mems,
-                          "MachineLoads": loads})
-
-        if args.checkProcess is not None:
-            pstats = utils.cpumem.checkProcess(name=args.checkProcess)
-            rjson.update({"ProcessStats": pstats})
-
-        if dirstatus is True:
-            # Check for non-exclusionary actions
-            if args.look is True:
-                ndirs = utils.files.getDirListing(vdir,
-                                                  dirmask=args.regexp,
-                                                  window=args.rangeNew,
-                                                  comptype='newer',
-                                                  debug=args.debug)
-                rjson.update({"DirsNew": (len(ndirs), ndirs)})
-
-            if args.old is True:
-                odirs = utils.files.getDirListing(vdir,
-                                                  dirmask=args.regexp,
-                                                  window=args.rangeOld,
-                                                  oldest=args.oldest,
-                                                  comptype='older',
-                                                  debug=args.debug)
-
-                rjson.update({"DirsOld": (len(odirs), odirs)})
-
-            # Check for EXCLUSIONARY actions (there can be only one)
-            if args.clean is True:
-                # TODO: Write the cleaning logic
-                pass
-
-            if args.pack is True:
-                # Create a manifest dict
-                hfname = tasks.packActions(args, hfname, debug=args.debug)
-                rjson.update({"HashFile": hfname})
-
-            if args.verify is True:
-                broken = tasks.verificationActions(args, hfname,
-                                                   debug=args.debug)
-                if isinstance(broken, tuple):
-                    rjson.update({"HashChecks": {"NFilesFound": broken[0],
-                                                 "MissingFiles": broken[1],
-                                                 "UnhashedFiles": broken[2],
-                                                 "DifferentFiles": broken[3]}})
-                else:
-                    rjson.update({"HashChecks": "PROBLEMS"})
-
-            if args.MegaMaid is True:
-                res = filehashing.MegaMaid(vdir, dirmask=args.regexp,
-                                           filetype=args.filetype,
-                                           youngest=args.rangeOld,
-                                           oldest=args.oldest,
-                                           htype=args.hashtype,
-                                           debug=args.debug)
-                rjson.update({"MegaMaid": res})
-        else:
-            print("%s doesn't exist or isnt' readable" % (args.dir))
+        rjson = tidyActions(args)
 
     if rjson != {} and noprint is False:
         print(json.dumps(rjson))
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Old verifyFiles comparison loops vs. filehashing.reconcileManifests.
+
+The manifests are synthetic, but shaped like a big night's worth: a hash
+file written on the instrument host (so a different mount point) and a
+directory listing here, with a few files missing, a few new ones that
+aren't in the hash file yet, and a few whose hashes don't match.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import time
+import random
+from os.path import basename
+
+from dataservants.yvette import filehashing
+
+
+def oldReconcile(ff, newKeys, existingHashes):
+    """The verifyFiles way, before.
+    """
+    fpmissing = []
+    mismatch = []
+    nohash = []
+    existingFiles = [basename(each) for each in existingHashes]
+
+    inDR = [basename(each) for each in ff]
+    missing = list(set(existingFiles) - set(inDR))
+    for s in missing:
+        for fullpathfile in existingHashes:
+            if s in fullpathfile:
+                fpmissing.append(fullpathfile)
+
+    relExisting = {}
+    for it in existingHashes.items():
+        relExisting.update({basename(it[0]): [it[0], it[1]]})
+
+    for tf in ff:
+        testfile = basename(tf)
+        try:
+            if newKeys[testfile] != relExisting[testfile][1]:
+                mismatch.append(tf)
+        except KeyError:
+            nohash.append(tf)
+
+    return fpmissing, nohash, mismatch
+
+
+def makeManifests(nfiles, nmissing, nnew, nbad, seed=42):
+    """Synthetic (ff, newKeys, existingHashes) with the given differences.
+    """
+    rng = random.Random(seed)
+    names = ["lmi.%06d.fits" % (i) for i in range(nfiles + nnew)]
+    hashes = ["%016x" % (rng.getrandbits(64)) for _ in names]
+
+    # The hash file doesn't know about the last nnew files yet
+    existingHashes = {}
+    for name, hval in zip(names[:nfiles], hashes[:nfiles]):
+        existingHashes["/mnt/lemi/lois/20261018/" + name] = hval
+
+    # and some of the ones it does know about are gone from here
+    gone = set(rng.sample(range(nfiles), nmissing))
+    ff = ["/data/lmi/20261018/" + name
+          for i, name in enumerate(names) if i not in gone]
+
+    newKeys = {basename(f): hval for f, hval in zip(names, hashes)}
+    for name in rng.sample(sorted(newKeys), nbad):
+        newKeys[name] = "%016x" % (rng.getrandbits(64))
+    for i in gone:
+        del newKeys[names[i]]
+
+    return ff, newKeys, existingHashes
+
+
+def timeit(func, *args):
+    """Seconds that one call of func(*args) takes, and what it returned.
+    """
+    t0 = time.perf_counter()
+    ans = func(*args)
+
+    return time.perf_counter() - t0, ans
+
+
+def main():
+    """
+    Compare the old and new ways on a few sizes of manifest.
+    """
+    print("%-8s %-8s %10s %10s %9s" % ("Files", "Missing", "Old (s)",
+                                       "New (s)", "Speedup"))
+    for nfiles, nmissing in [(1000, 10), (10000, 100),
+                             (100000, 1000), (100000, 10000)]:
+        manis = makeManifests(nfiles, nmissing, nfiles//100, nfiles//100)
+
+        otime, oans = timeit(oldReconcile, *manis)
+        ntime, nans = timeit(filehashing.reconcileManifests, *manis)
+
+        # Make sure they agree (ignoring order) before believing the times
+        if [sorted(each) for each in oans] != [sorted(each) for each in nans]:
+            print("WARNING: results differ for %d files!" % (nfiles))
+
+        print("%-8d %-8d %10.4f %10.4f %8.1fx" % (nfiles, nmissing, otime,
+                                                  ntime, otime/ntime))
+
+
+if __name__ == "__main__":
+    main()
@@ -153,12 +153,9 @@ def parseRsyncStats(outbuf):
                     nf = int(vals[0].split(":")[1])
                     nd = int(vals[1].split(":")[1])
                     val = {"nreg": nf, "ndir": nd}
-                elif keysmap[key] == 'totsize' or\
-                                     'totxfersize' or\
-                                     'literaldata' or\
-                                     'matchdata' or\
-                                     'flisttime' or\
-                                     'flistxftertime':
+                elif keysmap[key] in ['totsize', 'totxfersize',
+                                      'literaldata', 'matchdata',
+                                      'flisttime', 'flistxftertime']:
                     val = val.split()[0].strip()
                     try:
                         # Kill any commas in the numbers
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Timestamps/s for the old strptime + pytz way vs. dataservants.timestamps.
+
+Each case is one of the timestamp dances the parsers actually do: the
+Boltwood/AAG/VWS local time -> localize(), and the Meteobridge and
+PurpleAir UTC -> US/Arizona.  The timestamps are a day's worth at 1 s
+cadence, like a live feed would see.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import time
+import datetime as dt
+
+import pytz
+
+from dataservants import timestamps
+
+
+def oldLocal(text):
+    """The Boltwood/AAG/VWS way, before.
+    """
+    thisTZ = pytz.timezone('US/Arizona')
+    dtobj = dt.datetime.strptime(text, "%Y-%m-%dT%H:%M:%S.%f")
+    return thisTZ.localize(dtobj)
+
+
+def newLocal(text):
+    """The Boltwood/AAG/VWS way, now.
+    """
+    dtobj = timestamps.parseTimestamp(text, "%Y-%m-%dT%H:%M:%S.%f")
+    return timestamps.localizeTime(dtobj, 'US/Arizona')
+
+
+def oldUTC(text):
+    """The Meteobridge/PurpleAir way, before.
+    """
+    mv = dt.datetime.strptime(text, "%Y%m%d%H%M%S")
+    mv = mv.replace(tzinfo=pytz.UTC)
+    return mv.astimezone(pytz.timezone("US/Arizona"))
+
+
+def newUTC(text):
+    """The Meteobridge/PurpleAir way, now.
+    """
+    mv = timestamps.parseTimestamp(text, "%Y%m%d%H%M%S")
+    return timestamps.utcToZone(mv, "US/Arizona")
+
+
+def rate(func, texts, mintime=1.0):
+    """Timestamps per second for func over texts, run for at least mintime.
+    """
+    n = 0
+    t0 = time.perf_counter()
+    while True:
+        for text in texts:
+            func(text)
+        n += len(texts)
+        elapsed = time.perf_counter() - t0
+        if elapsed >= mintime:
+            break
+
+    return n/elapsed
+
+
+def main():
+    """
+    Run the old and new ways for each case and print the rates.
+    """
+    start = dt.datetime(2026, 10, 18)
+    times = [start + dt.timedelta(seconds=i, microseconds=460000)
+             for i in range(86400)]
+
+    cases = {'Local (Boltwood)': (oldLocal, newLocal,
+                                  [t.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-4]
+                                   for t in times]),
+             'UTC (Meteobridge)': (oldUTC, newUTC,
+                                   [t.strftime("%Y%m%d%H%M%S")
+                                    for t in times])}
+
+    print("%-20s %12s %12s %8s" % ("Case", "Old/s", "New/s", "Speedup"))
+    for case in cases:
+        old, new, texts = cases[case]
+
+        # Make sure they actually agree before timing anything
+        for text in texts[::997]:
+            a, b = old(text), new(text)
+            if a != b or a.utcoffset() != b.utcoffset():
+                print("WARNING: %s results differ for %s!" % (case, text))
+                break
+
+        orate = rate(old, texts)
+        nrate = rate(new, texts)
+        print("%-20s %12.0f %12.0f %7.2fx" % (case, orate, nrate,
+                                              nrate/orate))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Messages/s for generic vs. compiled XML field extraction, per topic.
+
+Three ways are timed:
+
+* "Synthetic": a stand-in for the generic path written here, that parses
+  each message into a nested dict, flattens it, and figures out the type
+  of every value, all over again for every single message.  It is NOT
+  what ligmos actually does, so its numbers are only a rough guide.
+* "ligmos": the real thing, a tXML message going through the listener
+  (:class:`dataservants.iago.routing.RoutedConsumer`) without --fastxml,
+  so through ligmos and its xmlschema parsing.  This is only run if
+  ligmos and xmlschema can be imported, and the listener actually
+  writes something for the message (it needs the topic's schema).
+* "Compiled": the same listener with --fastxml, which uses
+  :func:`dataservants.iago.xmlfields.extractFields`.
+
+The test messages are made up, but shaped like the real ones: a small
+flat one, and a bigger nested one with some repeated element names.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import time
+import random
+import importlib.util
+import xml.etree.ElementTree as ET
+
+from dataservants.iago import xmlfields
+
+
+def makeMessage(root, ngroups, nper, seed=None):
+    """Make a fake data packet with ngroups groups of nper values each.
+    """
+    rng = random.Random(seed)
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>']
+    parts.append('<%s><timestamp>2026-10-18T12:34:56.789Z</timestamp>' %
+                 (root))
+    for g in range(ngroups):
+        if ngroups > 1:
+            parts.append('<Group%d>' % (g))
+        for i in range(nper):
+            if i % 7 == 3:
+                val = rng.choice(['true', 'false'])
+            elif i % 11 == 5:
+                val = 'Status%d' % (rng.randint(0, 5))
+            else:
+                val = '%.5f' % (rng.uniform(-100, 100))
+            # Repeat some names across groups, like the real ones do
+            name = 'Value%d' % (i) if i < 3 else 'G%dValue%d' % (g, i)
+            parts.append('<%s>%s</%s>' % (name, val, name))
+        if ngroups > 1:
+            parts.append('</Group%d>' % (g))
+    parts.append('</%s>' % (root))
+
+    return "".join(parts)
+
+
+def toDict(elem):
+    """Recursive element -> dict, like a generic XML to dict conversion.
+    """
+    kids = list(elem)
+    if kids == []:
+        return elem.text
+    return {xmlfields.stripNS(kid.tag): toDict(kid) for kid in kids}
+
+
+def flatten(d, prefix=''):
+    """Flatten a nested dict, joining keys with '_'.
+    """
+    flat = {}
+    for key in d:
+        fkey = "%s_%s" % (prefix, key) if prefix != '' else key
+        if isinstance(d[key], dict):
+            flat.update(flatten(d[key], prefix=fkey))
+        else:
+            flat.update({fkey: d[key]})
+
+    return flat
+
+
+def genericExtract(body):
+    """The generic, do-everything-every-time way.
+    """
+    root = ET.fromstring(body)
+    flat = flatten(toDict(root))
+    ts = xmlfields.parseTimestamp(flat.pop('timestamp'))
+    fields = {}
+    for key in flat:
+        if flat[key] is not None:
+            conv = xmlfields.inferConverter(flat[key])
+            fields[key] = conv(flat[key])
+
+    return [xmlfields.stripNS(root.tag), ts, 'ms', fields]
+
+
+class CountingDB(object):
+    """Stands in for the database, just counting the packets it's given.
+    """
+    tablename = 'bench'
+
+    def __init__(self):
+        self.npackets = 0
+
+    def singleCommit(self, packet, table=None, timeprec=None, close=False):
+        self.npackets += 1
+
+
+def listenerPath(topic, fastxml=False):
+    """The real listener path for a tXML topic, if it can run here.
+
+    Returns:
+        func (:obj:`function`)
+            Called like func(topic, message), or None if ligmos or
+            xmlschema aren't available.
+        db (:class:`CountingDB`)
+            What the listener writes to, or None.
+    """
+    if importlib.util.find_spec('xmlschema') is None:
+        return None, None
+    try:
+        from dataservants.iago.routing import RoutedConsumer
+    except ImportError:
+        return None, None
+
+    db = CountingDB()
+    try:
+        listener = RoutedConsumer(dbconn=db, tXML=[topic], fastxml=fastxml)
+    except Exception as err:
+        print("Couldn't set up the listener for %s: %s" % (topic, str(err)))
+        return None, None
+
+    headers = {'destination': '/topic/%s' % (topic)}
+
+    return lambda t, m: listener.on_message(headers, m), db
+
+
+def rate(func, topic, msgs, mintime=1.0):
+    """Messages per second for func over msgs, run for at least mintime.
+    """
+    n = 0
+    t0 = time.perf_counter()
+    while True:
+        for msg in msgs:
+            func(topic, msg)
+        n += len(msgs)
+        elapsed = time.perf_counter() - t0
+        if elapsed >= mintime:
+            break
+
+    return n/elapsed
+
+
+def main():
+    """
+    Run each way over each fake topic and print the rates.
+    """
+    topics = {'Fake.FlatPacket': (1, 12),
+              'Fake.AOSDataPacket': (6, 15),
+              'Fake.TCSTcsStatusSV': (12, 20)}
+
+    print("%-22s %7s %12s %12s %12s %8s" % ("Topic", "Fields", "Synthetic/s",
+                                            "ligmos/s", "Compiled/s",
+                                            "Speedup"))
+    for topic in topics:
+        ngroups, nper = topics[topic]
+        msgs = [makeMessage(topic.split(".")[1], ngroups, nper, seed=i)
+                for i in range(50)]
+
+        # Make sure they actually agree before timing anything
+        gen = genericExtract(msgs[0])
+        comp = xmlfields.extractFields(topic, msgs[0])
+        if sorted(gen[3].values(), key=str) != \
+           sorted(comp[3].values(), key=str):
+            print("WARNING: %s results differ!" % (topic))
+
+        grate = rate(lambda t, m: genericExtract(m), topic, msgs)
+
+        # The real thing, if it'll run; only believe it if the listener
+        #   actually wrote out the check message, since otherwise it's
+        #   just timing how quickly it gives up
+        lrate = None
+        slow, sdb = listenerPath(topic, fastxml=False)
+        fast, fdb = listenerPath(topic, fastxml=True)
+        if slow is not None and fast is not None:
+            slow(topic, msgs[0])
+            if sdb.npackets > 0:
+                lrate = rate(slow, topic, msgs)
+                crate = rate(fast, topic, msgs)
+
+        if lrate is None:
+            # Compare against the synthetic stand-in instead
+            crate = rate(xmlfields.extractFields, topic, msgs)
+            print("%-22s %7d %12.0f %12s %12.0f %7.2fx (vs. synthetic)" %
+                  (topic, len(comp[3]), grate, "skipped", crate,
+                   crate/grate))
+        else:
+            print("%-22s %7d %12.0f %12.0f %12.0f %7.2fx" %
+                  (topic, len(comp[3]), grate, lrate, crate, crate/lrate))
+
+
+if __name__ == "__main__":
+    main()